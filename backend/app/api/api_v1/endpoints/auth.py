@@ -2,12 +2,15 @@ from datetime import datetime, timedelta
 from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import jwt
 from pydantic import BaseModel
 
 from app.core.config import settings
-from app.core.deps import get_db, get_current_admin_user
+from app.core.deps import get_async_db, get_db, get_current_admin_user
+from app.core.password_hashing import PasswordHasherBusy
 from app.crud.crud_admin_users import crud_admin_user
 from app.schemas.admin_users import AdminUserResponse, AdminUserCreate
 from app.models.models import TblTenants
@@ -50,17 +53,25 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 
 
 @router.post("/login", response_model=LoginResponse)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     Enhanced with tenant information
     """
-    user = crud_admin_user.authenticate(
-        db, username=form_data.username, password=form_data.password
-    )
+    # bcrypt runs on the dedicated password hasher executor, not the shared threadpool
+    try:
+        user = await crud_admin_user.authenticate_async(
+            db, username=form_data.username, password=form_data.password
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,7 +88,8 @@ def login_for_access_token(
     # Get tenant information if user belongs to a tenant
     tenant_info = None
     if user.tenant_id:
-        tenant = db.query(TblTenants).filter(TblTenants.id == user.tenant_id).first()
+        result = await db.execute(select(TblTenants).where(TblTenants.id == user.tenant_id))
+        tenant = result.scalars().first()
         if tenant:
             tenant_info = {
                 "id": tenant.id,
@@ -187,59 +199,6 @@ def change_password(
         )
     
     # Cập nhật mật khẩu mới
-    crud_admin_user.update_password(db, user_id=current_user.id, new_password=new_password)
+    crud_admin_user.update_password(db, db_obj=user, new_password=new_password, updated_by=current_user.username)
     
     return {"message": "Đổi mật khẩu thành công"}
-    user = crud_admin_user.authenticate(
-        db, username=form_data.username, password=form_data.password
-    )
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    if user.status != "active":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User account is inactive",
-        )
-    
-    # Get tenant information if user belongs to a tenant
-    tenant_info = None
-    if user.tenant_id:
-        tenant = db.query(TblTenants).filter(TblTenants.id == user.tenant_id).first()
-        if tenant:
-            tenant_info = {
-                "id": tenant.id,
-                "name": tenant.name,
-                "domain": tenant.domain,
-                "status": tenant.status
-            }
-    
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": str(user.id),
-            "tenant_id": user.tenant_id,
-            "role": user.role,
-            "username": user.username
-        }, 
-        expires_delta=access_token_expires
-    )
-    
-    return LoginResponse(
-        access_token=access_token,
-        token_type="bearer",
-        user_info=user,
-        tenant_info=tenant_info
-    )
-
-
-@router.post("/test-token", response_model=AdminUserResponse)
-def test_token(current_user: AdminUserResponse = Depends(get_current_admin_user)) -> Any:
-    """
-    Test access token
-    """
-    return current_user
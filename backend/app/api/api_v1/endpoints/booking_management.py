@@ -1,12 +1,15 @@
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, select
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
-from app.core.deps import get_db, get_current_admin_user
-from app.models.models import TblBookingRequests, TblAdminUsers, TblCustomers, TblRooms
+from app.core.deps import get_async_db, get_async_read_db, get_current_admin_user
+from app.crud.crud_booking_requests import booking_request_async
+from app.crud.crud_dashboard import crud_dashboard
+from app.crud.pagination import InvalidCursorError, next_cursor_for, order_for_keyset, paginate_keyset_async
+from app.models.models import TblBookingRequests, TblAdminUsers
 from app.schemas.booking_requests import BookingRequestUpdate
 
 router = APIRouter()
@@ -30,22 +33,24 @@ def send_booking_notification(booking_id: int, status: str, customer_email: str
     pass
 
 @router.get("/booking-requests/management")
-def get_booking_requests_advanced(
+async def get_booking_requests_advanced(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor của trang trước (bỏ qua skip)"),
+    include_total: bool = Query(True, description="Đếm tổng số bản ghi (tắt để nhanh hơn)"),
     status_filter: Optional[str] = Query(None),
     customer_name: Optional[str] = Query(None),
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lấy danh sách booking requests với bộ lọc nâng cao
     """
     try:
         # Base query với tenant filtering - không join với customers để tránh lỗi
-        query = db.query(TblBookingRequests).filter(
+        query = select(TblBookingRequests).where(
             and_(
                 TblBookingRequests.deleted == 0,
                 TblBookingRequests.tenant_id == current_user.tenant_id
@@ -54,7 +59,7 @@ def get_booking_requests_advanced(
         
         # Apply filters
         if status_filter:
-            query = query.filter(TblBookingRequests.status == status_filter)
+            query = query.where(TblBookingRequests.status == status_filter)
         
         # Tạm thời comment out customer_name filter để tránh lỗi
         # if customer_name:
@@ -65,31 +70,44 @@ def get_booking_requests_advanced(
         if date_from:
             try:
                 date_from_obj = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                query = query.filter(TblBookingRequests.check_in_date >= date_from_obj)
+                query = query.where(TblBookingRequests.check_in_date >= date_from_obj)
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid date_from format")
         
         if date_to:
             try:
                 date_to_obj = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                query = query.filter(TblBookingRequests.check_out_date <= date_to_obj)
+                query = query.where(TblBookingRequests.check_out_date <= date_to_obj)
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid date_to format")
         
-        # Get total count
-        total_count = query.count()
+        # Get total count (optional: COUNT(*) is the slowest part on large tenants)
+        total_count = None
+        if include_total:
+            total_count = (await db.execute(
+                select(func.count()).select_from(query.subquery())
+            )).scalar()
+        
+        # Get paginated results with order by creation date (id breaks ties)
+        sort_columns = [TblBookingRequests.created_at, TblBookingRequests.id]
+        if cursor:
+            # Keyset pagination: constant cost regardless of depth
+            bookings, next_cursor = await paginate_keyset_async(db, query, columns=sort_columns, cursor=cursor, limit=limit)
+        else:
+            bookings = (await db.execute(
+                order_for_keyset(query, sort_columns).offset(skip).limit(limit + 1)
+            )).scalars().all()
+            next_cursor = next_cursor_for(bookings[:limit], sort_columns) if len(bookings) > limit else None
+            bookings = bookings[:limit]
         
-        # Get paginated results with order by creation date
-        bookings = query.order_by(TblBookingRequests.created_at.desc()).offset(skip).limit(limit).all()
+        # Resolve customers and rooms for the whole page (one query per entity)
+        customers, rooms = await booking_request_async.get_related(db, bookings=bookings)
         
         # Enhance with additional info
         enhanced_bookings = []
         for booking in bookings:
-            # Get customer info
-            customer = db.query(TblCustomers).filter(TblCustomers.id == booking.customer_id).first()
-            
-            # Get room info
-            room = db.query(TblRooms).filter(TblRooms.id == booking.room_id).first()
+            customer = customers.get(booking.customer_id)
+            room = rooms.get(booking.room_id)
             
             booking_data = {
                 "id": booking.id,
@@ -121,9 +139,10 @@ def get_booking_requests_advanced(
                 "bookings": enhanced_bookings,
                 "pagination": {
                     "total": total_count,
-                    "skip": skip,
+                    "skip": None if cursor else skip,
                     "limit": limit,
-                    "has_more": skip + limit < total_count
+                    "has_more": next_cursor is not None,
+                    "next_cursor": next_cursor
                 },
                 "filters_applied": {
                     "status": status_filter,
@@ -134,34 +153,131 @@ def get_booking_requests_advanced(
             }
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi lấy danh sách booking: {str(e)}")
 
+@router.get("/booking-requests/management/statistics")
+async def get_booking_statistics(
+    days: int = Query(30, ge=1, le=365),
+    current_user: TblAdminUsers = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Lấy thống kê booking requests trong khoảng thời gian
+    """
+    try:
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        
+        # Read the period totals from the daily rollup instead of rescanning bookings
+        period_totals = (await db.run_sync(
+            crud_dashboard.get_period_comparison,
+            tenant_id=current_user.tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+            previous_start=start_date
+        ))["current"]
+        
+        # Count by status
+        status_counts = {}
+        statuses = ["pending", "confirmed", "cancelled", "completed", "no_show"]
+        for status in statuses:
+            status_counts[status] = period_totals[f"bookings_{status}"]
+        
+        # Total bookings
+        total_bookings = period_totals["bookings_total"]
+        
+        # Total revenue (room stays checked in during the period)
+        total_revenue = period_totals["room_stay_revenue"]
+        
+        # Average booking value
+        avg_booking_value = float(total_revenue) / max(status_counts["confirmed"] + status_counts["completed"], 1)
+        
+        # Bookings by day (last 7 days)
+        daily_bookings = [
+            {"date": day["date"].strftime("%Y-%m-%d"), "count": day["count"]}
+            for day in await db.run_sync(
+                crud_dashboard.get_daily_counts, tenant_id=current_user.tenant_id, days=7, end_date=end_date
+            )
+        ]
+        
+        # Top customers (by booking count) - tạm thời comment out vì không có customer fields
+        # top_customers = db.query(
+        #     TblBookingRequests.customer_name,
+        #     TblBookingRequests.customer_email,
+        #     func.count(TblBookingRequests.id).label('booking_count'),
+        #     func.sum(TblBookingRequests.total_amount).label('total_spent')
+        # ).filter(
+        #     and_(
+        #         TblBookingRequests.tenant_id == current_user.tenant_id,
+        #         TblBookingRequests.created_at >= start_date,
+        #         TblBookingRequests.deleted == 0
+        #     )
+        # ).group_by(
+        #     TblBookingRequests.customer_name,
+        #     TblBookingRequests.customer_email
+        # ).order_by(
+        #     func.count(TblBookingRequests.id).desc()
+        # ).limit(5).all()
+
+        # top_customers_data = [
+        #     {
+        #         "customer_name": customer.customer_name,
+        #         "customer_email": customer.customer_email,
+        #         "booking_count": customer.booking_count,
+        #         "total_spent": float(customer.total_spent or 0)
+        #     }
+        #     for customer in top_customers
+        # ]
+        
+        top_customers_data = []  # Tạm thời để trống
+        
+        return {
+            "success": True,
+            "data": {
+                "period": {
+                    "days": days,
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat()
+                },
+                "overview": {
+                    "total_bookings": total_bookings,
+                    "total_revenue": float(total_revenue),
+                    "average_booking_value": round(avg_booking_value, 2)
+                },
+                "status_breakdown": status_counts,
+                "daily_trend": daily_bookings,
+                "top_customers": top_customers_data
+            }
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi lấy thống kê booking: {str(e)}")
+
 @router.get("/booking-requests/management/{booking_id}")
-def get_booking_detail(
+async def get_booking_detail(
     booking_id: int,
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lấy chi tiết booking request
     """
     try:
         # Get booking with tenant check
-        booking = db.query(TblBookingRequests).filter(
-            and_(
-                TblBookingRequests.id == booking_id,
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.deleted == 0
-            )
-        ).first()
+        booking = await booking_request_async.get(db, id=booking_id, tenant_id=current_user.tenant_id)
         
         if not booking:
             raise HTTPException(status_code=404, detail="Booking không tồn tại")
         
         # Get related information
-        customer = db.query(TblCustomers).filter(TblCustomers.id == booking.customer_id).first()
-        room = db.query(TblRooms).filter(TblRooms.id == booking.room_id).first()
+        customers, rooms = await booking_request_async.get_related(db, bookings=[booking])
+        customer = customers.get(booking.customer_id)
+        room = rooms.get(booking.room_id)
         
         # Calculate stay duration
         if booking.check_in_date and booking.check_out_date:
@@ -213,12 +329,12 @@ def get_booking_detail(
         raise HTTPException(status_code=500, detail=f"Lỗi lấy chi tiết booking: {str(e)}")
 
 @router.put("/booking-requests/management/{booking_id}/status")
-def update_booking_status(
+async def update_booking_status(
     booking_id: int,
     status_update: BookingStatusUpdate,
     background_tasks: BackgroundTasks,
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cập nhật trạng thái booking request
@@ -233,13 +349,7 @@ def update_booking_status(
             )
         
         # Get booking with tenant check
-        booking = db.query(TblBookingRequests).filter(
-            and_(
-                TblBookingRequests.id == booking_id,
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.deleted == 0
-            )
-        ).first()
+        booking = await booking_request_async.get(db, id=booking_id, tenant_id=current_user.tenant_id)
         
         if not booking:
             raise HTTPException(status_code=404, detail="Booking không tồn tại")
@@ -247,15 +357,15 @@ def update_booking_status(
         # Store old status for logging
         old_status = booking.status
         
-        # Update booking
-        booking.status = status_update.status
+        # Update booking (through CRUD so the daily statistics follow the status change)
         if status_update.admin_notes:
             booking.admin_notes = status_update.admin_notes
-        booking.updated_at = datetime.now()
-        booking.updated_by = current_user.username
-        
-        db.commit()
-        db.refresh(booking)
+        booking = await booking_request_async.update(
+            db,
+            db_obj=booking,
+            obj_in={"status": status_update.status, "updated_at": datetime.now()},
+            updated_by=current_user.username
+        )
         
         # Add background task for notification - tạm thời comment out vì không có email field
         # if booking.customer_email:
@@ -281,152 +391,22 @@ def update_booking_status(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi cập nhật trạng thái: {str(e)}")
 
-@router.get("/booking-requests/management/statistics")
-def get_booking_statistics(
-    days: int = Query(30, ge=1, le=365),
-    current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Lấy thống kê booking requests trong khoảng thời gian
-    """
-    try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        # Base query with tenant and date filter
-        base_query = db.query(TblBookingRequests).filter(
-            and_(
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.created_at >= start_date,
-                TblBookingRequests.deleted == 0
-            )
-        )
-        
-        # Count by status
-        status_counts = {}
-        statuses = ["pending", "confirmed", "cancelled", "completed", "no_show"]
-        for status in statuses:
-            count = base_query.filter(TblBookingRequests.status == status).count()
-            status_counts[status] = count
-        
-        # Total bookings
-        total_bookings = base_query.count()
-        
-        # Total revenue (confirmed + completed bookings)
-        revenue_query = base_query.filter(
-            TblBookingRequests.status.in_(["confirmed", "completed"])
-        )
-        total_revenue = db.query(func.sum(TblBookingRequests.total_amount)).filter(
-            and_(
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.created_at >= start_date,
-                TblBookingRequests.status.in_(["confirmed", "completed"]),
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
-        
-        # Average booking value
-        avg_booking_value = float(total_revenue) / max(status_counts["confirmed"] + status_counts["completed"], 1)
-        
-        # Bookings by day (last 7 days)
-        daily_bookings = []
-        for i in range(7):
-            day_start = (datetime.now() - timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            day_count = db.query(func.count(TblBookingRequests.id)).filter(
-                and_(
-                    TblBookingRequests.tenant_id == current_user.tenant_id,
-                    TblBookingRequests.created_at >= day_start,
-                    TblBookingRequests.created_at < day_end,
-                    TblBookingRequests.deleted == 0
-                )
-            ).scalar() or 0
-            
-            daily_bookings.append({
-                "date": day_start.strftime("%Y-%m-%d"),
-                "count": day_count
-            })
-        
-        # Reverse to get chronological order
-        daily_bookings.reverse()
-        
-        # Top customers (by booking count) - tạm thời comment out vì không có customer fields
-        # top_customers = db.query(
-        #     TblBookingRequests.customer_name,
-        #     TblBookingRequests.customer_email,
-        #     func.count(TblBookingRequests.id).label('booking_count'),
-        #     func.sum(TblBookingRequests.total_amount).label('total_spent')
-        # ).filter(
-        #     and_(
-        #         TblBookingRequests.tenant_id == current_user.tenant_id,
-        #         TblBookingRequests.created_at >= start_date,
-        #         TblBookingRequests.deleted == 0
-        #     )
-        # ).group_by(
-        #     TblBookingRequests.customer_name,
-        #     TblBookingRequests.customer_email
-        # ).order_by(
-        #     func.count(TblBookingRequests.id).desc()
-        # ).limit(5).all()
-
-        # top_customers_data = [
-        #     {
-        #         "customer_name": customer.customer_name,
-        #         "customer_email": customer.customer_email,
-        #         "booking_count": customer.booking_count,
-        #         "total_spent": float(customer.total_spent or 0)
-        #     }
-        #     for customer in top_customers
-        # ]
-        
-        top_customers_data = []  # Tạm thời để trống
-        
-        return {
-            "success": True,
-            "data": {
-                "period": {
-                    "days": days,
-                    "start_date": start_date.isoformat(),
-                    "end_date": end_date.isoformat()
-                },
-                "overview": {
-                    "total_bookings": total_bookings,
-                    "total_revenue": float(total_revenue),
-                    "average_booking_value": round(avg_booking_value, 2)
-                },
-                "status_breakdown": status_counts,
-                "daily_trend": daily_bookings,
-                "top_customers": top_customers_data
-            }
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Lỗi lấy thống kê booking: {str(e)}")
-
 @router.post("/booking-requests/management/{booking_id}/cancel")
-def cancel_booking_with_reason(
+async def cancel_booking_with_reason(
     booking_id: int,
     cancellation_reason: str,
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Hủy booking với lý do cụ thể
     """
     try:
         # Get booking with tenant check
-        booking = db.query(TblBookingRequests).filter(
-            and_(
-                TblBookingRequests.id == booking_id,
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.deleted == 0
-            )
-        ).first()
+        booking = await booking_request_async.get(db, id=booking_id, tenant_id=current_user.tenant_id)
         
         if not booking:
             raise HTTPException(status_code=404, detail="Booking không tồn tại")
@@ -437,15 +417,15 @@ def cancel_booking_with_reason(
         if booking.status == "completed":
             raise HTTPException(status_code=400, detail="Không thể hủy booking đã hoàn thành")
         
-        # Update booking
+        # Update booking (through CRUD so the daily statistics follow the status change)
         old_status = booking.status
-        booking.status = "cancelled"
         booking.admin_notes = f"Hủy bởi {current_user.username}. Lý do: {cancellation_reason}"
-        booking.updated_at = datetime.now()
-        booking.updated_by = current_user.username
-        
-        db.commit()
-        db.refresh(booking)
+        booking = await booking_request_async.update(
+            db,
+            db_obj=booking,
+            obj_in={"status": "cancelled", "updated_at": datetime.now()},
+            updated_by=current_user.username
+        )
         
         return {
             "success": True,
@@ -463,5 +443,5 @@ def cancel_booking_with_reason(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi hủy booking: {str(e)}")
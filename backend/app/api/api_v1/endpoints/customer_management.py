@@ -5,8 +5,13 @@ from sqlalchemy import func, and_, or_
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
-from app.core.deps import get_db, get_current_admin_user
-from app.models.models import TblCustomers, TblAdminUsers, TblBookingRequests, TblCustomerVouchers
+from app.core.deps import get_db, get_read_db, get_current_admin_user
+from app.crud.crud_customers import customer as crud_customer
+from app.crud.crud_daily_stats import daily_stats
+from app.crud.pagination import (
+    InvalidCursorError, decode_cursor, keyset_condition, next_cursor_for, order_for_keyset
+)
+from app.models.models import TblCustomers, TblAdminUsers, TblBookingRequests, TblCustomerVouchers, TblRoomStays, TblVouchers
 from app.schemas.customers import CustomerUpdate
 
 router = APIRouter()
@@ -15,15 +20,15 @@ class CustomerSearchFilter(BaseModel):
     name: Optional[str] = None
     email: Optional[str] = None
     phone: Optional[str] = None
-    loyalty_level: Optional[str] = None
 
 @router.get("/customers/management")
 def get_customers_advanced(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor của trang trước (chỉ khi sort_by=created_at)"),
+    include_total: bool = Query(True, description="Đếm tổng số bản ghi (tắt để nhanh hơn)"),
     search_query: Optional[str] = Query(None),
-    loyalty_level: Optional[str] = Query(None),
-    sort_by: str = Query("created_at", regex="^(created_at|total_bookings|loyalty_points|last_booking)$"),
+    sort_by: str = Query("created_at", regex="^(created_at|name)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
@@ -43,94 +48,69 @@ def get_customers_advanced(
         # Apply search filter
         if search_query:
             search_filter = or_(
-                TblCustomers.full_name.ilike(f"%{search_query}%"),
+                TblCustomers.name.ilike(f"%{search_query}%"),
                 TblCustomers.email.ilike(f"%{search_query}%"),
                 TblCustomers.phone.ilike(f"%{search_query}%")
             )
             query = query.filter(search_filter)
         
-        # Apply loyalty level filter
-        if loyalty_level:
-            query = query.filter(TblCustomers.loyalty_level == loyalty_level)
+        # Keyset pagination is only available for the (created_at, id) ordering
+        keyset_columns = [TblCustomers.created_at, TblCustomers.id] if sort_by == "created_at" else None
+        if cursor and not keyset_columns:
+            raise HTTPException(status_code=400, detail="cursor chỉ hỗ trợ sort_by=created_at")
+        
+        # Get total count (optional: COUNT(*) is the slowest part on large tenants)
+        total_count = query.count() if include_total else None
         
         # Apply sorting
         if sort_by == "created_at":
+            query = order_for_keyset(query, keyset_columns, descending=sort_order == "desc")
+        elif sort_by == "name":
+            # id breaks ties so offset pages stay stable
             if sort_order == "desc":
-                query = query.order_by(TblCustomers.created_at.desc())
-            else:
-                query = query.order_by(TblCustomers.created_at.asc())
-        elif sort_by == "total_bookings":
-            if sort_order == "desc":
-                query = query.order_by(TblCustomers.total_bookings.desc())
-            else:
-                query = query.order_by(TblCustomers.total_bookings.asc())
-        elif sort_by == "loyalty_points":
-            if sort_order == "desc":
-                query = query.order_by(TblCustomers.loyalty_points.desc())
-            else:
-                query = query.order_by(TblCustomers.loyalty_points.asc())
-        elif sort_by == "last_booking":
-            if sort_order == "desc":
-                query = query.order_by(TblCustomers.last_booking_date.desc().nulls_last())
+                query = query.order_by(TblCustomers.name.desc(), TblCustomers.id.desc())
             else:
-                query = query.order_by(TblCustomers.last_booking_date.asc().nulls_first())
+                query = query.order_by(TblCustomers.name.asc(), TblCustomers.id.asc())
         
-        # Get total count
-        total_count = query.count()
-        
-        # Get paginated results
-        customers = query.offset(skip).limit(limit).all()
+        # Get paginated results (one extra row tells whether there is a next page)
+        if cursor:
+            query = query.filter(
+                keyset_condition(keyset_columns, decode_cursor(cursor, keyset_columns), descending=sort_order == "desc")
+            )
+        else:
+            query = query.offset(skip)
+        customers = query.limit(limit + 1).all()
+        has_more = len(customers) > limit
+        customers = customers[:limit]
+        next_cursor = next_cursor_for(customers, keyset_columns) if has_more and keyset_columns else None
+        
+        # Per-customer statistics for the whole page (grouped queries, not per row)
+        statistics = crud_customer.get_statistics(
+            db, tenant_id=current_user.tenant_id, customer_ids=[customer.id for customer in customers]
+        )
         
         # Enhance with additional statistics
         enhanced_customers = []
         for customer in customers:
-            # Get recent booking info
-            recent_booking = db.query(TblBookingRequests).filter(
-                and_(
-                    TblBookingRequests.customer_id == customer.id,
-                    TblBookingRequests.tenant_id == current_user.tenant_id,
-                    TblBookingRequests.deleted == 0
-                )
-            ).order_by(TblBookingRequests.created_at.desc()).first()
-            
-            # Get vouchers count
-            vouchers_count = db.query(func.count(TblCustomerVouchers.id)).filter(
-                and_(
-                    TblCustomerVouchers.customer_id == customer.id,
-                    TblCustomerVouchers.deleted == 0
-                )
-            ).scalar() or 0
-            
-            # Calculate customer value metrics
-            total_spent = db.query(func.sum(TblBookingRequests.total_amount)).filter(
-                and_(
-                    TblBookingRequests.customer_id == customer.id,
-                    TblBookingRequests.tenant_id == current_user.tenant_id,
-                    TblBookingRequests.status.in_(["confirmed", "completed"]),
-                    TblBookingRequests.deleted == 0
-                )
-            ).scalar() or 0
+            customer_stats = statistics.get(customer.id, {})
+            recent_booking = customer_stats.get("recent_booking")
+            last_booking_at = customer_stats.get("last_booking_at")
             
             customer_data = {
                 "id": customer.id,
-                "full_name": customer.full_name,
+                "full_name": customer.name,  # Sử dụng name thay vì full_name
                 "email": customer.email,
                 "phone": customer.phone,
-                "date_of_birth": customer.date_of_birth.isoformat() if customer.date_of_birth else None,
-                "gender": customer.gender,
-                "address": customer.address,
-                "city": customer.city,
-                "country": customer.country,
-                "loyalty_level": customer.loyalty_level,
-                "loyalty_points": customer.loyalty_points,
-                "total_bookings": customer.total_bookings,
-                "last_booking_date": customer.last_booking_date.isoformat() if customer.last_booking_date else None,
+                "zalo_user_id": customer.zalo_user_id,
+                # Derived from the customer's booking requests (no counters on tbl_customers)
+                "total_bookings": customer_stats.get("total_bookings", 0),
+                "last_booking_date": last_booking_at.isoformat() if last_booking_at else None,
                 "created_at": customer.created_at.isoformat(),
                 "updated_at": customer.updated_at.isoformat() if customer.updated_at else None,
                 "statistics": {
-                    "total_spent": float(total_spent),
-                    "vouchers_count": vouchers_count,
-                    "avg_booking_value": float(total_spent) / max(customer.total_bookings, 1),
+                    "total_spent": customer_stats.get("total_spent", 0.0),
+                    "vouchers_count": customer_stats.get("vouchers_count", 0),
+                    "avg_booking_value": customer_stats.get("avg_booking_value", 0.0),
                     "recent_booking": {
                         "id": recent_booking.id,
                         "check_in_date": recent_booking.check_in_date.isoformat() if recent_booking and recent_booking.check_in_date else None,
@@ -146,22 +126,140 @@ def get_customers_advanced(
                 "customers": enhanced_customers,
                 "pagination": {
                     "total": total_count,
-                    "skip": skip,
+                    "skip": None if cursor else skip,
                     "limit": limit,
-                    "has_more": skip + limit < total_count
+                    "has_more": has_more,
+                    "next_cursor": next_cursor
                 },
                 "filters_applied": {
                     "search_query": search_query,
-                    "loyalty_level": loyalty_level,
                     "sort_by": sort_by,
                     "sort_order": sort_order
                 }
             }
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi lấy danh sách khách hàng: {str(e)}")
 
+@router.get("/customers/management/statistics")
+def get_customer_statistics(
+    days: int = Query(30, ge=1, le=365),
+    current_user: TblAdminUsers = Depends(get_current_admin_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Lấy thống kê khách hàng trong khoảng thời gian
+    """
+    try:
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        
+        # Base query with tenant filter
+        base_query = db.query(TblCustomers).filter(
+            and_(
+                TblCustomers.tenant_id == current_user.tenant_id,
+                TblCustomers.deleted == 0
+            )
+        )
+        
+        # Total customers
+        total_customers = base_query.count()
+        
+        # New customers in period and by month from the daily rollup (one query each)
+        new_customers = daily_stats.get_period_totals(
+            db, tenant_id=current_user.tenant_id, start_date=start_date, end_date=end_date
+        )["current"]["new_customers"]
+        
+        # TblCustomers has no loyalty level column: nothing to break down yet
+        loyalty_counts = {}
+        
+        # Active customers (have bookings in period)
+        active_customers = db.query(func.count(func.distinct(TblBookingRequests.customer_id))).filter(
+            and_(
+                TblBookingRequests.tenant_id == current_user.tenant_id,
+                TblBookingRequests.created_at >= start_date,
+                TblBookingRequests.deleted == 0
+            )
+        ).scalar() or 0
+        
+        # Top spenders: spending comes from room stays (booking requests carry no amount)
+        total_spent = func.sum(TblRoomStays.total_amount)
+        top_spenders = db.query(
+            TblCustomers.id,
+            TblCustomers.name,
+            TblCustomers.email,
+            total_spent.label('total_spent')
+        ).join(
+            TblRoomStays, TblCustomers.id == TblRoomStays.customer_id
+        ).filter(
+            and_(
+                TblCustomers.tenant_id == current_user.tenant_id,
+                TblRoomStays.tenant_id == current_user.tenant_id,
+                TblRoomStays.checkin_date >= start_date,
+                TblRoomStays.status != "cancelled",
+                TblRoomStays.deleted == 0,
+                TblCustomers.deleted == 0
+            )
+        ).group_by(
+            TblCustomers.id,
+            TblCustomers.name,
+            TblCustomers.email
+        ).order_by(
+            total_spent.desc()
+        ).limit(10).all()
+        
+        top_spenders_data = [
+            {
+                "customer_id": spender.id,
+                "full_name": spender.name,
+                "email": spender.email,
+                "total_spent": float(spender.total_spent or 0)
+            }
+            for spender in top_spenders
+        ]
+        
+        # Customer acquisition by month (last 6 months, chronological)
+        first_month = end_date.date().replace(day=1)
+        for _ in range(5):
+            first_month = (first_month - timedelta(days=1)).replace(day=1)
+        monthly_counts = {}
+        for day in daily_stats.get_daily_totals(
+            db, tenant_id=current_user.tenant_id, days=(end_date.date() - first_month).days + 1, end_date=end_date
+        ):
+            month = day["date"].strftime("%Y-%m")
+            monthly_counts[month] = monthly_counts.get(month, 0) + day["new_customers"]
+        monthly_acquisition = [
+            {"month": month, "new_customers": count} for month, count in monthly_counts.items()
+        ]
+        
+        return {
+            "success": True,
+            "data": {
+                "period": {
+                    "days": days,
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat()
+                },
+                "overview": {
+                    "total_customers": total_customers,
+                    "new_customers": new_customers,
+                    "active_customers": active_customers,
+                    "customer_retention_rate": round((active_customers / max(total_customers, 1)) * 100, 2)
+                },
+                "loyalty_breakdown": loyalty_counts,
+                "top_spenders": top_spenders_data,
+                "monthly_acquisition": monthly_acquisition
+            }
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi lấy thống kê khách hàng: {str(e)}")
+
 @router.get("/customers/management/{customer_id}")
 def get_customer_detailed_profile(
     customer_id: int,
@@ -200,13 +298,14 @@ def get_customer_detailed_profile(
                 "check_in_date": booking.check_in_date.isoformat() if booking.check_in_date else None,
                 "check_out_date": booking.check_out_date.isoformat() if booking.check_out_date else None,
                 "status": booking.status,
-                "total_amount": float(booking.total_amount or 0),
                 "room_id": booking.room_id,
                 "created_at": booking.created_at.isoformat()
             })
         
-        # Get vouchers
-        vouchers = db.query(TblCustomerVouchers).filter(
+        # Get vouchers (code and discount live on the voucher definition)
+        vouchers = db.query(TblCustomerVouchers, TblVouchers).outerjoin(
+            TblVouchers, TblVouchers.id == TblCustomerVouchers.voucher_id
+        ).filter(
             and_(
                 TblCustomerVouchers.customer_id == customer_id,
                 TblCustomerVouchers.deleted == 0
@@ -214,58 +313,40 @@ def get_customer_detailed_profile(
         ).order_by(TblCustomerVouchers.created_at.desc()).limit(10).all()
         
         voucher_list = []
-        for voucher in vouchers:
+        for customer_voucher, voucher in vouchers:
             voucher_list.append({
-                "id": voucher.id,
-                "voucher_code": voucher.voucher_code,
-                "discount_amount": float(voucher.discount_amount or 0),
-                "is_used": voucher.is_used,
-                "used_date": voucher.used_date.isoformat() if voucher.used_date else None,
-                "expiry_date": voucher.expiry_date.isoformat() if voucher.expiry_date else None
+                "id": customer_voucher.id,
+                "voucher_code": voucher.code if voucher else None,
+                "discount_type": voucher.discount_type if voucher else None,
+                "discount_value": float(voucher.discount_value or 0) if voucher else 0.0,
+                "is_used": customer_voucher.is_used,
+                "used_date": customer_voucher.used_at.isoformat() if customer_voucher.used_at else None,
+                "expiry_date": voucher.end_date.isoformat() if voucher and voucher.end_date else None
             })
         
-        # Calculate statistics
-        total_spent = db.query(func.sum(TblBookingRequests.total_amount)).filter(
-            and_(
-                TblBookingRequests.customer_id == customer_id,
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.status.in_(["confirmed", "completed"]),
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
+        # Calculate statistics (same grouped stage as the listing)
+        customer_stats = crud_customer.get_statistics(
+            db, tenant_id=current_user.tenant_id, customer_ids=[customer.id]
+        ).get(customer.id, {})
         
-        cancelled_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(
-                TblBookingRequests.customer_id == customer_id,
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.status == "cancelled",
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
+        last_booking_at = customer_stats.get("last_booking_at")
         
         customer_profile = {
             "id": customer.id,
-            "full_name": customer.full_name,
+            "full_name": customer.name,  # Sử dụng name thay vì full_name
             "email": customer.email,
             "phone": customer.phone,
-            "date_of_birth": customer.date_of_birth.isoformat() if customer.date_of_birth else None,
-            "gender": customer.gender,
-            "address": customer.address,
-            "city": customer.city,
-            "country": customer.country,
-            "loyalty_level": customer.loyalty_level,
-            "loyalty_points": customer.loyalty_points,
-            "total_bookings": customer.total_bookings,
-            "last_booking_date": customer.last_booking_date.isoformat() if customer.last_booking_date else None,
-            "preferences": customer.preferences,
+            "zalo_user_id": customer.zalo_user_id,
+            "total_bookings": customer_stats.get("total_bookings", 0),
+            "last_booking_date": last_booking_at.isoformat() if last_booking_at else None,
             "created_at": customer.created_at.isoformat(),
             "updated_at": customer.updated_at.isoformat() if customer.updated_at else None,
             "statistics": {
-                "total_spent": float(total_spent),
-                "average_booking_value": float(total_spent) / max(customer.total_bookings, 1),
-                "cancelled_bookings": cancelled_bookings,
-                "vouchers_count": len(voucher_list),
-                "active_vouchers": len([v for v in voucher_list if not v["is_used"]])
+                "total_spent": customer_stats.get("total_spent", 0.0),
+                "average_booking_value": customer_stats.get("avg_booking_value", 0.0),
+                "cancelled_bookings": customer_stats.get("cancelled_bookings", 0),
+                "vouchers_count": customer_stats.get("vouchers_count", 0),
+                "active_vouchers": customer_stats.get("active_vouchers", 0)
             },
             "booking_history": booking_history,
             "vouchers": voucher_list
@@ -352,128 +433,3 @@ def update_customer_loyalty_points(
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Lỗi cập nhật điểm loyalty: {str(e)}")
-
-@router.get("/customers/management/statistics")
-def get_customer_statistics(
-    days: int = Query(30, ge=1, le=365),
-    current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Lấy thống kê khách hàng trong khoảng thời gian
-    """
-    try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        # Base query with tenant filter
-        base_query = db.query(TblCustomers).filter(
-            and_(
-                TblCustomers.tenant_id == current_user.tenant_id,
-                TblCustomers.deleted == 0
-            )
-        )
-        
-        # Total customers
-        total_customers = base_query.count()
-        
-        # New customers in period
-        new_customers = base_query.filter(TblCustomers.created_at >= start_date).count()
-        
-        # Customers by loyalty level
-        loyalty_counts = {}
-        loyalty_levels = ["bronze", "silver", "gold", "platinum"]
-        for level in loyalty_levels:
-            count = base_query.filter(TblCustomers.loyalty_level == level).count()
-            loyalty_counts[level] = count
-        
-        # Active customers (have bookings in period)
-        active_customers = db.query(func.count(func.distinct(TblBookingRequests.customer_id))).filter(
-            and_(
-                TblBookingRequests.tenant_id == current_user.tenant_id,
-                TblBookingRequests.created_at >= start_date,
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
-        
-        # Top spenders
-        top_spenders = db.query(
-            TblCustomers.id,
-            TblCustomers.full_name,
-            TblCustomers.email,
-            func.sum(TblBookingRequests.total_amount).label('total_spent')
-        ).join(
-            TblBookingRequests, TblCustomers.id == TblBookingRequests.customer_id
-        ).filter(
-            and_(
-                TblCustomers.tenant_id == current_user.tenant_id,
-                TblBookingRequests.created_at >= start_date,
-                TblBookingRequests.status.in_(["confirmed", "completed"]),
-                TblCustomers.deleted == 0,
-                TblBookingRequests.deleted == 0
-            )
-        ).group_by(
-            TblCustomers.id,
-            TblCustomers.full_name,
-            TblCustomers.email
-        ).order_by(
-            func.sum(TblBookingRequests.total_amount).desc()
-        ).limit(10).all()
-        
-        top_spenders_data = [
-            {
-                "customer_id": spender.id,
-                "full_name": spender.full_name,
-                "email": spender.email,
-                "total_spent": float(spender.total_spent or 0)
-            }
-            for spender in top_spenders
-        ]
-        
-        # Customer acquisition by month (last 12 months)
-        monthly_acquisition = []
-        for i in range(12):
-            month_start = (datetime.now().replace(day=1) - timedelta(days=i*30)).replace(day=1)
-            if i == 0:
-                month_end = datetime.now()
-            else:
-                next_month = month_start + timedelta(days=32)
-                month_end = next_month.replace(day=1) - timedelta(days=1)
-            
-            month_count = base_query.filter(
-                and_(
-                    TblCustomers.created_at >= month_start,
-                    TblCustomers.created_at <= month_end
-                )
-            ).count()
-            
-            monthly_acquisition.append({
-                "month": month_start.strftime("%Y-%m"),
-                "new_customers": month_count
-            })
-        
-        # Reverse to get chronological order
-        monthly_acquisition.reverse()
-        
-        return {
-            "success": True,
-            "data": {
-                "period": {
-                    "days": days,
-                    "start_date": start_date.isoformat(),
-                    "end_date": end_date.isoformat()
-                },
-                "overview": {
-                    "total_customers": total_customers,
-                    "new_customers": new_customers,
-                    "active_customers": active_customers,
-                    "customer_retention_rate": round((active_customers / max(total_customers, 1)) * 100, 2)
-                },
-                "loyalty_breakdown": loyalty_counts,
-                "top_spenders": top_spenders_data,
-                "monthly_acquisition": monthly_acquisition[-6:]  # Last 6 months
-            }
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Lỗi lấy thống kê khách hàng: {str(e)}")
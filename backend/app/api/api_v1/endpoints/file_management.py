@@ -1,27 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import os
-import uuid
 from datetime import datetime
 import shutil
 from pathlib import Path
 
+from app.core.config import settings
 from app.core.deps import get_db, get_current_admin_user
+from app.core.image_variants import image_variants
+from app.core.resumable_uploads import (
+    UploadChecksumMismatch, UploadOffsetMismatch, UploadSessionBusy, UploadSessionNotFound, resumable_uploads
+)
+from app.core.media_store import ALLOWED_EXTENSIONS, GLOBAL_TENANT_ID, media_store
+from app.core.upload_storage import UploadTooLarge, temp_path
+from app.crud.crud_media_files import media_file
+from app.crud.pagination import InvalidCursorError
 from app.models.models import TblAdminUsers
 
 router = APIRouter()
 
-# Allowed file extensions
-ALLOWED_EXTENSIONS = {
-    'image': {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'},
-    'video': {'.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'},
-    'document': {'.pdf', '.doc', '.docx', '.txt', '.xlsx', '.xls'}
-}
-
 # Maximum file size (in bytes)
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_VIDEO_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
 def allowed_file(filename: str, file_type: str = 'image') -> bool:
     """Check if the uploaded file has allowed extension"""
@@ -31,13 +35,6 @@ def allowed_file(filename: str, file_type: str = 'image') -> bool:
     extension = '.' + filename.rsplit('.', 1)[1].lower()
     return extension in ALLOWED_EXTENSIONS.get(file_type, set())
 
-def generate_unique_filename(original_filename: str) -> str:
-    """Generate a unique filename to prevent conflicts"""
-    file_extension = os.path.splitext(original_filename)[1]
-    unique_id = str(uuid.uuid4())
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"{timestamp}_{unique_id}{file_extension}"
-
 @router.post("/upload/image")
 async def upload_image(
     file: UploadFile = File(...),
@@ -54,40 +51,34 @@ async def upload_image(
         if not allowed_file(file.filename, 'image'):
             raise HTTPException(status_code=400, detail="File type not allowed. Only images are accepted.")
         
-        # Check file size
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
-        
-        # Create directory structure
-        tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-        upload_dir = Path(f"uploads/{tenant_folder}/{folder}/images")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate unique filename
-        unique_filename = generate_unique_filename(file.filename)
-        file_path = upload_dir / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            buffer.write(contents)
-        
-        # Return file URL
-        file_url = f"/uploads/{tenant_folder}/{folder}/images/{unique_filename}"
+        # Save file: streamed in chunks, stored once per content (an identical upload reuses the file)
+        media = await media_store.save_upload(db, file, current_user.tenant_id, MAX_FILE_SIZE, folder, current_user.username)
+        # Thumbnail and WebP widths, rendered in the background (GET url?w=<width> picks one)
+        variants = await run_in_threadpool(image_variants.schedule, media.path, media.width)
         
         return {
             "success": True,
             "message": "File uploaded successfully",
             "data": {
-                "filename": unique_filename,
+                "media_id": media.id,
+                "filename": media.filename,
                 "original_filename": file.filename,
-                "url": file_url,
-                "size": len(contents),
+                "url": media.url,
+                "size": media.size,
+                "sha256": media.sha256,
+                "width": media.width,
+                "height": media.height,
+                "variants": variants,
+                "deduplicated": media.deduplicated,
                 "uploaded_by": current_user.username,
                 "uploaded_at": datetime.now().isoformat()
             }
         }
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -106,40 +97,29 @@ async def upload_video(
         if not allowed_file(file.filename, 'video'):
             raise HTTPException(status_code=400, detail="File type not allowed. Only videos are accepted.")
         
-        # Check file size (larger limit for videos - 50MB)
-        contents = await file.read()
-        if len(contents) > 50 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 50MB.")
-        
-        # Create directory structure
-        tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-        upload_dir = Path(f"uploads/{tenant_folder}/{folder}/videos")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate unique filename
-        unique_filename = generate_unique_filename(file.filename)
-        file_path = upload_dir / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            buffer.write(contents)
-        
-        # Return file URL
-        file_url = f"/uploads/{tenant_folder}/{folder}/videos/{unique_filename}"
+        # Save file (larger limit for videos - 50MB), stored once per content
+        media = await media_store.save_upload(db, file, current_user.tenant_id, MAX_VIDEO_FILE_SIZE, folder, current_user.username)
         
         return {
             "success": True,
             "message": "Video uploaded successfully",
             "data": {
-                "filename": unique_filename,
+                "media_id": media.id,
+                "filename": media.filename,
                 "original_filename": file.filename,
-                "url": file_url,
-                "size": len(contents),
+                "url": media.url,
+                "size": media.size,
+                "sha256": media.sha256,
+                "deduplicated": media.deduplicated,
                 "uploaded_by": current_user.username,
                 "uploaded_at": datetime.now().isoformat()
             }
         }
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -168,34 +148,27 @@ async def upload_multiple_files(
                     errors.append(f"{file.filename}: File type not allowed")
                     continue
                 
-                # Check file size
-                contents = await file.read()
-                max_size = 50 * 1024 * 1024 if file_type == 'video' else MAX_FILE_SIZE
-                if len(contents) > max_size:
+                # Save file (one chunk in memory at a time, whatever the number of files)
+                max_size = MAX_VIDEO_FILE_SIZE if file_type == 'video' else MAX_FILE_SIZE
+                try:
+                    media = await media_store.save_upload(db, file, current_user.tenant_id, max_size, folder, current_user.username)
+                except UploadTooLarge:
                     errors.append(f"{file.filename}: File too large")
                     continue
                 
-                # Create directory structure
-                tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-                upload_dir = Path(f"uploads/{tenant_folder}/{folder}/{file_type}s")
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Generate unique filename
-                unique_filename = generate_unique_filename(file.filename)
-                file_path = upload_dir / unique_filename
-                
-                # Save file
-                with open(file_path, "wb") as buffer:
-                    buffer.write(contents)
-                
                 # Add to successful uploads
-                file_url = f"/uploads/{tenant_folder}/{folder}/{file_type}s/{unique_filename}"
-                uploaded_files.append({
-                    "filename": unique_filename,
+                uploaded = {
+                    "media_id": media.id,
+                    "filename": media.filename,
                     "original_filename": file.filename,
-                    "url": file_url,
-                    "size": len(contents)
-                })
+                    "url": media.url,
+                    "size": media.size,
+                    "sha256": media.sha256,
+                    "deduplicated": media.deduplicated
+                }
+                if file_type == 'image':
+                    uploaded["variants"] = await run_in_threadpool(image_variants.schedule, media.path, media.width)
+                uploaded_files.append(uploaded)
                 
             except Exception as e:
                 errors.append(f"{file.filename}: {str(e)}")
@@ -211,17 +184,22 @@ async def upload_multiple_files(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Multiple upload failed: {str(e)}")
 
 @router.delete("/upload/delete")
 async def delete_file(
     file_url: str,
+    folder: Optional[str] = None,
     current_user: TblAdminUsers = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Delete uploaded file
+    The same content uploaded several times has one URL: each delete removes one
+    upload (the one made in `folder` if given) and the file goes with the last.
     """
     try:
         # Extract file path from URL
@@ -240,71 +218,334 @@ async def delete_file(
             if expected_tenant_folder not in str(file_path):
                 raise HTTPException(status_code=403, detail="No permission to delete this file")
         
-        # Delete file
-        file_path.unlink()
+        # Delete file: content-addressed files lose one reference, removed with the last one
+        remaining_references = await media_store.release(db, file_path, folder)
+        if remaining_references is None:
+            # Uploaded before content addressing (one file per upload)
+            file_path.unlink()
         
         return {
             "success": True,
             "message": "File deleted successfully",
             "data": {
                 "deleted_file": file_url,
+                "remaining_references": remaining_references or 0,
                 "deleted_by": current_user.username,
                 "deleted_at": datetime.now().isoformat()
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
 
 @router.get("/upload/list")
 async def list_uploaded_files(
-    folder: str = "general",
-    file_type: str = "image",
+    folder: Optional[str] = Query("general", description="Empty = all folders"),
+    file_type: Optional[str] = Query("image", description="image, video, document; empty = all types"),
+    search: Optional[str] = Query(None, description="Part of the original filename"),
+    sha256: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (skip is ignored)"),
+    include_total: bool = Query(True, description="Count matching files (disable for speed)"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
-    List uploaded files in a folder
+    List uploaded files, newest first, from the media catalog (tbl_media_files)
     """
     try:
-        tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-        upload_dir = Path(f"uploads/{tenant_folder}/{folder}/{file_type}s")
-        
-        if not upload_dir.exists():
+        entries, next_cursor, total = await run_in_threadpool(
+            media_file.get_page,
+            db,
+            tenant_id=current_user.tenant_id or GLOBAL_TENANT_ID,
+            folder=folder,
+            file_type=file_type,
+            sha256=sha256,
+            search=search,
+            created_from=date_from,
+            created_to=date_to,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            include_total=include_total
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"List files failed: {str(e)}")
+    
+    files = [
+        {
+            "media_id": entry.id,
+            "filename": os.path.basename(entry.path),
+            "original_filename": entry.original_filename,
+            "url": f"/{entry.path}",
+            "folder": entry.folder,
+            "file_type": entry.file_type,
+            "size": entry.size,
+            "sha256": entry.sha256,
+            "width": entry.width,
+            "height": entry.height,
+            "uploaded_by": entry.uploaded_by,
+            "created_at": entry.created_at.isoformat()
+        }
+        for entry in entries
+    ]
+    
+    return {
+        "success": True,
+        "message": "Files retrieved successfully" if files else "No files found",
+        "data": {
+            "files": files,
+            "total": total,
+            "folder": folder,
+            "file_type": file_type,
+            "pagination": {
+                "total": total,
+                "skip": None if cursor else skip,
+                "limit": limit,
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor
+            }
+        }
+    }
+
+
+# Resumable uploads (init -> PUT chunks -> finalize), see app/core/resumable_uploads.py
+RESUMABLE_FILE_TYPES = ('video', 'image')
+
+def resumable_upload_error(e: Exception) -> HTTPException:
+    """HTTP error for the exceptions of app/core/resumable_uploads.py"""
+    if isinstance(e, UploadSessionNotFound):
+        return HTTPException(status_code=404, detail="Upload session not found or expired")
+    if isinstance(e, UploadSessionBusy):
+        return HTTPException(status_code=409, detail="Another request is uploading to this session")
+    if isinstance(e, UploadOffsetMismatch):
+        return HTTPException(status_code=409, detail={"message": str(e), "offset": e.offset})
+    if isinstance(e, UploadTooLarge):
+        return HTTPException(status_code=413, detail=f"Chunk too large or past the declared size ({e.max_size} bytes accepted)")
+    return HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+def check_upload_session_owner(session: dict, current_user: TblAdminUsers):
+    """Sessions of other tenants are reported as not found"""
+    if session["tenant_id"] != current_user.tenant_id:
+        raise UploadSessionNotFound(session["upload_id"])
+
+def upload_session_data(session: dict) -> dict:
+    return {
+        "upload_id": session["upload_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "offset": session["offset"],
+        "complete": session["offset"] == session["size"],
+        "expires_at": datetime.fromtimestamp(session["expires_at"]).isoformat()
+    }
+
+@router.post("/upload/resumable/init")
+async def init_resumable_upload(
+    filename: str = Form(...),
+    size: int = Form(...),
+    folder: str = Form("general"),
+    file_type: str = Form("video"),
+    sha256: Optional[str] = Form(None),
+    current_user: TblAdminUsers = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a resumable upload (room/facility videos, VR360 assets, brand intro videos)
+    Then PUT the file's bytes to /upload/resumable/{upload_id}?offset=N in chunks
+    and POST /upload/resumable/{upload_id}/finalize.
+    With `sha256` of content the tenant already uploaded, the existing file is
+    returned right away ("complete": true, no upload_id) and nothing is sent.
+    """
+    if file_type not in RESUMABLE_FILE_TYPES or not allowed_file(filename, file_type):
+        raise HTTPException(status_code=400, detail="File type not allowed. Only videos and images are accepted.")
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="File size must be positive")
+    if size > settings.RESUMABLE_UPLOAD_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {settings.RESUMABLE_UPLOAD_MAX_SIZE // (1024 * 1024)}MB."
+        )
+    
+    if sha256:
+        media = await media_store.reference(db, current_user.tenant_id, sha256, filename, folder, current_user.username)
+        if media is not None:
             return {
                 "success": True,
-                "message": "No files found",
+                "message": "File already uploaded",
                 "data": {
-                    "files": [],
-                    "total": 0
+                    "upload_id": None,
+                    "complete": True,
+                    "media_id": media.id,
+                    "filename": media.filename,
+                    "original_filename": filename,
+                    "url": media.url,
+                    "size": media.size,
+                    "sha256": media.sha256,
+                    "deduplicated": True,
+                    "uploaded_by": current_user.username,
+                    "uploaded_at": datetime.now().isoformat()
                 }
             }
-        
-        files = []
-        for file_path in upload_dir.iterdir():
-            if file_path.is_file():
-                stat = file_path.stat()
-                files.append({
-                    "filename": file_path.name,
-                    "url": f"/uploads/{tenant_folder}/{folder}/{file_type}s/{file_path.name}",
-                    "size": stat.st_size,
-                    "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                    "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
-                })
-        
-        # Sort by creation time (newest first)
-        files.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        return {
-            "success": True,
-            "message": "Files retrieved successfully",
-            "data": {
-                "files": files,
-                "total": len(files),
-                "folder": folder,
-                "file_type": file_type
-            }
-        }
-        
+    
+    try:
+        session = await resumable_uploads.create(
+            tenant_id=current_user.tenant_id,
+            user_id=current_user.id,
+            filename=filename,
+            size=size,
+            folder=folder,
+            file_type=file_type
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"List files failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Upload init failed: {str(e)}")
+    
+    return {
+        "success": True,
+        "message": "Upload session created",
+        "data": {
+            **upload_session_data(session),
+            "chunk_size": settings.RESUMABLE_UPLOAD_CHUNK_SIZE,
+            "max_chunk_size": settings.RESUMABLE_UPLOAD_MAX_CHUNK_SIZE
+        }
+    }
+
+@router.get("/upload/resumable/{upload_id}")
+async def get_resumable_upload(
+    upload_id: str,
+    current_user: TblAdminUsers = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Status of a resumable upload: `offset` is where the next chunk must start
+    """
+    try:
+        session = await resumable_uploads.get(upload_id)
+        check_upload_session_owner(session, current_user)
+    except UploadSessionNotFound as e:
+        raise resumable_upload_error(e)
+    
+    return {
+        "success": True,
+        "message": "Upload session retrieved successfully",
+        "data": upload_session_data(session)
+    }
+
+@router.put("/upload/resumable/{upload_id}")
+async def upload_resumable_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    current_user: TblAdminUsers = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Append a chunk (raw request body, application/octet-stream) at `offset`
+    A 409 response carries the current offset to resume from.
+    """
+    try:
+        async with resumable_uploads.locked(upload_id) as session:
+            check_upload_session_owner(session, current_user)
+            try:
+                new_offset = await resumable_uploads.append(
+                    upload_id, session, offset, request.stream(), settings.RESUMABLE_UPLOAD_MAX_CHUNK_SIZE
+                )
+            except ClientDisconnect:
+                # The bytes received are kept; the client asks for the offset when it reconnects
+                return JSONResponse(status_code=400, content={"detail": "Client disconnected"})
+    except (UploadSessionNotFound, UploadSessionBusy, UploadOffsetMismatch, UploadTooLarge) as e:
+        raise resumable_upload_error(e)
+    
+    return {
+        "success": True,
+        "message": "Chunk uploaded successfully",
+        "data": {
+            "upload_id": upload_id,
+            "offset": new_offset,
+            "size": session["size"],
+            "complete": new_offset == session["size"]
+        }
+    }
+
+@router.post("/upload/resumable/{upload_id}/finalize")
+async def finalize_resumable_upload(
+    upload_id: str,
+    sha256: Optional[str] = Form(None),
+    current_user: TblAdminUsers = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Complete a resumable upload: the file is stored (content-addressed) and its URL returned
+    `sha256` (optional) is checked against the received data; on mismatch the session is dropped.
+    """
+    try:
+        async with resumable_uploads.locked(upload_id) as session:
+            check_upload_session_owner(session, current_user)
+            status = await resumable_uploads.get(upload_id)
+            if status["offset"] != session["size"]:
+                raise UploadOffsetMismatch(status["offset"])
+            
+            # Moved next to the content-addressed files first (same filesystem), then stored
+            media_dir = media_store.media_dir(current_user.tenant_id)
+            try:
+                stored = await resumable_uploads.finish(upload_id, temp_path(media_dir), sha256)
+            except UploadChecksumMismatch as e:
+                await resumable_uploads.remove(upload_id)
+                raise HTTPException(status_code=400, detail=f"{str(e)}. Upload session dropped, please upload again.")
+            media = await media_store.store(
+                db, current_user.tenant_id, stored, session["filename"], session["folder"], current_user.username
+            )
+    except (UploadSessionNotFound, UploadSessionBusy, UploadOffsetMismatch) as e:
+        raise resumable_upload_error(e)
+    
+    data = {
+        "media_id": media.id,
+        "filename": media.filename,
+        "original_filename": session["filename"],
+        "url": media.url,
+        "size": media.size,
+        "sha256": media.sha256,
+        "deduplicated": media.deduplicated,
+        "uploaded_by": current_user.username,
+        "uploaded_at": datetime.now().isoformat()
+    }
+    if session["file_type"] == 'image':
+        data["variants"] = await run_in_threadpool(image_variants.schedule, media.path, media.width)
+    
+    return {
+        "success": True,
+        "message": "File uploaded successfully",
+        "data": data
+    }
+
+@router.delete("/upload/resumable/{upload_id}")
+async def cancel_resumable_upload(
+    upload_id: str,
+    current_user: TblAdminUsers = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel a resumable upload and delete the data received so far
+    """
+    try:
+        async with resumable_uploads.locked(upload_id) as session:
+            check_upload_session_owner(session, current_user)
+            await resumable_uploads.remove(upload_id)
+    except (UploadSessionNotFound, UploadSessionBusy) as e:
+        raise resumable_upload_error(e)
+    
+    return {
+        "success": True,
+        "message": "Upload cancelled",
+        "data": {
+            "upload_id": upload_id,
+            "cancelled_by": current_user.username,
+            "cancelled_at": datetime.now().isoformat()
+        }
+    }
@@ -73,6 +73,15 @@ def update_current_user_profile(
     """
     Update current user profile
     """
+    # current_user may be a cached snapshot; re-read the row so the password
+    # check and the update work on current data
+    current_user = crud_admin_user.get_by_id(db, id=current_user.id)
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
     # Validate current password if new password is provided
     if profile_data.new_password:
         if not profile_data.current_password:
@@ -155,6 +164,15 @@ def change_password(
             detail="New password and confirmation do not match"
         )
     
+    # current_user may be a cached snapshot; re-read the row so the password
+    # check and the update work on current data
+    current_user = crud_admin_user.get_by_id(db, id=current_user.id)
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
     # Verify current password
     if not crud_admin_user.verify_password(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
@@ -1,11 +1,14 @@
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 
 from app.core.deps import get_db, get_current_admin_user
-from app.crud.crud_tenants import tenant
+from app.crud.crud_admin_users import crud_admin_user
+from app.crud.crud_booking_requests import booking_request
+from app.crud.crud_tenants import TENANT_STAT_KEYS, tenant
+from app.crud.pagination import InvalidCursorError, next_cursor_for, order_for_keyset, paginate_keyset
 from app.schemas.tenants import TenantCreate, TenantRead, TenantUpdate
 from app.models.models import (
     TblTenants, TblAdminUsers, TblRooms, TblFacilities, 
@@ -16,14 +19,17 @@ router = APIRouter()
 
 @router.get("/tenants/management", response_model=List[Dict[str, Any]])
 def get_tenants_with_stats(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Giá trị header X-Next-Cursor của trang trước (bỏ qua skip)"),
     status_filter: str = Query(None, regex="^(active|inactive|all)$"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Lấy danh sách tenants với thống kê chi tiết (chỉ dành cho super_admin)
+    Trang tiếp theo (nếu có) được trả về trong header X-Next-Cursor
     """
     # Kiểm tra quyền
     if current_user.role != "super_admin":
@@ -40,13 +46,24 @@ def get_tenants_with_stats(
         if status_filter and status_filter != "all":
             query = query.filter(TblTenants.status == status_filter)
         
-        # Get tenants with pagination
-        tenants = query.offset(skip).limit(limit).all()
+        # Get tenants with pagination (keyset on id when a cursor is given)
+        if cursor:
+            tenants, next_cursor = paginate_keyset(
+                query, columns=[TblTenants.id], cursor=cursor, limit=limit, descending=False
+            )
+        else:
+            tenants = order_for_keyset(query, [TblTenants.id], descending=False).offset(skip).limit(limit + 1).all()
+            next_cursor = next_cursor_for(tenants[:limit], [TblTenants.id]) if len(tenants) > limit else None
+            tenants = tenants[:limit]
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        
+        # Get statistics for the whole page (grouped per table, short-TTL cached)
+        statistics = get_tenants_statistics(db, [tenant_obj.id for tenant_obj in tenants])
         
         tenants_with_stats = []
         for tenant_obj in tenants:
-            # Get tenant statistics
-            stats = get_tenant_statistics(db, tenant_obj.id)
+            stats = statistics[tenant_obj.id]
             
             tenant_data = {
                 "id": tenant_obj.id,
@@ -64,74 +81,25 @@ def get_tenants_with_stats(
         
         return tenants_with_stats
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi server: {str(e)}")
 
-def get_tenant_statistics(db: Session, tenant_id: int) -> Dict[str, Any]:
+def get_tenants_statistics(db: Session, tenant_ids: List[int]) -> Dict[int, Dict[str, Any]]:
     """
-    Lấy thống kê chi tiết cho một tenant
+    Lấy thống kê cho nhiều tenant cùng lúc (một query GROUP BY tenant_id mỗi bảng)
     """
     try:
-        # Count admin users
-        admin_users_count = db.query(func.count(TblAdminUsers.id)).filter(
-            TblAdminUsers.tenant_id == tenant_id
-        ).scalar() or 0
-        
-        # Count rooms
-        rooms_count = db.query(func.count(TblRooms.id)).filter(
-            and_(TblRooms.tenant_id == tenant_id, TblRooms.deleted == 0)
-        ).scalar() or 0
-        
-        # Count facilities
-        facilities_count = db.query(func.count(TblFacilities.id)).filter(
-            and_(TblFacilities.tenant_id == tenant_id, TblFacilities.deleted == 0)
-        ).scalar() or 0
-        
-        # Count services
-        services_count = db.query(func.count(TblServices.id)).filter(
-            and_(TblServices.tenant_id == tenant_id, TblServices.deleted == 0)
-        ).scalar() or 0
-        
-        # Count customers
-        customers_count = db.query(func.count(TblCustomers.id)).filter(
-            and_(TblCustomers.tenant_id == tenant_id, TblCustomers.deleted == 0)
-        ).scalar() or 0
-        
-        # Count bookings
-        total_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.tenant_id == tenant_id, TblBookingRequests.deleted == 0)
-        ).scalar() or 0
-        
-        # Count recent bookings (last 30 days)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(
-                TblBookingRequests.tenant_id == tenant_id,
-                TblBookingRequests.created_at >= thirty_days_ago,
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
-        
-        return {
-            "admin_users": admin_users_count,
-            "rooms": rooms_count,
-            "facilities": facilities_count,
-            "services": services_count,
-            "customers": customers_count,
-            "total_bookings": total_bookings,
-            "recent_bookings_30d": recent_bookings
-        }
-        
+        return tenant.get_statistics(db, tenant_ids=tenant_ids)
     except Exception:
-        return {
-            "admin_users": 0,
-            "rooms": 0,
-            "facilities": 0,
-            "services": 0,
-            "customers": 0,
-            "total_bookings": 0,
-            "recent_bookings_30d": 0
-        }
+        return {tenant_id: dict.fromkeys(TENANT_STAT_KEYS, 0) for tenant_id in tenant_ids}
+
+def get_tenant_statistics(db: Session, tenant_id: int) -> Dict[str, Any]:
+    """
+    Lấy thống kê chi tiết cho một tenant
+    """
+    return get_tenants_statistics(db, [tenant_id])[tenant_id]
 
 @router.post("/tenants/management", response_model=TenantRead)
 def create_tenant_advanced(
@@ -271,6 +239,7 @@ def delete_tenant_advanced(
             "status": "inactive"
         })
         db.commit()
+        crud_admin_user.invalidate_cache()
         
         return {
             "success": True,
@@ -360,12 +329,14 @@ def get_tenant_detailed_stats(
             )
         ).order_by(TblBookingRequests.created_at.desc()).limit(10).all()
         
+        customers, _ = booking_request.get_related(db, bookings=recent_activities)
+        
         activities_data = [
             {
                 "id": activity.id,
-                "customer_name": activity.customer_name,
+                "customer_name": customers[activity.customer_id].name if activity.customer_id in customers else "Unknown",
                 "status": activity.status,
-                "total_amount": float(activity.total_amount or 0),
+                "total_amount": float(0),  # Booking request không có số tiền
                 "created_at": activity.created_at.isoformat()
             }
             for activity in recent_activities
@@ -44,6 +44,19 @@ class Settings(BaseSettings):
     MYSQL_DB: str = "bookingservicesiovn_zalominidb"
     DATABASE_URI: Optional[str] = None
 
+    # Connection pool (per worker process; size against the number of uvicorn workers)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds waiting for a free connection
+    DB_POOL_RECYCLE: int = 300  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_CONNECT_TIMEOUT: int = 60
+    DB_ECHO: bool = False
+
+    # Optional read replica for read-only endpoints (get_read_db); unset = everything on primary
+    DATABASE_REPLICA_URI: Optional[str] = None
+    DB_REPLICA_RETRY_SECONDS: int = 30  # how long a failed replica is skipped before retrying
+
     def model_post_init(self, __context) -> None:
         """Initialize database URI after model creation"""
         if not self.DATABASE_URI:
@@ -81,6 +94,71 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_IMAGE_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".gif", ".webp"]
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes read/written at a time (app/core/upload_storage.py)
+
+    # Resumable uploads (app/core/resumable_uploads.py)
+    RESUMABLE_UPLOAD_DIR: str = "uploads_tmp/resumable"  # partial uploads; must not be under UPLOAD_DIR
+    RESUMABLE_UPLOAD_MAX_SIZE: int = 2 * 1024 * 1024 * 1024  # 2GB per file
+    RESUMABLE_UPLOAD_CHUNK_SIZE: int = 5 * 1024 * 1024  # chunk size suggested to clients
+    RESUMABLE_UPLOAD_MAX_CHUNK_SIZE: int = 16 * 1024 * 1024  # largest PUT body (below nginx client_max_body_size)
+    RESUMABLE_UPLOAD_EXPIRE_SECONDS: int = 24 * 3600  # sessions without a chunk for this long are removed
+    RESUMABLE_UPLOAD_SWEEP_INTERVAL: int = 600  # seconds between expiry sweeps
+
+    # Image variants (app/core/image_variants.py): WebP copies rendered after image uploads
+    IMAGE_VARIANT_WIDTHS: List[int] = [320, 640, 1280]  # only widths below the original's are rendered
+    IMAGE_THUMBNAIL_SIZE: int = 200  # thumbnails fit in a square of this size
+    IMAGE_VARIANT_QUALITY: int = 80  # WebP quality (0-100)
+    IMAGE_VARIANT_WORKERS: int = 2  # resize processes per worker process
+    IMAGE_VARIANT_MAX_PENDING: int = 64  # queued images before new ones are served without variants
+
+    # Password hashing (app/core/password_hashing.py)
+    BCRYPT_ROUNDS: int = 12  # changing it rehashes passwords on the next successful login
+    PASSWORD_HASH_WORKERS: int = 2  # dedicated bcrypt threads per worker process
+    PASSWORD_HASH_MAX_PENDING: int = 32  # queued hash/verify calls before logins get 503
+
+    # Rate limiting (app/middleware/rate_limit.py); limits per category are in RateLimiter.limits
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_STORAGE: str = "sqlite"  # "sqlite" (shared by all workers on the host) or "memory"
+    RATE_LIMIT_SQLITE_PATH: Optional[str] = None  # default: /dev/shm/zalo_be_rate_limit.db
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # use X-Forwarded-For behind a reverse proxy
+
+    # Request threat scanning (app/middleware/threat_scan.py)
+    SECURITY_SCAN_ENABLED: bool = False
+    SECURITY_SCAN_BLOCK: bool = False  # False = only log; True = reject requests whose action is "block"
+    SECURITY_SCAN_MAX_BYTES: int = 64 * 1024  # body bytes scanned per request
+
+    # Logging (app/core/log_pipeline.py): files are written by a background thread
+    LOG_DIR: str = "logs"
+    LOG_JSON: bool = True  # JSON lines for requests/performance/errors/alerts logs
+    LOG_MAX_BYTES: int = 50 * 1024 * 1024  # rotate each log file at this size
+    LOG_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000  # records waiting for the writer thread; extra records are dropped
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0  # share of successful fast requests logged (errors/slow always)
+
+    # Health checks (app/core/monitoring.py): probes run in a background sampler thread
+    HEALTH_SAMPLE_INTERVAL: float = 15.0  # seconds; /health/ready fails when the sample is 3x older
+
+    # Metrics (app/core/monitoring.py, Prometheus exposition in app/core/prometheus.py)
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # default: /dev/shm/zalo_be_metrics, shared by all workers
+    METRICS_FLUSH_INTERVAL: float = 5.0  # seconds between snapshot writes of each worker
+    METRICS_MAX_TENANTS: int = 1000  # distinct tenant labels per worker; more are counted as "other"
+
+    # SQL instrumentation (ObservabilityMiddleware)
+    SERVER_TIMING_ENABLED: bool = True  # Server-Timing header with DB query count/time per request
+    SQL_N_PLUS_ONE_DETECTION: bool = False  # development: log statements repeated within one request
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # executions of the same statement in one request to flag it
+
+    # Caching (seconds, 0 = disabled)
+    TENANT_STATS_CACHE_TTL: int = 30
+    AUTH_TOKEN_CACHE_TTL: int = 300  # verified JWT -> user id (never past the token's exp)
+    # Admin user snapshots used by get_current_admin_user, cached per worker process:
+    # a user deactivated or deleted through one worker keeps authenticating on the
+    # others for up to this many seconds (0 = no cache, changes apply immediately)
+    ADMIN_USER_CACHE_TTL: int = 30
+    AUTH_CACHE_MAXSIZE: int = 10000
+    DASHBOARD_CACHE_TTL: int = 30  # dashboard/report responses (app/core/response_cache.py)
+    DASHBOARD_CACHE_STALE_TTL: int = 60  # served stale while refreshing in the background
+    DASHBOARD_CACHE_MAXSIZE: int = 1000
 
     class Config:
         case_sensitive = True
@@ -1,3 +1,4 @@
+import time
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -6,7 +7,11 @@ from jose import jwt, JWTError
 from pydantic import ValidationError
 
 from app.db.session_local import get_db
+from app.db.async_session import get_async_db
+from app.db.read_session import get_read_db, get_async_read_db
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.request_context import set_request_tenant
 from app.models.models import TblAdminUsers
 from app.crud.crud_admin_users import crud_admin_user
 
@@ -15,6 +20,36 @@ oauth2_scheme = OAuth2PasswordBearer(
     auto_error=False  # Don't auto-raise errors for debugging
 )
 
+# token -> user id of tokens whose signature and expiry were already verified
+token_cache = TTLCache(ttl=settings.AUTH_TOKEN_CACHE_TTL, maxsize=settings.AUTH_CACHE_MAXSIZE)
+
+
+def decode_token_subject(token: str) -> Optional[str]:
+    """
+    Verify a JWT and return its subject (admin user id), using token_cache so a
+    token is only decoded once per AUTH_TOKEN_CACHE_TTL. Raises JWTError.
+    """
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    payload = jwt.decode(
+        token, 
+        settings.SECRET_KEY, 
+        algorithms=[settings.ALGORITHM]
+    )
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+
+    # Never keep a token cached past its own expiry
+    ttl = settings.AUTH_TOKEN_CACHE_TTL
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
 
 def get_current_admin_user(
     db: Session = Depends(get_db), 
@@ -35,12 +70,7 @@ def get_current_admin_user(
     
     try:
         # Decode JWT token
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
+        user_id = decode_token_subject(token)
         if user_id is None:
             raise credentials_exception
     except (JWTError, ValidationError) as e:
@@ -51,11 +81,13 @@ def get_current_admin_user(
         print(f"Algorithm: {settings.ALGORITHM}")
         raise credentials_exception
     
-    # Get admin user from database
-    admin_user = crud_admin_user.get_by_id(db, id=int(user_id))
+    # Get admin user (short-lived snapshot cache, invalidated by crud_admin_user writes)
+    admin_user = crud_admin_user.get_cached(db, id=int(user_id))
     if admin_user is None:
         raise credentials_exception
     
+    # Per-tenant request metrics (ObservabilityMiddleware)
+    set_request_tenant(admin_user.tenant_id)
     return admin_user
 
 
@@ -71,17 +103,12 @@ def get_current_admin_user_optional(
     
     try:
         # Decode JWT token
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
+        user_id = decode_token_subject(token)
         if user_id is None:
             return None
             
         # Get admin user from database
-        admin_user = crud_admin_user.get_by_id(db, id=int(user_id))
+        admin_user = crud_admin_user.get_cached(db, id=int(user_id))
         return admin_user
         
     except (JWTError, ValidationError):
@@ -1,8 +1,8 @@
-import logging
 import time
 from contextlib import asynccontextmanager
 from typing import Dict, Any
-import json
+
+from app.core.log_pipeline import log_pipeline
 
 class ErrorHandler:
     """
@@ -10,16 +10,8 @@ class ErrorHandler:
     """
     
     def __init__(self):
-        self.error_logger = logging.getLogger("error_handler")
-        
-        # Create file handler if not exists
-        if not self.error_logger.handlers:
-            handler = logging.FileHandler("logs/errors.log")
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.error_logger.addHandler(handler)
+        # Queued, rotated JSON lines (app/core/log_pipeline.py)
+        self.error_logger = log_pipeline.get_logger("error_handler", "errors.log")
         
         self.error_counts = {}
         self.critical_errors = []
@@ -40,7 +32,7 @@ class ErrorHandler:
         }
         
         # Log error
-        self.error_logger.error(f"ERROR: {json.dumps(error_record)}")
+        self.error_logger.error("ERROR", extra={"fields": error_record})
         
         # Track error counts
         self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
@@ -101,16 +93,8 @@ class AlertSystem:
     """
     
     def __init__(self):
-        self.alert_logger = logging.getLogger("alert_system")
-        
-        # Create file handler if not exists
-        if not self.alert_logger.handlers:
-            handler = logging.FileHandler("logs/alerts.log")
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.alert_logger.addHandler(handler)
+        # Queued, rotated JSON lines (app/core/log_pipeline.py)
+        self.alert_logger = log_pipeline.get_logger("alert_system", "alerts.log")
         
         self.active_alerts = {}
         self.alert_history = []
@@ -139,7 +123,7 @@ class AlertSystem:
             self.alert_history = self.alert_history[-1000:]
         
         # Log alert
-        self.alert_logger.warning(f"ALERT: {json.dumps(alert)}")
+        self.alert_logger.warning("ALERT", extra={"fields": alert})
         
         # For critical alerts, you might want to send notifications
         if severity == "critical":
@@ -154,7 +138,7 @@ class AlertSystem:
         # - SMS alerts
         # - PagerDuty/OpsGenie
         
-        self.alert_logger.critical(f"CRITICAL_ALERT_NOTIFICATION: {json.dumps(alert)}")
+        self.alert_logger.critical("CRITICAL_ALERT_NOTIFICATION", extra={"fields": alert})
     
     def resolve_alert(self, alert_id: str):
         """Mark an alert as resolved"""
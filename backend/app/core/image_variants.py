@@ -0,0 +1,210 @@
+"""
+Smaller WebP copies of uploaded images, for the Zalo Mini App on mobile networks.
+
+After an image upload, ImageVariantGenerator renders, in a process pool so the
+CPU-bound resizing stays off the event loop and the request threads, a
+thumbnail and one WebP per IMAGE_VARIANT_WIDTHS width smaller than the
+original, next to it:
+
+    <name>.jpg -> <name>_thumb.webp, <name>_w320.webp, <name>_w640.webp, ...
+
+The upload response lists the variant URLs right away; they exist a moment
+later. MediaStaticFiles, mounted on /uploads, resolves `?w=<width>` on an
+image URL to the smallest variant at least that wide, falling back to the
+original while variants are missing or when the client doesn't accept WebP.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.staticfiles import StaticFiles
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Formats Pillow re-encodes faithfully (GIF would lose its animation, SVG is vector)
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+THUMBNAIL = "thumb"
+
+# (output path, max width, max height); 0 = unbounded
+Target = Tuple[str, int, int]
+
+
+def render_variants(source: str, targets: List[Target], quality: int) -> List[str]:
+    """Runs in the pool processes: resize `source` once per target and save it as WebP"""
+    from PIL import Image, ImageOps
+
+    written = []
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)  # phone photos: apply the EXIF orientation
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.mode in ("LA", "P", "PA") else "RGB")
+        for path, max_width, max_height in targets:
+            variant = image.copy()
+            variant.thumbnail((max_width or variant.width, max_height or variant.height), Image.LANCZOS)
+            # Written under a temp name: the static mount never serves half a file
+            temp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.part")
+            variant.save(temp_path, "WEBP", quality=quality, method=4)
+            os.replace(temp_path, path)
+            written.append(path)
+    return written
+
+
+def variant_path(path: Path, name: str) -> Path:
+    return path.with_name(f"{path.stem}_{name}.webp")
+
+
+def remove_variants(path: Path) -> None:
+    """Delete the variants of an image (with its last reference)"""
+    for name in [THUMBNAIL] + [f"w{width}" for width in settings.IMAGE_VARIANT_WIDTHS]:
+        try:
+            os.remove(variant_path(path, name))
+        except FileNotFoundError:
+            pass
+
+
+class ImageVariantGenerator:
+    def __init__(self, widths: List[int], thumbnail_size: int, quality: int, max_workers: int, max_pending: int):
+        self.widths = sorted(widths)
+        self.thumbnail_size = thumbnail_size
+        self.quality = quality
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.generated = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def targets(self, path: Path, width: Optional[int]) -> Dict[str, Tuple[Path, int, int]]:
+        """Variant name -> (path, max width, max height) for an image `width` pixels wide"""
+        if path.suffix.lower() not in SOURCE_EXTENSIONS or not width:
+            return {}
+        targets = {THUMBNAIL: (variant_path(path, THUMBNAIL), self.thumbnail_size, self.thumbnail_size)}
+        for variant_width in self.widths:
+            if variant_width < width:  # never upscaled
+                targets[f"w{variant_width}"] = (variant_path(path, f"w{variant_width}"), variant_width, 0)
+        return targets
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process running the log/metrics threads could copy held locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _done(self, path: Path, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.generated += len(future.result())
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Image variants of {path} failed: {future.exception()}")
+
+    def schedule(self, path: Path, width: Optional[int]) -> Dict[str, str]:
+        """
+        Queue the variants of an uploaded image that don't exist yet; returns
+        their URLs by name ("thumb", "w320", ...), also when already generated.
+        """
+        targets = self.targets(path, width)
+        missing = [(str(target), max_width, max_height)
+                   for target, max_width, max_height in targets.values() if not target.exists()]
+        if missing:
+            with self._lock:
+                if self.pending >= self.max_pending:
+                    # The resolver serves the original; a later upload of the image retries
+                    self.skipped += 1
+                    missing = []
+                else:
+                    self.pending += 1
+            if missing:
+                try:
+                    with self._lock:
+                        future = self._get_executor().submit(render_variants, str(path), missing, self.quality)
+                except Exception as e:
+                    with self._lock:
+                        self.pending -= 1
+                        self.failed += 1
+                    logger.warning(f"Could not queue image variants of {path}: {e}")
+                else:
+                    future.add_done_callback(lambda done: self._done(path, done))
+        return {name: "/" + target.as_posix() for name, (target, _, _) in targets.items()}
+
+    def generate(self, path: Path, width: Optional[int]) -> int:
+        """Render the missing variants in this process (backfill script); returns how many"""
+        missing = [(str(target), max_width, max_height)
+                   for target, max_width, max_height in self.targets(path, width).values() if not target.exists()]
+        return len(render_variants(str(path), missing, self.quality)) if missing else 0
+
+    def resolve(self, path: Path, width: int) -> Path:
+        """Smallest existing variant at least `width` wide, else the original"""
+        if path.suffix.lower() not in SOURCE_EXTENSIONS:
+            return path
+        candidates = [(self.thumbnail_size, THUMBNAIL)] + [(w, f"w{w}") for w in self.widths]
+        for variant_width, name in candidates:
+            if variant_width >= width:
+                candidate = variant_path(path, name)
+                if candidate.exists():
+                    return candidate
+        return path
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "generated": self.generated,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "widths": self.widths
+        }
+
+
+class MediaStaticFiles(StaticFiles):
+    """StaticFiles for /uploads that serves image variants for `?w=<width>`"""
+
+    def __init__(self, *args, generator: "ImageVariantGenerator", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.generator = generator
+
+    async def get_response(self, path: str, scope):
+        width = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("w")
+        if not width or not width[0].isdigit():
+            return await super().get_response(path, scope)
+
+        accept = next((value for key, value in scope.get("headers", []) if key == b"accept"), b"")
+        if accept and b"image/webp" not in accept and b"*/*" not in accept:
+            response = await super().get_response(path, scope)
+        else:
+            directory = Path(self.directory)
+            resolved = await run_in_threadpool(self.generator.resolve, directory / path, int(width[0]))
+            response = await super().get_response(resolved.relative_to(directory).as_posix(), scope)
+        response.headers.append("Vary", "Accept")
+        return response
+
+
+image_variants = ImageVariantGenerator(
+    widths=settings.IMAGE_VARIANT_WIDTHS,
+    thumbnail_size=settings.IMAGE_THUMBNAIL_SIZE,
+    quality=settings.IMAGE_VARIANT_QUALITY,
+    max_workers=settings.IMAGE_VARIANT_WORKERS,
+    max_pending=settings.IMAGE_VARIANT_MAX_PENDING
+)
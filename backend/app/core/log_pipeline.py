@@ -0,0 +1,176 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List
+
+from app.core.config import settings
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line. Structured data is passed as
+    logger.info("EVENT", extra={"fields": {...}}) and merged into the object
+    (a "timestamp"/"event" field replaces the record's own).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The previous "asctime - name - level - message" lines, with fields appended"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        return f"{line}: {json.dumps(fields, default=str, ensure_ascii=False)}" if fields else line
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Never waits: when the writer thread falls behind, records are dropped and counted"""
+
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Plain messages are passed as is (no copy); only records with args or
+        # an exception are rendered here, while the values are still current
+        if record.args or record.exc_info or record.stack_info:
+            return super().prepare(record)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.pipeline.dropped += 1
+
+
+class _RoutingHandler(logging.Handler):
+    """Runs on the listener thread: hands each record to its logger's handlers"""
+
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # Loggers without a route of their own got here through the root logger
+        routes = self.pipeline.routes
+        for handler in routes.get(record.name) or routes.get("root", ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        pass
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room instead of failing when stop() finds the queue full
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """
+    Queue based logging: loggers only put records on a bounded queue
+    (QueueHandler), and one background QueueListener thread formats them and
+    writes the (size-rotated) files, so disk latency never blocks the event loop.
+    """
+
+    def __init__(self, queue_size: int = 10000):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.routes: Dict[str, List[logging.Handler]] = {}
+        self.dropped = 0
+        self._queue_handler = _NonBlockingQueueHandler(self)
+        self._listener = _Listener(self.queue, _RoutingHandler(self))
+        self._lock = threading.Lock()
+        self._running = False
+
+    def _file_handler(self, filename: str, formatter: logging.Formatter) -> logging.Handler:
+        os.makedirs(settings.LOG_DIR, exist_ok=True)
+        handler = RotatingFileHandler(
+            os.path.join(settings.LOG_DIR, filename),
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT,
+            encoding="utf-8",
+            delay=True
+        )
+        handler.setFormatter(formatter)
+        return handler
+
+    def _route(self, logger: logging.Logger, handlers: List[logging.Handler]) -> None:
+        with self._lock:
+            self.routes[logger.name] = handlers
+            logger.handlers = [self._queue_handler]
+        self.start()
+
+    def get_logger(self, name: str, filename: str, level: int = logging.INFO) -> logging.Logger:
+        """Logger writing JSON lines (or text, LOG_JSON=False) to its own rotated file"""
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        # Has its own file; not repeated in app.log / console
+        logger.propagate = False
+        if name not in self.routes:
+            formatter = JsonFormatter() if settings.LOG_JSON else TextFormatter()
+            self._route(logger, [self._file_handler(filename, formatter)])
+        return logger
+
+    def configure_root(self, filename: str = "app.log", level: int = logging.INFO, console: bool = True) -> None:
+        """Replacement for logging.basicConfig(FileHandler + StreamHandler) behind the queue"""
+        root = logging.getLogger()
+        root.setLevel(level)
+        handlers = [self._file_handler(filename, TextFormatter())]
+        if console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(TextFormatter())
+            handlers.append(stream_handler)
+        self._route(root, handlers)
+
+    def start(self) -> None:
+        with self._lock:
+            if not self._running:
+                self._listener.start()
+                self._running = True
+
+    def stop(self) -> None:
+        """Write out everything still queued and stop the writer thread"""
+        with self._lock:
+            if self._running:
+                self._listener.stop()
+                self._running = False
+                for handlers in self.routes.values():
+                    for handler in handlers:
+                        try:
+                            handler.flush()
+                        except (ValueError, OSError):
+                            pass  # stream already closed (atexit after the console was torn down)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": self.dropped
+        }
+
+
+log_pipeline = LogPipeline(queue_size=settings.LOG_QUEUE_SIZE)
+atexit.register(log_pipeline.stop)
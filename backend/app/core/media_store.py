@@ -0,0 +1,374 @@
+"""
+Content-addressed storage and catalog of uploaded files (app/api/api_v1/endpoints/file_management.py).
+
+Each tenant stores a given content once, under its SHA-256:
+uploads/<tenant folder>/media/<sha256[:2]>/<sha256><extension>. tbl_media_blobs
+(app/crud/crud_media_blobs.py) counts the uploads referencing every file:
+uploading the same photo again (for another room, facility or hotel brand)
+only adds a reference and returns the existing URL, and /upload/delete drops
+a reference, removing the file with the last one.
+
+Every upload also gets a tbl_media_files row (app/crud/crud_media_files.py:
+folder, type, size, hash, image dimensions), written in the same transaction,
+which /upload/list queries instead of scanning directories. reconcile()
+(scripts/reconcile_media_catalog.py) rebuilds both tables from the files.
+
+The blob row is locked (SELECT ... FOR UPDATE) while its file is placed or
+removed, so an upload racing the deletion of the last reference of the same
+content, in any worker, can't leave a row without its file. Blobs are
+per tenant: a tenant never gets a reference to another tenant's file.
+"""
+import hashlib
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.image_variants import remove_variants
+from app.core.upload_storage import StoredFile, discard, receive_upload
+from app.crud.crud_media_blobs import media_blob
+from app.crud.crud_media_files import media_file
+from app.models.models import TblMediaBlobs, TblMediaFiles
+
+GLOBAL_TENANT_ID = 0  # tenant_id of super_admin uploads (tenant_id NULL) in the media tables
+MEDIA_FOLDER = "media"
+
+# Allowed file extensions
+ALLOWED_EXTENSIONS = {
+    'image': {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'},
+    'video': {'.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'},
+    'document': {'.pdf', '.doc', '.docx', '.txt', '.xlsx', '.xls'}
+}
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def file_type_for(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    for file_type, extensions in ALLOWED_EXTENSIONS.items():
+        if extension in extensions:
+            return file_type
+    return 'document'
+
+
+def image_dimensions(path: Path) -> Tuple[Optional[int], Optional[int]]:
+    """(width, height) read from the image header; (None, None) if not a raster image"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, None
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+def sha256_of(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StoredMedia:
+    """Result of an upload through MediaStore"""
+
+    __slots__ = ("id", "path", "size", "sha256", "width", "height", "deduplicated")
+
+    def __init__(self, entry: TblMediaFiles, deduplicated: bool):
+        self.id = entry.id
+        self.path = Path(entry.path)
+        self.size = entry.size
+        self.sha256 = entry.sha256
+        self.width = entry.width
+        self.height = entry.height
+        self.deduplicated = deduplicated  # content was already stored, no new file
+
+    @property
+    def filename(self) -> str:
+        return self.path.name
+
+    @property
+    def url(self) -> str:
+        return "/" + self.path.as_posix()
+
+
+class MediaStore:
+    def __init__(self, root: str = "uploads"):
+        self.root = Path(root)
+
+    @staticmethod
+    def tenant_folder(tenant_id: Optional[int]) -> str:
+        return f"tenant_{tenant_id}" if tenant_id else "global"
+
+    @staticmethod
+    def tenant_id_of_folder(name: str) -> Optional[int]:
+        """Inverse of tenant_folder(): GLOBAL_TENANT_ID for "global", None if not a tenant folder"""
+        if name == "global":
+            return GLOBAL_TENANT_ID
+        if name.startswith("tenant_") and name[len("tenant_"):].isdigit():
+            return int(name[len("tenant_"):])
+        return None
+
+    def media_dir(self, tenant_id: Optional[int]) -> Path:
+        return self.root / self.tenant_folder(tenant_id) / MEDIA_FOLDER
+
+    def blob_path(self, tenant_id: Optional[int], sha256: str, extension: str) -> Path:
+        return self.media_dir(tenant_id) / sha256[:2] / f"{sha256}{extension.lower()}"
+
+    # Blocking parts, run in the threadpool (DB session and file system)
+
+    def _add_entry(self, db: Session, blob: TblMediaBlobs, original_filename: str, folder: str,
+                   uploaded_by: Optional[str], dimensions: Tuple[Optional[int], Optional[int]]) -> TblMediaFiles:
+        return media_file.create(
+            db,
+            tenant_id=blob.tenant_id,
+            blob_id=blob.id,
+            folder=folder,
+            file_type=file_type_for(original_filename),
+            path=blob.path,
+            original_filename=original_filename,
+            size=blob.size,
+            sha256=blob.sha256,
+            width=dimensions[0],
+            height=dimensions[1],
+            uploaded_by=uploaded_by
+        )
+
+    def _store(self, db: Session, tenant_id: Optional[int], stored: StoredFile, original_filename: str,
+               folder: str, uploaded_by: Optional[str]) -> StoredMedia:
+        path = self.blob_path(tenant_id, stored.sha256, os.path.splitext(original_filename)[1])
+        dimensions = image_dimensions(stored.path) if file_type_for(original_filename) == 'image' else (None, None)
+        try:
+            for attempt in range(2):
+                try:
+                    blob = media_blob.get_for_update(db, tenant_id or GLOBAL_TENANT_ID, stored.sha256)
+                    if blob is None:
+                        blob = media_blob.create(db, tenant_id or GLOBAL_TENANT_ID, stored.sha256, path.as_posix(), stored.size)
+                        deduplicated = False
+                    else:
+                        media_blob.add_reference(db, blob)
+                        deduplicated = True
+                    entry = self._add_entry(db, blob, original_filename, folder, uploaded_by, dimensions)
+                    if not os.path.exists(blob.path):
+                        # New content, or a file lost since (e.g. restored database): the upload provides it
+                        Path(blob.path).parent.mkdir(parents=True, exist_ok=True)
+                        os.replace(stored.path, blob.path)
+                    db.commit()
+                    return StoredMedia(entry, deduplicated)
+                except IntegrityError:
+                    # The same content was inserted by a concurrent upload: reference it instead
+                    db.rollback()
+                    if attempt:
+                        raise
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            discard(stored.path)  # no-op once moved into place
+
+    def _reference(self, db: Session, tenant_id: Optional[int], sha256: str, original_filename: str,
+                   folder: str, uploaded_by: Optional[str]) -> Optional[StoredMedia]:
+        blob = media_blob.get_for_update(db, tenant_id or GLOBAL_TENANT_ID, sha256.lower())
+        if blob is None or not os.path.exists(blob.path):
+            db.rollback()
+            return None
+        try:
+            media_blob.add_reference(db, blob)
+            # Same content, so same dimensions as the file's other uploads
+            other = media_file.get_by_path(db, blob.path)
+            dimensions = (other.width, other.height) if other is not None else (None, None)
+            entry = self._add_entry(db, blob, original_filename, folder, uploaded_by, dimensions)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        return StoredMedia(entry, deduplicated=True)
+
+    def _release(self, db: Session, path: Path, folder: Optional[str]) -> Optional[int]:
+        try:
+            blob = media_blob.get_by_path_for_update(db, path.as_posix())
+            entry = media_file.get_by_path(db, path.as_posix(), folder)
+            if entry is not None:
+                media_file.remove(db, entry)
+            if blob is None:
+                # Not content-addressed: the caller deletes the file
+                db.commit()
+                return None
+            remaining = media_blob.release(db, blob)
+            if remaining == 0:
+                # Removed before the commit, while the row is still locked: a concurrent
+                # upload of this content waits and then stores the file again
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                remove_variants(path)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        return remaining
+
+    # API used by the endpoints
+
+    async def save_upload(self, db: Session, file: UploadFile, tenant_id: Optional[int], max_size: int,
+                          folder: str, uploaded_by: Optional[str]) -> StoredMedia:
+        """Stream an upload to a temp file (upload_storage) and store it, or reference the existing copy"""
+        stored = await receive_upload(file, self.media_dir(tenant_id), max_size)
+        return await self.store(db, tenant_id, stored, file.filename or "", folder, uploaded_by)
+
+    async def store(self, db: Session, tenant_id: Optional[int], stored: StoredFile, original_filename: str,
+                    folder: str, uploaded_by: Optional[str]) -> StoredMedia:
+        """Store a complete temp file (in media_dir(tenant_id)); it is moved or removed"""
+        return await run_in_threadpool(self._store, db, tenant_id, stored, original_filename, folder, uploaded_by)
+
+    async def reference(self, db: Session, tenant_id: Optional[int], sha256: str, original_filename: str,
+                        folder: str, uploaded_by: Optional[str]) -> Optional[StoredMedia]:
+        """Add a reference to content the tenant already stored, None if it didn't"""
+        return await run_in_threadpool(self._reference, db, tenant_id, sha256, original_filename, folder, uploaded_by)
+
+    async def release(self, db: Session, path: Path, folder: Optional[str] = None) -> Optional[int]:
+        """
+        Drop one upload of the file at `path` (preferably one made in `folder`);
+        returns the references left (0 = file removed), or None if it isn't a
+        content-addressed file.
+        """
+        return await run_in_threadpool(self._release, db, path, folder)
+
+    # Catalog reconciliation (scripts/reconcile_media_catalog.py)
+
+    def _scan(self, tenant_id: Optional[int]) -> Dict[str, dict]:
+        """Files under root by relative path, with what the path tells about them"""
+        files = {}
+        if not self.root.is_dir():
+            return files
+        for tenant_dir in self.root.iterdir():
+            folder_tenant_id = self.tenant_id_of_folder(tenant_dir.name)
+            if not tenant_dir.is_dir() or folder_tenant_id is None:
+                continue
+            if tenant_id is not None and folder_tenant_id != tenant_id:
+                continue
+            for directory, dirnames, filenames in os.walk(tenant_dir):
+                dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+                for filename in filenames:
+                    if filename.startswith("."):
+                        continue  # temp files of uploads in progress
+                    path = Path(directory) / filename
+                    parts = path.relative_to(tenant_dir).parts
+                    if parts[0] == MEDIA_FOLDER:
+                        sha256 = os.path.splitext(filename)[0]
+                        if len(parts) != 3 or not SHA256_PATTERN.match(sha256):  # also skips image variants
+                            continue
+                        folder, file_type = "general", file_type_for(filename)
+                    elif len(parts) == 3:
+                        # uploads/<tenant>/<folder>/<type>s/<file>, before content addressing
+                        sha256 = None
+                        folder, file_type = parts[0], parts[1].rstrip("s")
+                    else:
+                        continue
+                    stat = path.stat()
+                    files[path.as_posix()] = {
+                        "tenant_id": folder_tenant_id,
+                        "sha256": sha256,
+                        "folder": folder,
+                        "file_type": file_type,
+                        "size": stat.st_size,
+                        "created_at": datetime.fromtimestamp(stat.st_mtime)
+                    }
+        return files
+
+    def reconcile(self, db: Session, tenant_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Make tbl_media_blobs / tbl_media_files match the files under root
+        (for one tenant, or all; tenant_id 0 = global):
+        - blobs and catalog rows whose file is gone are deleted
+        - files without a row (uploaded before the catalog existed, restored
+          from a backup) are added, content-addressed files in folder "general"
+        - each blob's ref_count is set to its number of catalog rows
+        Run while no uploads are in progress. Returns counts of the changes.
+        """
+        stats = {"files": 0, "blobs_added": 0, "blobs_removed": 0, "entries_added": 0,
+                 "entries_removed": 0, "ref_counts_fixed": 0}
+        files = self._scan(tenant_id)
+        stats["files"] = len(files)
+        try:
+            blobs_query = db.query(TblMediaBlobs)
+            entries_query = db.query(TblMediaFiles)
+            if tenant_id is not None:
+                blobs_query = blobs_query.filter(TblMediaBlobs.tenant_id == tenant_id)
+                entries_query = entries_query.filter(TblMediaFiles.tenant_id == tenant_id)
+
+            blobs: Dict[str, TblMediaBlobs] = {}
+            for blob in blobs_query.all():
+                if blob.path in files:
+                    blobs[blob.path] = blob
+                else:
+                    db.delete(blob)
+                    stats["blobs_removed"] += 1
+
+            for path, info in files.items():
+                if info["sha256"] and path not in blobs:
+                    blobs[path] = TblMediaBlobs(tenant_id=info["tenant_id"], sha256=info["sha256"], path=path,
+                                                size=info["size"], ref_count=0)
+                    db.add(blobs[path])
+                    stats["blobs_added"] += 1
+            db.flush()
+
+            references: Dict[int, int] = {}
+            cataloged = set()
+            for entry in entries_query.all():
+                if entry.path not in files:
+                    db.delete(entry)
+                    stats["entries_removed"] += 1
+                    continue
+                blob = blobs.get(entry.path)
+                entry.blob_id = blob.id if blob is not None else None
+                if blob is not None:
+                    references[blob.id] = references.get(blob.id, 0) + 1
+                cataloged.add(entry.path)
+
+            for path, info in files.items():
+                if path in cataloged:
+                    continue
+                blob = blobs.get(path)
+                if blob is not None:
+                    references[blob.id] = references.get(blob.id, 0) + 1
+                width, height = image_dimensions(Path(path)) if info["file_type"] == 'image' else (None, None)
+                media_file.create(
+                    db,
+                    tenant_id=info["tenant_id"],
+                    blob_id=blob.id if blob is not None else None,
+                    folder=info["folder"],
+                    file_type=info["file_type"],
+                    path=path,
+                    original_filename=os.path.basename(path),
+                    size=info["size"],
+                    sha256=info["sha256"] or sha256_of(Path(path)),
+                    width=width,
+                    height=height,
+                    created_at=info["created_at"]
+                )
+                stats["entries_added"] += 1
+
+            for blob in blobs.values():
+                if blob.ref_count != references.get(blob.id, 0):
+                    blob.ref_count = references.get(blob.id, 0)
+                    stats["ref_counts_fixed"] += 1
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        return stats
+
+
+media_store = MediaStore()  # same directory as the /uploads static mount (app/main.py)
@@ -1,37 +1,104 @@
 from typing import Generator, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+import bisect
 import logging
+import threading
 import time
 from app.db.session import SessionLocal
+from app.db.engine import get_pool_stats
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 class HealthChecker:
     """
     Comprehensive health checking system
+
+    The probes (DB round trip, CPU/memory/disk, auth) are blocking, so a
+    background sampler thread runs them every sample_interval seconds and the
+    health endpoints only read the cached snapshot.
     """
     
-    def __init__(self):
-        pass
+    def __init__(self, sample_interval: float = 15.0):
+        self.sample_interval = sample_interval
+        # A snapshot older than this means the sampler is stuck (e.g. on the database)
+        self.stale_after = sample_interval * 3
+        self.snapshot: Optional[dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        try:
+            import psutil
+            # The first non-blocking cpu_percent() call only starts the measurement
+            psutil.cpu_percent(interval=None)
+        except ImportError:
+            pass
+    
+    def refresh(self) -> dict:
+        """Run every probe (blocking) and store the result as the cached snapshot"""
+        snapshot = {
+            "database": self.check_database_health(),
+            "system": self.check_system_resources(),
+            "authentication": self.check_authentication_service(),
+            "timestamp": time.time()
+        }
+        self.snapshot = snapshot
+        return snapshot
+    
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Health sampler failed: {str(e)}")
+            if self._stop.wait(self.sample_interval):
+                break
+    
+    def start_sampler(self):
+        """Start the background sampler (first sample is taken right away)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+            self._thread.start()
+    
+    def stop_sampler(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.sample_interval)
+            self._thread = None
+    
+    async def get_snapshot(self) -> dict:
+        """Cached probe results; sampled once in the threadpool if the sampler hasn't run yet"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            snapshot = await run_in_threadpool(self.refresh)
+        return snapshot
+    
+    def _snapshot_age(self, snapshot: dict) -> float:
+        return time.time() - snapshot["timestamp"]
     
     async def check_health(self) -> dict:
         """Main health check method"""
         try:
-            database_health = self.check_database_health()
-            system_health = self.check_system_resources()
+            snapshot = await self.get_snapshot()
+            database_health = snapshot["database"]
+            system_health = snapshot["system"]
+            age = self._snapshot_age(snapshot)
             
             # Determine overall status
-            if database_health["status"] == "healthy" and system_health["status"] == "healthy":
-                overall_status = "healthy"
-            elif database_health["status"] == "unhealthy" or system_health["status"] == "unhealthy":
+            if database_health["status"] == "unhealthy" or system_health["status"] == "unhealthy":
                 overall_status = "unhealthy"
+            elif database_health["status"] == "healthy" and system_health["status"] == "healthy" and age <= self.stale_after:
+                overall_status = "healthy"
             else:
                 overall_status = "degraded"
             
             return {
                 "status": overall_status,
                 "timestamp": time.time(),
+                "sampled_at": snapshot["timestamp"],
+                "snapshot_age": age,
                 "database": database_health,
                 "system": system_health
             }
@@ -45,22 +112,26 @@ class HealthChecker:
     
     async def detailed_health_check(self) -> dict:
         """Detailed health check with all components"""
-        database_health = self.check_database_health()
-        system_health = self.check_system_resources()
-        auth_health = self.check_authentication_service()
+        snapshot = await self.get_snapshot()
+        database_health = snapshot["database"]
+        system_health = snapshot["system"]
+        auth_health = snapshot["authentication"]
+        age = self._snapshot_age(snapshot)
         
         # Determine overall status
         statuses = [database_health["status"], system_health["status"], auth_health["status"]]
-        if all(status == "healthy" for status in statuses):
-            overall_status = "healthy"
-        elif any(status == "unhealthy" for status in statuses):
+        if any(status == "unhealthy" for status in statuses):
             overall_status = "unhealthy"
+        elif all(status == "healthy" for status in statuses) and age <= self.stale_after:
+            overall_status = "healthy"
         else:
             overall_status = "degraded"
         
         return {
             "status": overall_status,
             "timestamp": time.time(),
+            "sampled_at": snapshot["timestamp"],
+            "snapshot_age": age,
             "services": {
                 "database": database_health,
                 "system": system_health,
@@ -68,6 +139,32 @@ class HealthChecker:
             }
         }
     
+    def check_readiness(self) -> dict:
+        """
+        Readiness for the load balancer: the last sample reached the database
+        and is recent. Never runs a probe itself.
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {"ready": False, "reason": "no health sample yet", "timestamp": time.time()}
+        
+        age = self._snapshot_age(snapshot)
+        database_status = snapshot["database"]["status"]
+        if database_status == "unhealthy":
+            reason = "database unavailable"
+        elif age > self.stale_after:
+            reason = "health sample is stale"
+        else:
+            reason = None
+        
+        return {
+            "ready": reason is None,
+            "reason": reason,
+            "database": database_status,
+            "snapshot_age": age,
+            "timestamp": time.time()
+        }
+    
     def check_database_health(self) -> dict:
         """Check database connectivity and performance"""
         try:
@@ -78,14 +175,6 @@ class HealthChecker:
             result = db.execute(text("SELECT 1"))
             connection_time = time.time() - start_time
             
-            # Test table existence (for SQLite compatibility)
-            try:
-                tenant_check = db.execute(text("SELECT COUNT(*) FROM TblTenants"))
-                tenant_count = tenant_check.scalar()
-            except Exception:
-                # If TblTenants doesn't exist, just set count to 0
-                tenant_count = 0
-            
             db.close()
             
             status = "healthy" if connection_time < 1.0 else "degraded"
@@ -93,7 +182,7 @@ class HealthChecker:
             return {
                 "status": status,
                 "connection_time": connection_time,
-                "tenant_count": tenant_count,
+                "pool": get_pool_stats(),
                 "timestamp": time.time()
             }
             
@@ -110,8 +199,8 @@ class HealthChecker:
         try:
             import psutil
             
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU usage since the previous sample (non-blocking)
+            cpu_percent = psutil.cpu_percent(interval=None)
             
             # Memory usage
             memory = psutil.virtual_memory()
@@ -174,9 +263,10 @@ class HealthChecker:
     def get_comprehensive_health(self) -> dict:
         """Get comprehensive system health report"""
         
-        database_health = self.check_database_health()
-        system_health = self.check_system_resources()
-        auth_health = self.check_authentication_service()
+        snapshot = self.snapshot or self.refresh()
+        database_health = snapshot["database"]
+        system_health = snapshot["system"]
+        auth_health = snapshot["authentication"]
         
         # Determine overall status
         statuses = [
@@ -205,54 +295,119 @@ class HealthChecker:
         }
 
 
+# Upper bounds (seconds) of the request latency histogram buckets; one more
+# bucket counts everything slower than the last bound
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the "DB queries per request" histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def histogram_percentile(bounds, counts, pct: float, min_value: float = 0.0, max_value: Optional[float] = None) -> float:
+    """
+    Estimate a percentile from bucket counts (len(bounds) + 1 buckets), by
+    linear interpolation inside the bucket holding the rank. The estimate is
+    clamped to the observed min/max when they are known.
+    """
+    total = sum(counts)
+    if not total:
+        return 0.0
+    upper_bounds = list(bounds) + [max_value if max_value is not None else bounds[-1]]
+    rank = pct / 100 * total
+    cumulative = 0
+    lower = 0.0
+    value = upper_bounds[-1]
+    for upper, count in zip(upper_bounds, counts):
+        if count and cumulative + count >= rank:
+            value = lower + (upper - lower) * (rank - cumulative) / count
+            break
+        cumulative += count
+        lower = upper
+    if max_value is not None:
+        value = min(value, max_value)
+    return max(value, min_value)
+
+
 class MetricsCollector:
     """
     Collect and track application metrics
+
+    Per route template and method: status codes, a fixed-bucket latency
+    histogram (p50/p95/p99 estimates), DB query count/time; plus request counts
+    per tenant. snapshot() is what app/core/prometheus.py shares between workers.
     """
     
-    def __init__(self):
+    def __init__(self, max_tenants: int = 1000):
         self.metrics = {}
+        self.tenant_requests = {}
+        self.max_tenants = max_tenants  # more distinct tenants are counted as "other"
+        self._lock = threading.Lock()
     
-    def record_request(self, endpoint: str, method: str, status_code: int, processing_time: float):
-        """Record request metrics"""
+    def record_request(self, endpoint: str, method: str, status_code: int, processing_time: float,
+                       tenant_id: Optional[int] = None, db_queries: int = 0, db_time: float = 0.0):
+        """Record request metrics (endpoint should be the route template, not the raw URL)"""
         key = f"{method}:{endpoint}"
         
-        if key not in self.metrics:
-            self.metrics[key] = {
-                "count": 0,
-                "success_count": 0,
-                "error_count": 0,
-                "total_time": 0.0,
-                "min_time": float('inf'),
-                "max_time": 0.0,
-                "status_codes": {}
-            }
-        
-        metrics = self.metrics[key]
-        metrics["count"] += 1
-        metrics["total_time"] += processing_time
-        metrics["min_time"] = min(metrics["min_time"], processing_time)
-        metrics["max_time"] = max(metrics["max_time"], processing_time)
-        
-        # Track status codes
-        status_str = str(status_code)
-        metrics["status_codes"][status_str] = metrics["status_codes"].get(status_str, 0) + 1
-        
-        # Track success/error
-        if 200 <= status_code < 400:
-            metrics["success_count"] += 1
-        else:
-            metrics["error_count"] += 1
+        with self._lock:
+            if key not in self.metrics:
+                self.metrics[key] = {
+                    "method": method,
+                    "endpoint": endpoint,
+                    "count": 0,
+                    "success_count": 0,
+                    "error_count": 0,
+                    "total_time": 0.0,
+                    "min_time": float('inf'),
+                    "max_time": 0.0,
+                    "status_codes": {},
+                    "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                    "db_queries": 0,
+                    "db_time": 0.0,
+                    "query_count_buckets": [0] * (len(QUERY_COUNT_BUCKETS) + 1)
+                }
+            
+            metrics = self.metrics[key]
+            metrics["count"] += 1
+            metrics["total_time"] += processing_time
+            metrics["min_time"] = min(metrics["min_time"], processing_time)
+            metrics["max_time"] = max(metrics["max_time"], processing_time)
+            metrics["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS, processing_time)] += 1
+            metrics["db_queries"] += db_queries
+            metrics["db_time"] += db_time
+            metrics["query_count_buckets"][bisect.bisect_left(QUERY_COUNT_BUCKETS, db_queries)] += 1
+            
+            # Track status codes
+            status_str = str(status_code)
+            metrics["status_codes"][status_str] = metrics["status_codes"].get(status_str, 0) + 1
+            
+            # Track success/error
+            if 200 <= status_code < 400:
+                metrics["success_count"] += 1
+            else:
+                metrics["error_count"] += 1
+            
+            # Track tenant
+            tenant = str(tenant_id) if tenant_id is not None else "none"
+            if tenant not in self.tenant_requests and len(self.tenant_requests) >= self.max_tenants:
+                tenant = "other"
+            self.tenant_requests[tenant] = self.tenant_requests.get(tenant, 0) + 1
     
     def get_metrics_summary(self) -> dict:
         """Get summary of all metrics"""
         summary = {}
         
-        for endpoint, metrics in self.metrics.items():
+        with self._lock:
+            items = [(endpoint, dict(metrics)) for endpoint, metrics in self.metrics.items()]
+        
+        for endpoint, metrics in items:
             if metrics["count"] > 0:
                 avg_time = metrics["total_time"] / metrics["count"]
                 success_rate = (metrics["success_count"] / metrics["count"]) * 100
                 
+                def percentile(pct):
+                    return histogram_percentile(
+                        LATENCY_BUCKETS, metrics["latency_buckets"], pct, metrics["min_time"], metrics["max_time"]
+                    )
+                
                 summary[endpoint] = {
                     "total_requests": metrics["count"],
                     "success_count": metrics["success_count"],
@@ -261,16 +416,41 @@ class MetricsCollector:
                     "avg_response_time": avg_time,
                     "min_response_time": metrics["min_time"],
                     "max_response_time": metrics["max_time"],
+                    "p50_response_time": percentile(50),
+                    "p95_response_time": percentile(95),
+                    "p99_response_time": percentile(99),
+                    "avg_db_queries": metrics["db_queries"] / metrics["count"],
+                    "avg_db_time": metrics["db_time"] / metrics["count"],
                     "status_codes": metrics["status_codes"]
                 }
         
         return summary
     
+    def get_tenant_summary(self) -> dict:
+        """Request counts per tenant id ("none" = no tenant, "other" = over max_tenants)"""
+        with self._lock:
+            return dict(self.tenant_requests)
+    
+    def snapshot(self) -> dict:
+        """Raw counters (JSON serializable), summed across worker processes for Prometheus"""
+        with self._lock:
+            return {
+                "requests": {
+                    key: {**metrics, "status_codes": dict(metrics["status_codes"]),
+                          "latency_buckets": list(metrics["latency_buckets"]),
+                          "query_count_buckets": list(metrics["query_count_buckets"])}
+                    for key, metrics in self.metrics.items()
+                },
+                "tenants": dict(self.tenant_requests)
+            }
+    
     def reset_metrics(self):
         """Reset all metrics"""
-        self.metrics = {}
+        with self._lock:
+            self.metrics = {}
+            self.tenant_requests = {}
 
 
 # Global instances
-health_checker = HealthChecker()
-metrics_collector = MetricsCollector()
+health_checker = HealthChecker(sample_interval=settings.HEALTH_SAMPLE_INTERVAL)
+metrics_collector = MetricsCollector(max_tenants=settings.METRICS_MAX_TENANTS)
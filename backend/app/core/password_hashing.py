@@ -0,0 +1,102 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (~250ms at cost 12), so verifying passwords on the
+event loop or in Starlette's shared threadpool lets a burst of logins starve
+every other endpoint. PasswordHasher runs bcrypt on its own small executor and
+rejects work once PASSWORD_HASH_MAX_PENDING calls are queued, so logins degrade
+to fast 503s instead of taking the whole service down.
+
+Async code awaits verify_and_update()/hash(); sync code (threadpool endpoints,
+CRUD, scripts) calls verify_and_update_sync()/hash_sync(), which wait on the
+same executor, so every bcrypt call shares one concurrency limit.
+"""
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# Hashes made with a different cost are reported by needs_update()/verify_and_update(),
+# so changing BCRYPT_ROUNDS rehashes passwords transparently on the next login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already waiting"""
+
+
+def is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith('$2b$') or hashed_password.startswith('$2a$')
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; the second value is a new hash when the stored one
+    uses an outdated bcrypt cost (None otherwise)
+    """
+    if is_bcrypt_hash(hashed_password):
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+    # Fallback to simple hash for testing (SQLite data)
+    return hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password, None
+
+
+class PasswordHasher:
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+
+    def _submit(self, func, *args) -> Future:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self.pending} password operations already pending")
+            self.pending += 1
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Released when bcrypt finishes, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self._submit(verify_and_update, plain_password, hashed_password))
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    def verify_and_update_sync(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return self._submit(verify_and_update, plain_password, hashed_password).result()
+
+    def hash_sync(self, password: str) -> str:
+        return self._submit(pwd_context.hash, password).result()
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,208 @@
+"""
+Prometheus text exposition of MetricsCollector, aggregated across workers.
+
+Every worker process writes MetricsCollector.snapshot() to its own JSON file
+in a shared directory (on /dev/shm when available) every
+METRICS_FLUSH_INTERVAL seconds. /metrics/prometheus, whichever worker serves
+it, sums the files of all workers, so a scrape sees the whole host.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.monitoring import LATENCY_BUCKETS, QUERY_COUNT_BUCKETS, MetricsCollector, metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # PlainTextResponse adds "; charset=utf-8"
+
+
+def default_metrics_dir() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "zalo_be_metrics")
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiprocessMetricsStore:
+    """One snapshot file per worker process (metrics_<pid>.json)"""
+
+    def __init__(self, collector: MetricsCollector, directory: Optional[str] = None, flush_interval: float = 5.0):
+        self.collector = collector
+        self.directory = directory or default_metrics_dir()
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics_{pid}.json")
+
+    def write(self) -> None:
+        """Write this process' snapshot (atomically, readers never see half a file)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.collector.snapshot(), f)
+        os.replace(temp_path, path)
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        snapshots = []
+        if not os.path.isdir(self.directory):
+            return snapshots
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith("metrics_") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping metrics file {filename}: {e}")
+        return snapshots
+
+    def remove_stale(self) -> None:
+        """Drop the files of exited workers (their counters disappear, Prometheus sees a reset)"""
+        if not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            pid = filename[len("metrics_"):-len(".json")] if filename.endswith(".json") else ""
+            if filename.startswith("metrics_") and pid.isdigit() and not _pid_running(int(pid)):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def collect(self) -> Dict[str, Any]:
+        """Snapshots of all workers summed; this worker's is refreshed first"""
+        self.write()
+        return merge_snapshots(self.read_all())
+
+
+def merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    requests: Dict[str, Dict[str, Any]] = {}
+    tenants: Dict[str, int] = {}
+    for snapshot in snapshots:
+        for key, metrics in snapshot.get("requests", {}).items():
+            merged = requests.get(key)
+            if merged is None:
+                requests[key] = {
+                    **metrics,
+                    "status_codes": dict(metrics["status_codes"]),
+                    "latency_buckets": list(metrics["latency_buckets"]),
+                    "query_count_buckets": list(metrics["query_count_buckets"])
+                }
+                continue
+            for field in ("count", "total_time", "db_queries", "db_time"):
+                merged[field] += metrics[field]
+            for status_code, count in metrics["status_codes"].items():
+                merged["status_codes"][status_code] = merged["status_codes"].get(status_code, 0) + count
+            for field in ("latency_buckets", "query_count_buckets"):
+                merged[field] = [a + b for a, b in zip(merged[field], metrics[field])]
+        for tenant, count in snapshot.get("tenants", {}).items():
+            tenants[tenant] = tenants.get(tenant, 0) + count
+    return {"requests": requests, "tenants": tenants, "workers": len(snapshots)}
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram(lines: List[str], name: str, bounds, counts: List[int], total: float, **labels: Any) -> None:
+    cumulative = 0
+    for bound, count in zip(list(bounds) + ["+Inf"], counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative}")
+
+
+def render_prometheus(data: Dict[str, Any]) -> str:
+    """Text exposition format (version 0.0.4) of merge_snapshots() output"""
+    requests = sorted(data["requests"].values(), key=lambda metrics: (metrics["endpoint"], metrics["method"]))
+    lines = [
+        "# HELP http_requests_total HTTP requests by route template, method and status code.",
+        "# TYPE http_requests_total counter",
+    ]
+    for metrics in requests:
+        for status_code, count in sorted(metrics["status_codes"].items()):
+            lines.append(f"http_requests_total{_labels(method=metrics['method'], route=metrics['endpoint'], status=status_code)} {count}")
+
+    lines += [
+        "# HELP http_request_duration_seconds HTTP request latency by route template and method.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for metrics in requests:
+        _histogram(lines, "http_request_duration_seconds", LATENCY_BUCKETS, metrics["latency_buckets"],
+                   metrics["total_time"], method=metrics["method"], route=metrics["endpoint"])
+
+    lines += [
+        "# HELP http_request_db_queries Database statements executed per HTTP request.",
+        "# TYPE http_request_db_queries histogram",
+    ]
+    for metrics in requests:
+        _histogram(lines, "http_request_db_queries", QUERY_COUNT_BUCKETS, metrics["query_count_buckets"],
+                   metrics["db_queries"], method=metrics["method"], route=metrics["endpoint"])
+
+    lines += [
+        "# HELP http_request_db_seconds_total Time spent executing database statements.",
+        "# TYPE http_request_db_seconds_total counter",
+    ]
+    for metrics in requests:
+        lines.append(f"http_request_db_seconds_total{_labels(method=metrics['method'], route=metrics['endpoint'])} {metrics['db_time']}")
+
+    lines += [
+        "# HELP http_requests_by_tenant_total HTTP requests by tenant id.",
+        "# TYPE http_requests_by_tenant_total counter",
+    ]
+    for tenant, count in sorted(data["tenants"].items()):
+        lines.append(f"http_requests_by_tenant_total{_labels(tenant=tenant)} {count}")
+
+    lines += [
+        "# HELP app_metrics_workers Worker processes included in these metrics.",
+        "# TYPE app_metrics_workers gauge",
+        f"app_metrics_workers {data['workers']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+metrics_store = MultiprocessMetricsStore(
+    metrics_collector,
+    directory=settings.METRICS_MULTIPROC_DIR,
+    flush_interval=settings.METRICS_FLUSH_INTERVAL
+)
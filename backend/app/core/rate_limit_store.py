@@ -0,0 +1,163 @@
+"""
+Storage backends for RateLimiter (app/core/security_utils.py).
+
+The limiter uses GCRA (generic cell rate algorithm), the token bucket expressed
+as a single number per client: the "theoretical arrival time" (TAT) at which
+the bucket is full again. A check is one read and one write of that float, so
+every backend only needs an atomic read-modify-write of one value per key.
+
+- MemoryRateLimitStore: per process, for tests and single-worker setups
+- SQLiteRateLimitStore: a SQLite file (on /dev/shm when available) shared by
+  every uvicorn worker on the host, so limits are per host, not per worker
+
+Keys whose TAT is in the past are indistinguishable from new clients, so they
+are evicted periodically; memory and file size stay bounded by active clients.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+# f(stored_tat or None, now) -> (new_tat or None to leave unchanged, result)
+UpdateFunc = Callable[[Optional[float], float], Tuple[Optional[float], dict]]
+
+
+class RateLimitStore:
+    """Interface of a rate limit backend"""
+
+    def update(self, key: str, func: UpdateFunc) -> dict:
+        """Atomically apply func to the TAT stored for key and return its result"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[float]:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Remove keys whose bucket is full again; returns the number removed"""
+        raise NotImplementedError
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    def __init__(self, maxsize: int = 100000, evict_every: int = 1000):
+        self.maxsize = maxsize
+        self.evict_every = evict_every
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def update(self, key: str, func: UpdateFunc) -> dict:
+        now = time.time()
+        with self._lock:
+            new_tat, result = func(self._data.get(key), now)
+            if new_tat is not None:
+                self._data[key] = new_tat
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+            self._calls += 1
+            if self._calls % self.evict_every == 0:
+                self._evict_idle(now)
+        return result
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._data.get(key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _evict_idle(self, now: float) -> int:
+        idle = [key for key, tat in self._data.items() if tat <= now]
+        for key in idle:
+            del self._data[key]
+        return len(idle)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        with self._lock:
+            return self._evict_idle(time.time() if now is None else now)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def default_sqlite_path() -> str:
+    """Prefer tmpfs so the shared file never touches the disk"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "zalo_be_rate_limit.db")
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    Calls block (file lock), so callers on the event loop go through a thread.
+    The short busy timeout bounds how long a request waits for the lock held
+    by another worker; past it sqlite3.OperationalError ("database is locked")
+    is raised and RateLimiter lets the request through.
+    """
+
+    def __init__(self, path: Optional[str] = None, evict_every: int = 1000, timeout: float = 0.5):
+        self.path = path or default_sqlite_path()
+        self.evict_every = evict_every
+        self.timeout = timeout
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, opened on first use; autocommit mode, transactions are explicit
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute("CREATE TABLE IF NOT EXISTS rate_limit_buckets (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            self._local.connection = connection
+        return connection
+
+    def update(self, key: str, func: UpdateFunc) -> dict:
+        connection = self._connection()
+        now = time.time()
+        # BEGIN IMMEDIATE takes the write lock up front, so the read-modify-write
+        # is atomic across worker processes
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT tat FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            new_tat, result = func(row[0] if row else None, now)
+            if new_tat is not None:
+                connection.execute(
+                    "INSERT INTO rate_limit_buckets (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat)
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+
+        self._calls += 1
+        if self._calls % self.evict_every == 0:
+            self.evict_idle(now)
+        return result
+
+    def get(self, key: str) -> Optional[float]:
+        row = self._connection().execute("SELECT tat FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM rate_limit_buckets WHERE key = ?", (key,))
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM rate_limit_buckets WHERE tat <= ?", (time.time() if now is None else now,)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_limit_buckets").fetchone()[0]
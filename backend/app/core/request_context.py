@@ -0,0 +1,56 @@
+"""
+Per-request context shared by the middleware, dependencies and DB event hooks.
+
+ObservabilityMiddleware opens a RequestContext for every HTTP request. It is a
+mutable object held in a ContextVar, so code running in the threadpool (sync
+endpoints and dependencies) or in SQLAlchemy's async greenlets updates the
+same instance the middleware reads when the request completes.
+"""
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+
+class RequestContext:
+    __slots__ = ("request_id", "tenant_id", "db_queries", "db_time", "statements")
+
+    def __init__(self, request_id: str, track_statements: bool = False):
+        self.request_id = request_id
+        self.tenant_id: Optional[int] = None  # tenant of the authenticated admin user
+        self.db_queries = 0
+        self.db_time = 0.0  # seconds spent in cursor.execute
+        # SQL text -> executions, only when N+1 detection is on
+        self.statements: Optional[Dict[str, int]] = {} if track_statements else None
+
+    def record_query(self, statement: str, duration: float) -> None:
+        self.db_queries += 1
+        self.db_time += duration
+        if self.statements is not None:
+            self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated_statements(self, threshold: int) -> Dict[str, int]:
+        """Statements executed at least threshold times (same SQL, usually an N+1 loop)"""
+        if not self.statements:
+            return {}
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def begin_request(request_id: str, track_statements: bool = False) -> Token:
+    return _request_context.set(RequestContext(request_id, track_statements))
+
+
+def end_request(token: Token) -> None:
+    _request_context.reset(token)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Context of the request being handled, None outside of a request (scripts, startup)"""
+    return _request_context.get()
+
+
+def set_request_tenant(tenant_id: Optional[int]) -> None:
+    context = _request_context.get()
+    if context is not None and context.tenant_id is None:
+        context.tenant_id = tenant_id
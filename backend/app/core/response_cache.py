@@ -0,0 +1,218 @@
+"""
+Cache for computed endpoint responses (dashboards, reports).
+
+Entries are keyed by (endpoint, tenant_id, params). A fresh entry is served
+as is; within `stale_ttl` after expiry the stale value is served while one
+background task recomputes it (stale-while-revalidate); concurrent misses of
+the same key wait for a single computation (single-flight).
+
+CRUDBase / AsyncCRUDBase call invalidate_model() after committing a write, so
+a tenant's entries (and the all-tenant ones, tenant_id None) are dropped as
+soon as its rooms, bookings, customers or promotions change. The cache is per
+worker process: other workers catch up within `ttl`.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.read_session import open_async_read_session
+from app.models.models import TblBookingRequests, TblCustomers, TblPromotions, TblRooms
+
+logger = logging.getLogger(__name__)
+
+Compute = Callable[[AsyncSession], Awaitable[Any]]
+CacheKey = Tuple[str, Optional[int], Tuple[Tuple[str, Hashable], ...]]
+
+
+class ResponseCache:
+    """Per-process response cache with TTL, stale-while-revalidate and single-flight misses"""
+
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        maxsize: int = 1000,
+        invalidating_models: tuple = (),
+        session_factory: Optional[Callable[[], Awaitable[AsyncSession]]] = None,
+        timer: Callable[[], float] = time.monotonic
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.invalidating_models = set(invalidating_models)
+        # Opens the session used by background refreshes (the request's is closed by then)
+        self.session_factory = session_factory
+        self._timer = timer
+        # key -> (fresh_until, stale_until, value)
+        self._entries: "OrderedDict[CacheKey, tuple]" = OrderedDict()
+        # tenant_id -> invalidation count; a computation started before an
+        # invalidation of its tenant doesn't store its (possibly old) result
+        self._generations: Dict[Optional[int], int] = {}
+        self._clear_count = 0
+        self._lock = threading.Lock()
+        # Only used on the event loop
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._refreshing: set = set()
+        # The loop only keeps weak references to tasks: a pending refresh must be held here
+        self._tasks: set = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    @staticmethod
+    def make_key(endpoint: str, tenant_id: Optional[int], params: Optional[Dict[str, Hashable]] = None) -> CacheKey:
+        return endpoint, tenant_id, tuple(sorted((params or {}).items()))
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        tenant_id: Optional[int],
+        params: Optional[Dict[str, Hashable]],
+        compute: Compute,
+        db: AsyncSession,
+        bypass: bool = False
+    ) -> Any:
+        """
+        Cached result of `await compute(db)`. `bypass` (e.g. read-your-writes
+        requests) computes on `db` without reading or storing the cache.
+        """
+        if bypass or not self.enabled:
+            return await compute(db)
+
+        key = self.make_key(endpoint, tenant_id, params)
+        now = self._timer()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                fresh_until, stale_until, value = entry
+                if now < fresh_until:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if now < stale_until:
+                    self.stale_hits += 1
+                    self._schedule_refresh(key, compute)
+                    return value
+                del self._entries[key]
+            self.misses += 1
+
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The request computing it was cancelled: compute it here instead
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._compute_and_store(key, compute, db)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: no "never retrieved" warning without waiters
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def _generation(self, tenant_id: Optional[int]) -> Tuple[int, int]:
+        return self._generations.get(tenant_id, 0), self._clear_count
+
+    async def _compute_and_store(self, key: CacheKey, compute: Compute, db: AsyncSession) -> Any:
+        tenant_id = key[1]
+        with self._lock:
+            generation = self._generation(tenant_id)
+        value = await compute(db)
+        now = self._timer()
+        with self._lock:
+            if generation == self._generation(tenant_id):
+                self._entries[key] = (now + self.ttl, now + self.ttl + self.stale_ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def _schedule_refresh(self, key: CacheKey, compute: Compute) -> None:
+        if key in self._refreshing or key in self._inflight or self.session_factory is None:
+            return
+        self._refreshing.add(key)
+        # Empty context: the refresh's queries must not count toward the (finished)
+        # RequestContext of the request that triggered it
+        task = asyncio.get_running_loop().create_task(self._refresh(key, compute), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: CacheKey, compute: Compute) -> None:
+        try:
+            db = await self.session_factory()
+            try:
+                await self._compute_and_store(key, compute, db)
+            finally:
+                await db.close()
+        except Exception as e:
+            # The stale value keeps being served until stale_until, then a request recomputes it
+            logger.warning(f"Background refresh of {key[0]} (tenant {key[1]}) failed: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    def invalidate_tenant(self, tenant_id: Optional[int]) -> None:
+        """Drop the entries of a tenant and the all-tenant (tenant_id None) entries"""
+        with self._lock:
+            self.invalidations += 1
+            for affected in {tenant_id, None}:
+                self._generations[affected] = self._generations.get(affected, 0) + 1
+            for key in [key for key in self._entries if key[1] == tenant_id or key[1] is None]:
+                del self._entries[key]
+
+    def invalidate_model(self, model, tenant_id: Optional[int]) -> None:
+        """Write hook for CRUDBase: only models the cached responses are built from invalidate"""
+        if model in self.invalidating_models:
+            self.invalidate_tenant(tenant_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._clear_count += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight)
+        }
+
+
+dashboard_cache = ResponseCache(
+    ttl=settings.DASHBOARD_CACHE_TTL,
+    stale_ttl=settings.DASHBOARD_CACHE_STALE_TTL,
+    maxsize=settings.DASHBOARD_CACHE_MAXSIZE,
+    invalidating_models=(TblRooms, TblBookingRequests, TblCustomers, TblPromotions),
+    session_factory=open_async_read_session
+)
@@ -0,0 +1,308 @@
+"""
+Resumable uploads of large media (room/facility videos, VR360 assets, hotel
+brand intro videos), used by the /upload/resumable endpoints in
+app/api/api_v1/endpoints/file_management.py.
+
+Protocol:
+  1. POST /upload/resumable/init            -> upload_id (filename, total size)
+  2. PUT  /upload/resumable/{id}?offset=N   raw bytes appended at offset N
+     GET  /upload/resumable/{id}            current offset, to resume after a failure
+  3. POST /upload/resumable/{id}/finalize   -> stored by app/core/media_store.py, same response as /upload/video
+
+Every session is a directory under RESUMABLE_UPLOAD_DIR (not served by the
+/uploads static mount) with meta.json and the data received so far. The
+offset is the size of the data file, so bytes written before a dropped
+connection are kept and the client resumes from there. Sessions are shared by
+all workers; flock() keeps two requests of one session from writing at the
+same time (on platforms without fcntl only requests of one worker are
+serialized). Sessions without activity for RESUMABLE_UPLOAD_EXPIRE_SECONDS
+are removed by a sweeper thread.
+"""
+import errno
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.upload_storage import StoredFile, UploadTooLarge, temp_path
+
+try:
+    import fcntl
+except ImportError:  # Windows (development)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+META_FILE = "meta.json"
+DATA_FILE = "data.part"
+LOCK_FILE = "lock"
+
+
+class UploadSessionNotFound(Exception):
+    pass
+
+
+class UploadSessionBusy(Exception):
+    """Another request is writing to the same session"""
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset: int):
+        self.offset = offset
+        super().__init__(f"Upload offset mismatch, current offset is {offset}")
+
+
+class UploadChecksumMismatch(Exception):
+    def __init__(self, sha256: str):
+        self.sha256 = sha256
+        super().__init__(f"Checksum mismatch, received data has SHA-256 {sha256}")
+
+
+class ResumableUploadStore:
+    """Upload sessions on disk, see the module docstring"""
+
+    def __init__(self, directory: str, expire_seconds: float, sweep_interval: float = 600.0):
+        self.directory = Path(directory)
+        self.expire_seconds = expire_seconds
+        self.sweep_interval = sweep_interval
+        # Sessions being written by this process (flock is per open file, this covers fcntl-less platforms)
+        self._active: set = set()
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _session_dir(self, upload_id: str) -> Path:
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise UploadSessionNotFound(upload_id)
+        return self.directory / upload_id
+
+    # Blocking helpers, called through run_in_threadpool
+
+    def _create(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        upload_id = uuid.uuid4().hex
+        session_dir = self.directory / upload_id
+        session_dir.mkdir(parents=True)
+        meta = {**meta, "upload_id": upload_id, "created_at": time.time()}
+        with open(session_dir / META_FILE, "w") as f:
+            json.dump(meta, f)
+        (session_dir / DATA_FILE).touch()
+        return self._status(upload_id, meta)
+
+    def _read_meta(self, upload_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._session_dir(upload_id) / META_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadSessionNotFound(upload_id)
+
+    def _offset(self, upload_id: str) -> int:
+        try:
+            return (self._session_dir(upload_id) / DATA_FILE).stat().st_size
+        except OSError:
+            raise UploadSessionNotFound(upload_id)
+
+    def _last_activity(self, session_dir: Path) -> float:
+        times = []
+        for name in (META_FILE, DATA_FILE):
+            try:
+                times.append((session_dir / name).stat().st_mtime)
+            except OSError:
+                pass
+        return max(times) if times else 0.0
+
+    def _status(self, upload_id: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+        session_dir = self._session_dir(upload_id)
+        return {
+            **meta,
+            "offset": self._offset(upload_id),
+            "expires_at": self._last_activity(session_dir) + self.expire_seconds
+        }
+
+    def _acquire(self, upload_id: str):
+        session_dir = self._session_dir(upload_id)
+        if not session_dir.is_dir():
+            raise UploadSessionNotFound(upload_id)
+        with self._active_lock:
+            if upload_id in self._active:
+                raise UploadSessionBusy(upload_id)
+            self._active.add(upload_id)
+        lock_file = None
+        try:
+            try:
+                lock_file = open(session_dir / LOCK_FILE, "a")
+            except FileNotFoundError:
+                raise UploadSessionNotFound(upload_id)
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    raise UploadSessionBusy(upload_id)
+            if not session_dir.is_dir():
+                # Finalized, cancelled or expired while we were opening the lock file
+                raise UploadSessionNotFound(upload_id)
+            return lock_file
+        except BaseException:
+            if lock_file is not None:
+                lock_file.close()
+            with self._active_lock:
+                self._active.discard(upload_id)
+            raise
+
+    def _release(self, upload_id: str, lock_file) -> None:
+        lock_file.close()  # also releases the flock
+        with self._active_lock:
+            self._active.discard(upload_id)
+
+    def _remove(self, upload_id: str) -> None:
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+
+    def _truncate(self, path: Path, size: int) -> None:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+
+    def _finish(self, upload_id: str, destination: Path, expected_sha256: Optional[str]) -> StoredFile:
+        session_dir = self._session_dir(upload_id)
+        data_path = session_dir / DATA_FILE
+        digest = hashlib.sha256()
+        with open(data_path, "rb") as f:
+            for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise UploadChecksumMismatch(sha256)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        size = data_path.stat().st_size
+        try:
+            os.replace(data_path, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # RESUMABLE_UPLOAD_DIR on another filesystem than uploads/: copy next to
+            # the destination first, so the file still appears there atomically
+            temp = temp_path(destination.parent)
+            shutil.move(str(data_path), str(temp))
+            os.replace(temp, destination)
+        shutil.rmtree(session_dir, ignore_errors=True)
+        return StoredFile(destination, size, sha256)
+
+    # API used by the endpoints
+
+    async def create(self, **meta: Any) -> Dict[str, Any]:
+        return await run_in_threadpool(self._create, meta)
+
+    async def get(self, upload_id: str) -> Dict[str, Any]:
+        meta = await run_in_threadpool(self._read_meta, upload_id)
+        return await run_in_threadpool(self._status, upload_id, meta)
+
+    @asynccontextmanager
+    async def locked(self, upload_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Exclusive access to a session; yields its meta. Raises UploadSessionBusy when taken"""
+        lock_file = await run_in_threadpool(self._acquire, upload_id)
+        try:
+            yield await run_in_threadpool(self._read_meta, upload_id)
+        finally:
+            await run_in_threadpool(self._release, upload_id, lock_file)
+
+    async def append(self, upload_id: str, meta: Dict[str, Any], offset: int,
+                     chunks: AsyncIterable[bytes], max_chunk_size: int) -> int:
+        """
+        Append a chunk at `offset` (must be the current offset) and return the
+        new offset. Call inside locked(). A chunk going past the declared size
+        or over max_chunk_size is dropped entirely (UploadTooLarge); a chunk
+        interrupted by a disconnect keeps the bytes received.
+        """
+        current = await run_in_threadpool(self._offset, upload_id)
+        if offset != current:
+            raise UploadOffsetMismatch(current)
+        data_path = self._session_dir(upload_id) / DATA_FILE
+        max_size = min(max_chunk_size, meta["size"] - current)
+        buffer = await run_in_threadpool(open, data_path, "ab")
+        received = 0
+        try:
+            try:
+                async for chunk in chunks:
+                    received += len(chunk)
+                    if received > max_size:
+                        raise UploadTooLarge(max_size)
+                    await run_in_threadpool(buffer.write, chunk)
+            finally:
+                await run_in_threadpool(buffer.close)
+        except UploadTooLarge:
+            await run_in_threadpool(self._truncate, data_path, current)
+            raise
+        return current + received
+
+    async def finish(self, upload_id: str, destination: Path, expected_sha256: Optional[str] = None) -> StoredFile:
+        """
+        Move the complete data to destination and drop the session; call inside
+        locked(). Raises UploadChecksumMismatch (nothing moved) if the data's
+        SHA-256 isn't expected_sha256.
+        """
+        return await run_in_threadpool(self._finish, upload_id, destination, expected_sha256)
+
+    async def remove(self, upload_id: str) -> None:
+        await run_in_threadpool(self._remove, upload_id)
+
+    # Expiry sweeper
+
+    def sweep(self) -> int:
+        """Remove sessions without activity for expire_seconds; returns how many were removed"""
+        if not self.directory.is_dir():
+            return 0
+        removed = 0
+        deadline = time.time() - self.expire_seconds
+        for session_dir in self.directory.iterdir():
+            if not (session_dir.is_dir() and UPLOAD_ID_PATTERN.match(session_dir.name)):
+                continue
+            if self._last_activity(session_dir) >= deadline:
+                continue
+            try:
+                lock_file = self._acquire(session_dir.name)
+            except (UploadSessionBusy, UploadSessionNotFound, OSError):
+                continue  # being written (by any worker) or already gone
+            try:
+                shutil.rmtree(session_dir, ignore_errors=True)
+            finally:
+                self._release(session_dir.name, lock_file)
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} expired resumable upload(s)")
+        return removed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except OSError as e:
+                logger.warning(f"Resumable upload sweep failed: {e}")
+
+    def start_sweeper(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="upload-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+resumable_uploads = ResumableUploadStore(
+    settings.RESUMABLE_UPLOAD_DIR,
+    expire_seconds=settings.RESUMABLE_UPLOAD_EXPIRE_SECONDS,
+    sweep_interval=settings.RESUMABLE_UPLOAD_SWEEP_INTERVAL
+)
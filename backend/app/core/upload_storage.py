@@ -0,0 +1,102 @@
+"""
+Streaming writes of uploaded files (app/api/api_v1/endpoints/file_management.py).
+
+Files are copied in UPLOAD_CHUNK_SIZE chunks instead of being read whole: the
+size limit is checked after every chunk, the SHA-256 is computed on the fly
+and the chunks are written by a worker thread (never on the event loop) to a
+temp file in the destination directory, which app/core/media_store.py renames
+into place only once complete. Memory per upload is one chunk, and a failed
+or oversized upload never leaves a partial file behind.
+
+Starlette spools a multipart body to a SpooledTemporaryFile (in memory up to
+1MB) and knows each part's size, so an UploadFile over the limit is rejected
+before anything is copied.
+"""
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+TEMP_SUFFIX = ".part"
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File too large. Maximum size is {max_size // (1024 * 1024)}MB.")
+
+
+class StoredFile:
+    """A file written by receive_stream()"""
+
+    __slots__ = ("path", "size", "sha256")
+
+    def __init__(self, path: Path, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+
+async def iter_upload(file: UploadFile, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def temp_path(directory: Path) -> Path:
+    # Hidden name in the directory of the final file, so os.replace() stays on one filesystem
+    return directory / f".{uuid.uuid4().hex}{TEMP_SUFFIX}"
+
+
+def discard(path: Path) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _open_temp(directory: Path) -> BinaryIO:
+    directory.mkdir(parents=True, exist_ok=True)
+    return open(temp_path(directory), "xb")
+
+
+async def receive_stream(chunks: AsyncIterable[bytes], directory: Path, max_size: int) -> StoredFile:
+    """
+    Write `chunks` to a new temp file in `directory` and return it; the caller
+    moves it into place with os.replace() or discard()s it.
+    Raises UploadTooLarge as soon as more than max_size bytes have been received.
+    """
+    buffer = await run_in_threadpool(_open_temp, directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+        finally:
+            await run_in_threadpool(buffer.close)
+    except BaseException:
+        # Also on cancellation (client disconnected): don't leave the temp file behind
+        await run_in_threadpool(discard, Path(buffer.name))
+        raise
+    return StoredFile(Path(buffer.name), size, digest.hexdigest())
+
+
+async def receive_upload(file: UploadFile, directory: Path, max_size: int) -> StoredFile:
+    """Stream an UploadFile to a temp file, rejecting it upfront when its size is already known"""
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge(max_size)
+    return await receive_stream(iter_upload(file), directory, max_size)
@@ -0,0 +1,246 @@
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
+from datetime import datetime
+
+from app.models.models import Base
+from app.core.response_cache import dashboard_cache
+from app.crud.crud_daily_stats import daily_stats
+from app.crud.pagination import paginate_keyset_async
+
+ModelType = TypeVar("ModelType", bound=Base)
+CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
+UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        Async counterpart of CRUDBase for use with AsyncSession (get_async_db).
+        Same methods and semantics, including daily rollup maintenance, which
+        reuses the sync daily_stats code through AsyncSession.run_sync().
+        **Parameters**
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    async def _track(self, db: AsyncSession, *, before=None, after=None) -> None:
+        if before or after:
+            await db.run_sync(lambda session: daily_stats.track(session, before=before, after=after))
+
+    async def get(self, db: AsyncSession, id: Any, tenant_id: int) -> Optional[ModelType]:
+        """Get single record by ID and tenant"""
+        result = await db.execute(
+            select(self.model).where(
+                and_(
+                    self.model.id == id,
+                    self.model.tenant_id == tenant_id,
+                    self.model.deleted == 0
+                )
+            )
+        )
+        return result.scalars().first()
+
+    async def get_by_ids(self, db: AsyncSession, ids: Iterable[Any]) -> Dict[Any, ModelType]:
+        """Batch-load records by ID with a single IN (...) query, keyed by ID"""
+        unique_ids = {id for id in ids if id is not None}
+        if not unique_ids:
+            return {}
+        
+        result = await db.execute(select(self.model).where(self.model.id.in_(unique_ids)))
+        return {record.id: record for record in result.scalars().all()}
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        include_deleted: bool = False
+    ) -> List[ModelType]:
+        """Get multiple records for a tenant"""
+        statement = select(self.model).where(self.model.tenant_id == tenant_id)
+        
+        if not include_deleted:
+            statement = statement.where(self.model.deleted == 0)
+            
+        result = await db.execute(statement.offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def get_multi_by_cursor(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: Sequence[str] = ("id",),
+        descending: bool = False,
+        include_deleted: bool = False
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Keyset-paginated variant of get_multi: returns (records, next_cursor)"""
+        statement = select(self.model).where(self.model.tenant_id == tenant_id)
+        
+        if not include_deleted:
+            statement = statement.where(self.model.deleted == 0)
+        
+        return await paginate_keyset_async(
+            db,
+            statement,
+            columns=[getattr(self.model, name) for name in order_by],
+            cursor=cursor,
+            limit=limit,
+            descending=descending
+        )
+
+    async def get_count(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: int,
+        include_deleted: bool = False
+    ) -> int:
+        """Get total count of records for a tenant"""
+        statement = select(func.count(self.model.id)).where(self.model.tenant_id == tenant_id)
+        
+        if not include_deleted:
+            statement = statement.where(self.model.deleted == 0)
+            
+        return (await db.execute(statement)).scalar()
+
+    async def create(
+        self, 
+        db: AsyncSession, 
+        *, 
+        obj_in: CreateSchemaType, 
+        tenant_id: int,
+        created_by: str = None
+    ) -> ModelType:
+        """Create new record"""
+        obj_in_data = jsonable_encoder(obj_in)
+        
+        # Add tenant_id and audit fields
+        obj_in_data["tenant_id"] = tenant_id
+        if created_by:
+            obj_in_data["created_by"] = created_by
+            
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        if daily_stats.is_tracked(self.model):
+            # Flush + refresh first so server-side defaults (created_at, status) are known
+            await db.flush()
+            await db.refresh(db_obj)
+            await self._track(db, after=daily_stats.snapshot(db_obj))
+        await db.commit()
+        dashboard_cache.invalidate_model(self.model, tenant_id)
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        updated_by: str = None
+    ) -> ModelType:
+        """Update existing record"""
+        obj_data = jsonable_encoder(db_obj)
+        
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+            
+        # Add audit field
+        if updated_by:
+            update_data["updated_by"] = updated_by
+        
+        rollup_before = daily_stats.snapshot(db_obj)
+            
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+                
+        db.add(db_obj)
+        await self._track(db, before=rollup_before, after=daily_stats.snapshot(db_obj))
+        await db.commit()
+        dashboard_cache.invalidate_model(self.model, db_obj.tenant_id)
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(
+        self, 
+        db: AsyncSession, 
+        *, 
+        id: int, 
+        tenant_id: int,
+        deleted_by: str = None
+    ) -> Optional[ModelType]:
+        """Soft delete record"""
+        obj = await self.get(db=db, id=id, tenant_id=tenant_id)
+        if obj:
+            rollup_before = daily_stats.snapshot(obj)
+            obj.deleted = 1
+            obj.deleted_at = datetime.utcnow()
+            if deleted_by:
+                obj.deleted_by = deleted_by
+            db.add(obj)
+            await self._track(db, before=rollup_before)
+            await db.commit()
+            dashboard_cache.invalidate_model(self.model, tenant_id)
+            await db.refresh(obj)
+        return obj
+
+    async def restore(
+        self, 
+        db: AsyncSession, 
+        *, 
+        id: int, 
+        tenant_id: int,
+        updated_by: str = None
+    ) -> Optional[ModelType]:
+        """Restore soft deleted record"""
+        result = await db.execute(
+            select(self.model).where(
+                and_(
+                    self.model.id == id,
+                    self.model.tenant_id == tenant_id,
+                    self.model.deleted == 1
+                )
+            )
+        )
+        obj = result.scalars().first()
+        
+        if obj:
+            obj.deleted = 0
+            obj.deleted_at = None
+            obj.deleted_by = None
+            if updated_by:
+                obj.updated_by = updated_by
+            db.add(obj)
+            await self._track(db, after=daily_stats.snapshot(obj))
+            await db.commit()
+            dashboard_cache.invalidate_model(self.model, tenant_id)
+            await db.refresh(obj)
+        return obj
+
+    async def hard_delete(
+        self, 
+        db: AsyncSession, 
+        *, 
+        id: int, 
+        tenant_id: int
+    ) -> Optional[ModelType]:
+        """Permanently delete record"""
+        obj = await self.get(db=db, id=id, tenant_id=tenant_id)
+        if obj:
+            rollup_before = daily_stats.snapshot(obj)
+            await db.delete(obj)
+            await self._track(db, before=rollup_before)
+            await db.commit()
+            dashboard_cache.invalidate_model(self.model, tenant_id)
+        return obj
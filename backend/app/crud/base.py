@@ -1,4 +1,4 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -7,6 +7,9 @@ from datetime import datetime
 
 from app.db.session_local import SessionLocal
 from app.models.models import Base
+from app.core.response_cache import dashboard_cache
+from app.crud.crud_daily_stats import daily_stats
+from app.crud.pagination import paginate_keyset
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -33,6 +36,18 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             )
         ).first()
 
+    def get_by_ids(self, db: Session, ids: Iterable[Any]) -> Dict[Any, ModelType]:
+        """
+        Batch-load records by ID with a single IN (...) query, keyed by ID.
+        Use instead of one get() per row when resolving references of a page.
+        """
+        unique_ids = {id for id in ids if id is not None}
+        if not unique_ids:
+            return {}
+        
+        records = db.query(self.model).filter(self.model.id.in_(unique_ids)).all()
+        return {record.id: record for record in records}
+
     def get_multi(
         self,
         db: Session,
@@ -50,6 +65,36 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             
         return query.offset(skip).limit(limit).all()
 
+    def get_multi_by_cursor(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: Sequence[str] = ("id",),
+        descending: bool = False,
+        include_deleted: bool = False
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset-paginated variant of get_multi: returns (records, next_cursor).
+        `order_by` must end with a unique column (e.g. ("created_at", "id")).
+        Pass next_cursor back as `cursor` to get the following page; it is None
+        on the last page. Raises InvalidCursorError for malformed cursors.
+        """
+        query = db.query(self.model).filter(self.model.tenant_id == tenant_id)
+        
+        if not include_deleted:
+            query = query.filter(self.model.deleted == 0)
+        
+        return paginate_keyset(
+            query,
+            columns=[getattr(self.model, name) for name in order_by],
+            cursor=cursor,
+            limit=limit,
+            descending=descending
+        )
+
     def get_count(
         self,
         db: Session,
@@ -83,7 +128,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
+        if daily_stats.is_tracked(self.model):
+            # Flush first so server-side defaults (created_at, status) are known
+            db.flush()
+            daily_stats.track(db, after=daily_stats.snapshot(db_obj))
         db.commit()
+        dashboard_cache.invalidate_model(self.model, tenant_id)
         db.refresh(db_obj)
         return db_obj
 
@@ -106,13 +156,17 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         # Add audit field
         if updated_by:
             update_data["updated_by"] = updated_by
+        
+        rollup_before = daily_stats.snapshot(db_obj)
             
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
                 
         db.add(db_obj)
+        daily_stats.track(db, before=rollup_before, after=daily_stats.snapshot(db_obj))
         db.commit()
+        dashboard_cache.invalidate_model(self.model, db_obj.tenant_id)
         db.refresh(db_obj)
         return db_obj
 
@@ -127,12 +181,15 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Soft delete record"""
         obj = self.get(db=db, id=id, tenant_id=tenant_id)
         if obj:
+            rollup_before = daily_stats.snapshot(obj)
             obj.deleted = 1
             obj.deleted_at = datetime.utcnow()
             if deleted_by:
                 obj.deleted_by = deleted_by
             db.add(obj)
+            daily_stats.track(db, before=rollup_before)
             db.commit()
+            dashboard_cache.invalidate_model(self.model, tenant_id)
             db.refresh(obj)
         return obj
 
@@ -160,7 +217,9 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if updated_by:
                 obj.updated_by = updated_by
             db.add(obj)
+            daily_stats.track(db, after=daily_stats.snapshot(obj))
             db.commit()
+            dashboard_cache.invalidate_model(self.model, tenant_id)
             db.refresh(obj)
         return obj
 
@@ -174,6 +233,9 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Permanently delete record"""
         obj = self.get(db=db, id=id, tenant_id=tenant_id)
         if obj:
+            rollup_before = daily_stats.snapshot(obj)
             db.delete(obj)
+            daily_stats.track(db, before=rollup_before)
             db.commit()
+            dashboard_cache.invalidate_model(self.model, tenant_id)
         return obj
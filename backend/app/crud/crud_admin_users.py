@@ -1,18 +1,29 @@
 from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from passlib.context import CryptContext
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, inspect, select
 from datetime import datetime
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.password_hashing import password_hasher
 from app.crud.base import CRUDBase
 from app.models.models import TblAdminUsers
 from app.schemas.admin_users import AdminUserCreate, AdminUserUpdate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Columns left out of the cached snapshots (password checks re-read the row)
+SNAPSHOT_EXCLUDED_COLUMNS = {"hashed_password"}
 
 
 class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
-    
+    def __init__(self, model):
+        super().__init__(model)
+        # id -> column values, so get_current_admin_user doesn't query on every request.
+        # Per process: invalidate_cache() only clears this worker's copy, other workers
+        # keep serving a deactivated/deleted user for up to ADMIN_USER_CACHE_TTL
+        self.snapshot_cache = TTLCache(ttl=settings.ADMIN_USER_CACHE_TTL, maxsize=settings.AUTH_CACHE_MAXSIZE)
+
     # Override get method since admin_users don't filter by tenant_id (they manage tenants)
     def get(self, db: Session, id: int) -> Optional[TblAdminUsers]:
         """Get single admin user by ID"""
@@ -27,6 +38,36 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
         """Get admin user by ID (no tenant filter needed)"""
         return self.get(db, id=id)
 
+    def get_cached(self, db: Session, *, id: int) -> Optional[TblAdminUsers]:
+        """
+        get_by_id backed by the snapshot cache. A cache hit returns a new detached
+        instance (not shared between requests) that can still be passed to update().
+        It has no hashed_password: use get_by_id() to check a password.
+        """
+        if self.snapshot_cache.ttl <= 0:
+            return self.get_by_id(db, id=id)
+
+        snapshot = self.snapshot_cache.get(id)
+        if snapshot is None:
+            user = self.get_by_id(db, id=id)
+            if user is not None:
+                self.snapshot_cache.set(id, {
+                    attr.key: getattr(user, attr.key) for attr in inspect(TblAdminUsers).column_attrs
+                    if attr.key not in SNAPSHOT_EXCLUDED_COLUMNS
+                })
+            return user
+
+        user = TblAdminUsers(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def invalidate_cache(self, id: Optional[int] = None) -> None:
+        """Drop the cached snapshot of one admin user (or all of them)"""
+        if id is None:
+            self.snapshot_cache.clear()
+        else:
+            self.snapshot_cache.delete(id)
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[TblAdminUsers]:
         """Get admin user by email"""
         return db.query(TblAdminUsers).filter(
@@ -54,19 +95,41 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
             return None
         return user
 
+    async def authenticate_async(self, db: AsyncSession, *, username: str, password: str) -> Optional[TblAdminUsers]:
+        """
+        Authenticate admin user with bcrypt running on the password hasher executor
+        (raises PasswordHasherBusy when it is saturated). Hashes made with an old
+        BCRYPT_ROUNDS are replaced on success.
+        """
+        result = await db.execute(select(TblAdminUsers).where(
+            TblAdminUsers.username == username,
+            TblAdminUsers.deleted == 0
+        ))
+        user = result.scalars().first()
+        if not user:
+            return None
+
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
+            return None
+
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+            await db.refresh(user)
+            self.invalidate_cache(user.id)
+        return user
+
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify password - support both bcrypt and simple hash for testing"""
-        # Try bcrypt first
-        if hashed_password.startswith('$2b$') or hashed_password.startswith('$2a$'):
-            return pwd_context.verify(plain_password, hashed_password)
-        
-        # Fallback to simple hash for testing (SQLite data)
-        import hashlib
-        return hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password
+        """
+        Verify password - support both bcrypt and simple hash for testing.
+        Waits on the password hasher executor (raises PasswordHasherBusy when saturated)
+        """
+        return password_hasher.verify_and_update_sync(plain_password, hashed_password)[0]
 
     def get_password_hash(self, password: str) -> str:
-        """Get password hash"""
-        return pwd_context.hash(password)
+        """Get password hash (on the password hasher executor, may raise PasswordHasherBusy)"""
+        return password_hasher.hash_sync(password)
 
     def create(
         self, 
@@ -126,6 +189,7 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.invalidate_cache(db_obj.id)
         return db_obj
 
     def remove(self, db: Session, *, id: int, deleted_by: str = None) -> TblAdminUsers:
@@ -140,6 +204,7 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
                 obj.deleted_by = deleted_by
             db.add(obj)
             db.commit()
+            self.invalidate_cache(id)
         return obj
 
     def update_password(
@@ -158,6 +223,7 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.invalidate_cache(db_obj.id)
         return db_obj
 
     def is_active(self, user: TblAdminUsers) -> bool:
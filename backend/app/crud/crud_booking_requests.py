@@ -1,9 +1,13 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
+from app.crud.async_base import AsyncCRUDBase
 from app.crud.base import CRUDBase
-from app.models.models import TblBookingRequests
+from app.crud.crud_customers import customer, customer_async
+from app.crud.crud_rooms import room, room_async
+from app.models.models import TblBookingRequests, TblCustomers, TblRooms
 from app.schemas.booking_requests import BookingRequestCreate, BookingRequestUpdate
 
 
@@ -61,5 +65,36 @@ class CRUDBookingRequest(CRUDBase[TblBookingRequests, BookingRequestCreate, Book
             )
         ).offset(skip).limit(limit).all()
 
+    def get_related(
+        self,
+        db: Session,
+        *,
+        bookings: List[TblBookingRequests]
+    ) -> Tuple[Dict[int, TblCustomers], Dict[int, TblRooms]]:
+        """
+        Resolve customers and rooms for a list of bookings with one query per
+        entity (instead of two queries per booking). Returns (customers, rooms)
+        dicts keyed by ID; missing references are simply absent.
+        """
+        customers = customer.get_by_ids(db, (booking.customer_id for booking in bookings))
+        rooms = room.get_by_ids(db, (booking.room_id for booking in bookings))
+        return customers, rooms
+
 
 booking_request = CRUDBookingRequest(TblBookingRequests)
+
+
+class AsyncCRUDBookingRequest(AsyncCRUDBase[TblBookingRequests, BookingRequestCreate, BookingRequestUpdate]):
+    async def get_related(
+        self,
+        db: AsyncSession,
+        *,
+        bookings: List[TblBookingRequests]
+    ) -> Tuple[Dict[int, TblCustomers], Dict[int, TblRooms]]:
+        """Async version of CRUDBookingRequest.get_related"""
+        customers = await customer_async.get_by_ids(db, (booking.customer_id for booking in bookings))
+        rooms = await room_async.get_by_ids(db, (booking.room_id for booking in bookings))
+        return customers, rooms
+
+
+booking_request_async = AsyncCRUDBookingRequest(TblBookingRequests)
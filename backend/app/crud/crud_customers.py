@@ -1,9 +1,10 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func
 
+from app.crud.async_base import AsyncCRUDBase
 from app.crud.base import CRUDBase
-from app.models.models import TblCustomers
+from app.models.models import TblCustomers, TblBookingRequests, TblCustomerVouchers, TblRoomStays
 from app.schemas.customers import CustomerCreate, CustomerUpdate
 
 
@@ -60,5 +61,112 @@ class CRUDCustomer(CRUDBase[TblCustomers, CustomerCreate, CustomerUpdate]):
             )
         ).offset(skip).limit(limit).all()
 
+    def get_statistics(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        customer_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Booking/voucher/spending statistics for a page of customers, keyed by
+        customer ID. Uses two queries regardless of page size: one joining the
+        per-customer aggregates (GROUP BY customer_id) and one for the latest
+        booking of each customer.
+        """
+        customer_ids = list({customer_id for customer_id in customer_ids if customer_id is not None})
+        if not customer_ids:
+            return {}
+
+        bookings = db.query(
+            TblBookingRequests.customer_id.label("customer_id"),
+            func.count(TblBookingRequests.id).label("total_bookings"),
+            func.sum(case((TblBookingRequests.status == "cancelled", 1), else_=0)).label("cancelled_bookings"),
+            func.max(TblBookingRequests.created_at).label("last_booking_at")
+        ).filter(
+            and_(
+                TblBookingRequests.customer_id.in_(customer_ids),
+                TblBookingRequests.tenant_id == tenant_id,
+                TblBookingRequests.deleted == 0
+            )
+        ).group_by(TblBookingRequests.customer_id).subquery()
+
+        vouchers = db.query(
+            TblCustomerVouchers.customer_id.label("customer_id"),
+            func.count(TblCustomerVouchers.id).label("vouchers_count"),
+            func.sum(case((TblCustomerVouchers.is_used == True, 0), else_=1)).label("active_vouchers")  # noqa: E712
+        ).filter(
+            and_(
+                TblCustomerVouchers.customer_id.in_(customer_ids),
+                TblCustomerVouchers.deleted == 0
+            )
+        ).group_by(TblCustomerVouchers.customer_id).subquery()
+
+        # Chi tiêu tính theo room stays (booking request không có số tiền)
+        spending = db.query(
+            TblRoomStays.customer_id.label("customer_id"),
+            func.sum(TblRoomStays.total_amount).label("total_spent")
+        ).filter(
+            and_(
+                TblRoomStays.customer_id.in_(customer_ids),
+                TblRoomStays.tenant_id == tenant_id,
+                TblRoomStays.status != "cancelled",
+                TblRoomStays.deleted == 0
+            )
+        ).group_by(TblRoomStays.customer_id).subquery()
+
+        rows = db.query(
+            TblCustomers.id,
+            bookings.c.total_bookings,
+            bookings.c.cancelled_bookings,
+            bookings.c.last_booking_at,
+            vouchers.c.vouchers_count,
+            vouchers.c.active_vouchers,
+            spending.c.total_spent
+        ).outerjoin(
+            bookings, bookings.c.customer_id == TblCustomers.id
+        ).outerjoin(
+            vouchers, vouchers.c.customer_id == TblCustomers.id
+        ).outerjoin(
+            spending, spending.c.customer_id == TblCustomers.id
+        ).filter(TblCustomers.id.in_(customer_ids)).all()
+
+        statistics = {}
+        for row in rows:
+            total_bookings = int(row.total_bookings or 0)
+            total_spent = float(row.total_spent or 0)
+            statistics[row.id] = {
+                "total_bookings": total_bookings,
+                "cancelled_bookings": int(row.cancelled_bookings or 0),
+                "total_spent": total_spent,
+                "avg_booking_value": total_spent / max(total_bookings, 1),
+                "vouchers_count": int(row.vouchers_count or 0),
+                "active_vouchers": int(row.active_vouchers or 0),
+                "last_booking_at": row.last_booking_at,
+                "recent_booking": None
+            }
+
+        # Latest booking per customer: join back on (customer_id, max(created_at))
+        latest_bookings = db.query(TblBookingRequests).join(
+            bookings,
+            and_(
+                bookings.c.customer_id == TblBookingRequests.customer_id,
+                bookings.c.last_booking_at == TblBookingRequests.created_at
+            )
+        ).filter(
+            and_(
+                TblBookingRequests.tenant_id == tenant_id,
+                TblBookingRequests.deleted == 0
+            )
+        ).order_by(TblBookingRequests.id).all()
+
+        for booking in latest_bookings:
+            # Same created_at for several bookings: the highest ID wins
+            if booking.customer_id in statistics:
+                statistics[booking.customer_id]["recent_booking"] = booking
+
+        return statistics
+
 
 customer = CRUDCustomer(TblCustomers)
+customer_async = AsyncCRUDBase[TblCustomers, CustomerCreate, CustomerUpdate](TblCustomers)
@@ -0,0 +1,295 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.models import (
+    TblDailyTenantStats, TblBookingRequests, TblCustomers,
+    TblServiceBookings, TblRoomStays
+)
+
+BOOKING_STATUSES = ["pending", "confirmed", "cancelled", "completed", "no_show"]
+BOOKING_CHANNELS = ["zalo_chat", "external_link"]
+
+COUNTER_COLUMNS = (
+    ["bookings_total"]
+    + [f"bookings_{status}" for status in BOOKING_STATUSES]
+    + [f"bookings_{channel}" for channel in BOOKING_CHANNELS]
+    + ["new_customers", "service_bookings", "room_stay_revenue"]
+)
+
+# (tenant_id, stat_date, {counter column: value}) that one row adds to the rollup
+Snapshot = Tuple[int, date, Dict[str, Any]]
+
+
+def _to_date(value: Any) -> date:
+    """Normalize DateTime / Date / DATE() results (strings on SQLite) to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if value:
+        return date.fromisoformat(str(value)[:10])
+    return date.today()
+
+
+def _zero_counters() -> Dict[str, Any]:
+    return {column: 0 for column in COUNTER_COLUMNS}
+
+
+def _to_number(column: str, value: Any) -> Any:
+    if column == "room_stay_revenue":
+        return float(value or 0)
+    return int(value or 0)
+
+
+class CRUDDailyStats:
+    """
+    Per-tenant, per-day rollup of booking/customer metrics (tbl_daily_tenant_stats).
+
+    CRUDBase calls `snapshot()` before and after each write to a tracked model and
+    `track()` applies the difference in the same transaction, so reading a date
+    window costs one row per day instead of a scan of the source tables.
+    `rebuild()` recomputes the rollup from the source tables (backfill/repair).
+    """
+
+    def __init__(self):
+        self.contributors = {
+            TblBookingRequests: self._booking_counters,
+            TblCustomers: self._customer_counters,
+            TblServiceBookings: self._service_booking_counters,
+            TblRoomStays: self._room_stay_counters,
+        }
+
+    def is_tracked(self, model) -> bool:
+        return model in self.contributors
+
+    # === Contributions of a single row ===
+
+    def _booking_counters(self, obj: TblBookingRequests) -> Tuple[date, Dict[str, Any]]:
+        counters = {"bookings_total": 1}
+        if obj.status in BOOKING_STATUSES:
+            counters[f"bookings_{obj.status}"] = 1
+        if obj.request_channel in BOOKING_CHANNELS:
+            counters[f"bookings_{obj.request_channel}"] = 1
+        return _to_date(obj.created_at), counters
+
+    def _customer_counters(self, obj: TblCustomers) -> Tuple[date, Dict[str, Any]]:
+        return _to_date(obj.created_at), {"new_customers": 1}
+
+    def _service_booking_counters(self, obj: TblServiceBookings) -> Tuple[date, Dict[str, Any]]:
+        return _to_date(obj.created_at), {"service_bookings": 1}
+
+    def _room_stay_counters(self, obj: TblRoomStays) -> Tuple[date, Dict[str, Any]]:
+        # Revenue is attributed to the check-in day
+        return _to_date(obj.checkin_date), {"room_stay_revenue": Decimal(obj.total_amount or 0)}
+
+    def snapshot(self, obj: Any) -> Optional[Snapshot]:
+        """What a row currently adds to the rollup (None if not tracked or deleted)"""
+        if obj is None:
+            return None
+        contributor = self.contributors.get(type(obj))
+        if contributor is None or obj.deleted or obj.tenant_id is None:
+            return None
+        stat_date, counters = contributor(obj)
+        return obj.tenant_id, stat_date, counters
+
+    # === Incremental maintenance ===
+
+    def track(
+        self,
+        db: Session,
+        *,
+        before: Optional[Snapshot] = None,
+        after: Optional[Snapshot] = None
+    ) -> None:
+        """Apply `after - before` to the rollup inside the caller's transaction"""
+        if not before and not after:
+            return
+
+        deltas: Dict[Tuple[int, date], Dict[str, Any]] = {}
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if not snapshot:
+                continue
+            tenant_id, stat_date, counters = snapshot
+            bucket = deltas.setdefault((tenant_id, stat_date), {})
+            for column, value in counters.items():
+                bucket[column] = bucket.get(column, 0) + sign * value
+
+        # Flush the tracked row first so the savepoint below only covers the rollup row
+        db.flush()
+
+        for (tenant_id, stat_date), counters in deltas.items():
+            counters = {column: value for column, value in counters.items() if value}
+            if counters:
+                self._increment(db, tenant_id=tenant_id, stat_date=stat_date, counters=counters)
+
+    def _increment(self, db: Session, *, tenant_id: int, stat_date: date, counters: Dict[str, Any]) -> None:
+        """UPDATE ... SET col = col + delta, inserting the day row on first use"""
+        statement = update(TblDailyTenantStats).where(
+            and_(
+                TblDailyTenantStats.tenant_id == tenant_id,
+                TblDailyTenantStats.stat_date == stat_date
+            )
+        ).values({
+            column: getattr(TblDailyTenantStats, column) + value
+            for column, value in counters.items()
+        })
+
+        if db.execute(statement).rowcount:
+            return
+
+        try:
+            with db.begin_nested():
+                row_data = _zero_counters()
+                row_data.update(counters)
+                db.add(TblDailyTenantStats(tenant_id=tenant_id, stat_date=stat_date, **row_data))
+        except IntegrityError:
+            # Another transaction created the day row concurrently
+            db.execute(statement)
+
+    # === Reads ===
+
+    def _filters(self, tenant_id: Optional[int]) -> List[Any]:
+        filters = []
+        if tenant_id:
+            filters.append(TblDailyTenantStats.tenant_id == tenant_id)
+        return filters
+
+    def get_period_totals(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int] = None,
+        start_date: date,
+        end_date: Optional[date] = None,
+        previous_start: Optional[date] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Sum all counters for the current period [start_date, end_date] and the
+        previous period [previous_start, start_date) in one query.
+        Without `previous_start`, "previous" covers everything before start_date,
+        so current + previous gives all-time totals.
+        """
+        start_date = _to_date(start_date)
+        in_current = TblDailyTenantStats.stat_date >= start_date
+
+        columns = []
+        for column in COUNTER_COLUMNS:
+            counter = getattr(TblDailyTenantStats, column)
+            columns.append(func.coalesce(func.sum(case((in_current, counter), else_=0)), 0).label(f"current_{column}"))
+            columns.append(func.coalesce(func.sum(case((in_current, 0), else_=counter)), 0).label(f"previous_{column}"))
+
+        filters = self._filters(tenant_id)
+        if end_date:
+            filters.append(TblDailyTenantStats.stat_date <= _to_date(end_date))
+        if previous_start:
+            filters.append(TblDailyTenantStats.stat_date >= _to_date(previous_start))
+
+        row = db.query(*columns).filter(and_(*filters)).one()._mapping
+        return {
+            period: {column: _to_number(column, row[f"{period}_{column}"]) for column in COUNTER_COLUMNS}
+            for period in ("current", "previous")
+        }
+
+    def get_daily_totals(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int] = None,
+        days: int = 7,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """All counters per day for the last `days` days (oldest first, zero-filled)"""
+        last_day = _to_date(end_date) if end_date else date.today()
+        first_day = last_day - timedelta(days=days - 1)
+
+        rows = db.query(
+            TblDailyTenantStats.stat_date,
+            *[func.sum(getattr(TblDailyTenantStats, column)).label(column) for column in COUNTER_COLUMNS]
+        ).filter(
+            and_(
+                *self._filters(tenant_id),
+                TblDailyTenantStats.stat_date >= first_day,
+                TblDailyTenantStats.stat_date <= last_day
+            )
+        ).group_by(TblDailyTenantStats.stat_date).all()
+        rows_by_day = {_to_date(row.stat_date): row._mapping for row in rows}
+
+        daily_totals = []
+        for offset in range(days):
+            current_day = first_day + timedelta(days=offset)
+            row = rows_by_day.get(current_day, {})
+            day_totals = {column: _to_number(column, row.get(column)) for column in COUNTER_COLUMNS}
+            day_totals["date"] = current_day
+            daily_totals.append(day_totals)
+        return daily_totals
+
+    # === Backfill ===
+
+    def rebuild(self, db: Session, *, tenant_id: Optional[int] = None) -> int:
+        """
+        Recompute the rollup from the source tables (all tenants by default).
+        Returns the number of day rows written.
+        """
+        rows: Dict[Tuple[int, date], Dict[str, Any]] = {}
+
+        def add(tenant, day, column, value):
+            bucket = rows.setdefault((tenant, _to_date(day)), _zero_counters())
+            bucket[column] += value or 0
+
+        def scope(model):
+            filters = [model.deleted == 0]
+            if tenant_id:
+                filters.append(model.tenant_id == tenant_id)
+            return and_(*filters)
+
+        # Bookings by status and channel
+        booking_day = func.date(TblBookingRequests.created_at)
+        booking_columns = [func.count(TblBookingRequests.id).label("bookings_total")]
+        booking_columns += [
+            func.sum(case((TblBookingRequests.status == status, 1), else_=0)).label(f"bookings_{status}")
+            for status in BOOKING_STATUSES
+        ]
+        booking_columns += [
+            func.sum(case((TblBookingRequests.request_channel == channel, 1), else_=0)).label(f"bookings_{channel}")
+            for channel in BOOKING_CHANNELS
+        ]
+        for row in db.query(
+            TblBookingRequests.tenant_id, booking_day.label("day"), *booking_columns
+        ).filter(scope(TblBookingRequests)).group_by(TblBookingRequests.tenant_id, booking_day):
+            for column, value in row._mapping.items():
+                if column.startswith("bookings_"):
+                    add(row.tenant_id, row.day, column, value)
+
+        # New customers and service bookings per creation day
+        for model, column in ((TblCustomers, "new_customers"), (TblServiceBookings, "service_bookings")):
+            day = func.date(model.created_at)
+            for row in db.query(
+                model.tenant_id, day.label("day"), func.count(model.id).label("count")
+            ).filter(scope(model)).group_by(model.tenant_id, day):
+                add(row.tenant_id, row.day, column, row.count)
+
+        # Room stay revenue per check-in day
+        checkin_day = func.date(TblRoomStays.checkin_date)
+        for row in db.query(
+            TblRoomStays.tenant_id, checkin_day.label("day"), func.sum(TblRoomStays.total_amount).label("revenue")
+        ).filter(scope(TblRoomStays)).group_by(TblRoomStays.tenant_id, checkin_day):
+            add(row.tenant_id, row.day, "room_stay_revenue", row.revenue)
+
+        existing = db.query(TblDailyTenantStats)
+        if tenant_id:
+            existing = existing.filter(TblDailyTenantStats.tenant_id == tenant_id)
+        existing.delete(synchronize_session=False)
+
+        db.add_all([
+            TblDailyTenantStats(tenant_id=tenant, stat_date=day, **counters)
+            for (tenant, day), counters in rows.items()
+        ])
+        db.commit()
+        return len(rows)
+
+
+daily_stats = CRUDDailyStats()
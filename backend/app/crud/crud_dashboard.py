@@ -0,0 +1,144 @@
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select
+
+from app.crud.crud_daily_stats import BOOKING_STATUSES, daily_stats
+from app.models.models import (
+    TblRooms, TblFacilities, TblServices, TblPromotions, TblVouchers,
+    TblDailyTenantStats
+)
+
+
+class CRUDDashboard:
+    """
+    Aggregation queries for dashboard/report endpoints.
+    Every method returns several metrics from a single round-trip instead of
+    one COUNT query per metric. Booking and customer metrics are read from the
+    daily rollup (see crud_daily_stats), so their cost grows with the number
+    of days in the window rather than the number of rows.
+    `tenant_id=None` means all tenants (super admin view).
+    """
+
+    def _scope(self, model, tenant_id: Optional[int]) -> List[Any]:
+        """Base filters: not deleted and, if given, belonging to the tenant"""
+        filters = [model.deleted == 0]
+        if tenant_id:
+            filters.append(model.tenant_id == tenant_id)
+        return filters
+
+    def _count(self, model, tenant_id: Optional[int], *conditions):
+        """Scalar subquery counting live rows of a model"""
+        return select(func.count(model.id)).where(
+            and_(*self._scope(model, tenant_id), *conditions)
+        ).scalar_subquery()
+
+    def _rollup_sum(self, column: str, tenant_id: Optional[int], since: Optional[datetime] = None):
+        """Scalar subquery summing a daily rollup counter"""
+        filters = []
+        if tenant_id:
+            filters.append(TblDailyTenantStats.tenant_id == tenant_id)
+        if since:
+            filters.append(TblDailyTenantStats.stat_date >= since.date())
+        return select(
+            func.coalesce(func.sum(getattr(TblDailyTenantStats, column)), 0)
+        ).where(and_(*filters)).scalar_subquery()
+
+    def get_entity_counts(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """
+        Count rooms, facilities, services, customers, bookings, promotions and
+        vouchers in one query. When `since` is given, also count bookings and
+        customers created since then (`new_bookings`, `new_customers`, whole days).
+        """
+        counts = {
+            "rooms": self._count(TblRooms, tenant_id),
+            "facilities": self._count(TblFacilities, tenant_id),
+            "services": self._count(TblServices, tenant_id),
+            "customers": self._rollup_sum("new_customers", tenant_id),
+            "bookings": self._rollup_sum("bookings_total", tenant_id),
+            "promotions": self._count(TblPromotions, tenant_id),
+            "active_promotions": self._count(TblPromotions, tenant_id, TblPromotions.status == 'active'),
+            "vouchers": self._count(TblVouchers, tenant_id),
+            "active_vouchers": self._count(TblVouchers, tenant_id, TblVouchers.status == 'active'),
+        }
+        if since:
+            counts["new_bookings"] = self._rollup_sum("bookings_total", tenant_id, since)
+            counts["new_customers"] = self._rollup_sum("new_customers", tenant_id, since)
+
+        row = db.query(*[query.label(name) for name, query in counts.items()]).one()
+        return {name: int(value or 0) for name, value in row._mapping.items()}
+
+    def get_booking_status_counts(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """
+        Count bookings created in [start_date, end_date] (whole days), in total
+        and per status (see BOOKING_STATUSES), from the daily rollup
+        """
+        totals = daily_stats.get_period_totals(
+            db,
+            tenant_id=tenant_id,
+            start_date=start_date or date.min,
+            end_date=end_date
+        )["current"]
+        counts = {"total": totals["bookings_total"]}
+        for status in BOOKING_STATUSES:
+            counts[status] = totals[f"bookings_{status}"]
+        return counts
+
+    def get_period_comparison(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int] = None,
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        previous_start: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Rollup counters (bookings by status/channel, new customers, service
+        bookings, room stay revenue) for the current period [start_date, end_date]
+        and the previous period [previous_start, start_date), in one query.
+        Without `previous_start` the previous period is everything before start_date.
+        """
+        return daily_stats.get_period_totals(
+            db,
+            tenant_id=tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+            previous_start=previous_start
+        )
+
+    def get_daily_counts(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int] = None,
+        counter: str = "bookings_total",
+        days: int = 7,
+        end_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Histogram of a rollup counter per calendar day for the last `days` days
+        (oldest first, days without activity included with count 0)
+        """
+        return [
+            {"date": day["date"], "count": day[counter]}
+            for day in daily_stats.get_daily_totals(
+                db, tenant_id=tenant_id, days=days, end_date=end_date
+            )
+        ]
+
+
+crud_dashboard = CRUDDashboard()
@@ -0,0 +1,50 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from app.models.models import TblMediaBlobs
+
+
+class CRUDMediaBlobs:
+    """
+    Reference-counted index of content-addressed uploads (tbl_media_blobs).
+
+    Rows are read with SELECT ... FOR UPDATE and the methods only flush:
+    app/core/media_store.py places or removes the file while the row is
+    locked and commits afterwards.
+    """
+
+    def get_for_update(self, db: Session, tenant_id: int, sha256: str) -> Optional[TblMediaBlobs]:
+        return db.query(TblMediaBlobs).filter(
+            TblMediaBlobs.tenant_id == tenant_id,
+            TblMediaBlobs.sha256 == sha256
+        ).with_for_update().first()
+
+    def get_by_path_for_update(self, db: Session, path: str) -> Optional[TblMediaBlobs]:
+        return db.query(TblMediaBlobs).filter(TblMediaBlobs.path == path).with_for_update().first()
+
+    def create(self, db: Session, tenant_id: int, sha256: str, path: str, size: int) -> TblMediaBlobs:
+        """Raises IntegrityError when another transaction inserted the same content first"""
+        blob = TblMediaBlobs(tenant_id=tenant_id, sha256=sha256, path=path, size=size, ref_count=1)
+        db.add(blob)
+        db.flush()
+        return blob
+
+    def add_reference(self, db: Session, blob: TblMediaBlobs) -> int:
+        blob.ref_count = TblMediaBlobs.ref_count + 1
+        db.flush()
+        db.refresh(blob)
+        return blob.ref_count
+
+    def release(self, db: Session, blob: TblMediaBlobs) -> int:
+        """Drop one reference; the row is deleted with the last one. Returns the references left"""
+        blob.ref_count = TblMediaBlobs.ref_count - 1
+        db.flush()
+        db.refresh(blob)
+        remaining = blob.ref_count
+        if remaining <= 0:
+            db.delete(blob)
+            db.flush()
+        return max(remaining, 0)
+
+
+media_blob = CRUDMediaBlobs()
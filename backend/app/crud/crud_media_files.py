@@ -0,0 +1,84 @@
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+
+from app.models.models import TblMediaFiles
+from app.crud.pagination import next_cursor_for, order_for_keyset, paginate_keyset
+
+SORT_COLUMNS = [TblMediaFiles.created_at, TblMediaFiles.id]
+
+
+class CRUDMediaFiles:
+    """
+    Catalog of uploads (tbl_media_files), one row per upload. Rows are added
+    and removed by app/core/media_store.py in the transaction that updates
+    the blob reference counts; methods only flush.
+    """
+
+    def create(self, db: Session, **fields: Any) -> TblMediaFiles:
+        entry = TblMediaFiles(**fields)
+        db.add(entry)
+        db.flush()
+        return entry
+
+    def remove(self, db: Session, entry: TblMediaFiles) -> None:
+        db.delete(entry)
+        db.flush()
+
+    def get_by_path(self, db: Session, path: str, folder: Optional[str] = None) -> Optional[TblMediaFiles]:
+        """Newest upload of the file at path (in `folder` when given and uploaded there)"""
+        query = db.query(TblMediaFiles).filter(TblMediaFiles.path == path)
+        if folder:
+            in_folder = order_for_keyset(query.filter(TblMediaFiles.folder == folder), SORT_COLUMNS).first()
+            if in_folder is not None:
+                return in_folder
+        return order_for_keyset(query, SORT_COLUMNS).first()
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        folder: Optional[str] = None,
+        file_type: Optional[str] = None,
+        sha256: Optional[str] = None,
+        search: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+        include_total: bool = True
+    ) -> Tuple[List[TblMediaFiles], Optional[str], Optional[int]]:
+        """
+        One page of a tenant's uploads, newest first: (items, next_cursor, total).
+        `cursor` (next_cursor of the previous page) takes precedence over `skip`.
+        Raises InvalidCursorError for a malformed cursor.
+        """
+        query = db.query(TblMediaFiles).filter(TblMediaFiles.tenant_id == tenant_id)
+        if folder:
+            query = query.filter(TblMediaFiles.folder == folder)
+        if file_type:
+            query = query.filter(TblMediaFiles.file_type == file_type)
+        if sha256:
+            query = query.filter(TblMediaFiles.sha256 == sha256.lower())
+        if search:
+            query = query.filter(TblMediaFiles.original_filename.ilike(f"%{search}%"))
+        if created_from:
+            query = query.filter(TblMediaFiles.created_at >= created_from)
+        if created_to:
+            query = query.filter(TblMediaFiles.created_at <= created_to)
+
+        total = query.with_entities(func.count(TblMediaFiles.id)).scalar() if include_total else None
+
+        if cursor:
+            items, next_cursor = paginate_keyset(query, columns=SORT_COLUMNS, cursor=cursor, limit=limit)
+        else:
+            items = order_for_keyset(query, SORT_COLUMNS).offset(skip).limit(limit + 1).all()
+            next_cursor = next_cursor_for(items[:limit], SORT_COLUMNS) if len(items) > limit else None
+            items = items[:limit]
+        return items, next_cursor, total
+
+
+media_file = CRUDMediaFiles()
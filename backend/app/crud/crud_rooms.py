@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 
+from app.crud.async_base import AsyncCRUDBase
 from app.crud.base import CRUDBase
 from app.models.models import TblRooms
 from app.schemas.rooms import RoomCreate, RoomUpdate
@@ -69,3 +70,4 @@ class CRUDRoom(CRUDBase[TblRooms, RoomCreate, RoomUpdate]):
 
 
 room = CRUDRoom(TblRooms)
+room_async = AsyncCRUDBase[TblRooms, RoomCreate, RoomUpdate](TblRooms)
@@ -1,14 +1,28 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime
+from sqlalchemy import and_, case, func
+from datetime import datetime, timedelta
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.crud.base import CRUDBase
-from app.models.models import TblTenants
+from app.models.models import (
+    TblTenants, TblAdminUsers, TblRooms, TblFacilities, TblServices,
+    TblDailyTenantStats
+)
 from app.schemas.tenants import TenantCreate, TenantUpdate
 
+TENANT_STAT_KEYS = [
+    "admin_users", "rooms", "facilities", "services",
+    "customers", "total_bookings", "recent_bookings_30d"
+]
+
 
 class CRUDTenant(CRUDBase[TblTenants, TenantCreate, TenantUpdate]):
+    def __init__(self, model):
+        super().__init__(model)
+        self.stats_cache = TTLCache(ttl=settings.TENANT_STATS_CACHE_TTL, maxsize=10000)
+
     def get_by_name(
         self, 
         db: Session, 
@@ -117,5 +131,61 @@ class CRUDTenant(CRUDBase[TblTenants, TenantCreate, TenantUpdate]):
             return obj
         return None
 
+    def get_statistics(
+        self,
+        db: Session,
+        *,
+        tenant_ids: List[int],
+        use_cache: bool = True
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Statistics for many tenants at once, keyed by tenant ID.
+        One GROUP BY tenant_id query per table (bookings/customers from the daily
+        rollup), whatever the number of tenants. Results are cached for
+        TENANT_STATS_CACHE_TTL seconds unless `use_cache` is False.
+        """
+        tenant_ids = list(dict.fromkeys(tenant_id for tenant_id in tenant_ids if tenant_id is not None))
+        statistics = self.stats_cache.get_many(tenant_ids) if use_cache and self.stats_cache.ttl > 0 else {}
+        missing_ids = [tenant_id for tenant_id in tenant_ids if tenant_id not in statistics]
+        if not missing_ids:
+            return statistics
+
+        computed = {tenant_id: dict.fromkeys(TENANT_STAT_KEYS, 0) for tenant_id in missing_ids}
+
+        def count_by_tenant(model, key: str, *conditions) -> None:
+            rows = db.query(model.tenant_id, func.count(model.id)).filter(
+                and_(model.tenant_id.in_(missing_ids), *conditions)
+            ).group_by(model.tenant_id).all()
+            for tenant_id, count in rows:
+                computed[tenant_id][key] = int(count or 0)
+
+        count_by_tenant(TblAdminUsers, "admin_users")
+        count_by_tenant(TblRooms, "rooms", TblRooms.deleted == 0)
+        count_by_tenant(TblFacilities, "facilities", TblFacilities.deleted == 0)
+        count_by_tenant(TblServices, "services", TblServices.deleted == 0)
+
+        # Customers and bookings: all-time and last 30 days from the daily rollup
+        thirty_days_ago = (datetime.now() - timedelta(days=30)).date()
+        rows = db.query(
+            TblDailyTenantStats.tenant_id,
+            func.sum(TblDailyTenantStats.new_customers),
+            func.sum(TblDailyTenantStats.bookings_total),
+            func.sum(case(
+                (TblDailyTenantStats.stat_date >= thirty_days_ago, TblDailyTenantStats.bookings_total),
+                else_=0
+            ))
+        ).filter(
+            TblDailyTenantStats.tenant_id.in_(missing_ids)
+        ).group_by(TblDailyTenantStats.tenant_id).all()
+        for tenant_id, customers, total_bookings, recent_bookings in rows:
+            computed[tenant_id]["customers"] = int(customers or 0)
+            computed[tenant_id]["total_bookings"] = int(total_bookings or 0)
+            computed[tenant_id]["recent_bookings_30d"] = int(recent_bookings or 0)
+
+        if self.stats_cache.ttl > 0:
+            self.stats_cache.set_many(computed)
+        statistics.update(computed)
+        return statistics
+
 
 tenant = CRUDTenant(TblTenants)
@@ -0,0 +1,150 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Offset pagination makes the database walk and discard every skipped row, so
+deep pages get linearly slower. Keyset pagination instead remembers the sort
+key of the last row returned and continues with `WHERE key < last_key`, which
+an index on the sort columns answers directly at any depth.
+
+The cursor is an opaque URL-safe string encoding the sort key values of the
+last row of a page, e.g. `(created_at, id)` or `(id,)`.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, DateTime, String, and_, literal, or_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import Select
+from sqlalchemy.types import TypeDecorator
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort key values into an opaque cursor string"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """Decode a cursor back into sort key values typed like `columns`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match sort columns")
+
+        decoded = []
+        for column, value in zip(columns, values):
+            column_type = column.type
+            if value is not None and isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif value is not None and isinstance(column_type, Date):
+                value = date.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}")
+
+
+class CursorDateTime(TypeDecorator):
+    """
+    Cursor datetimes bound in the format the database stores them. SQLite
+    compares DATETIME as text: rows filled by CURRENT_TIMESTAMP (the models'
+    created_at default) hold 'YYYY-MM-DD HH:MM:SS', while DateTime binds
+    'YYYY-MM-DD HH:MM:SS.ffffff', so `created_at < cursor` would be true for
+    the cursor row itself and pages would repeat. Other databases compare
+    real datetimes and get the value unchanged.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(String())
+        return dialect.type_descriptor(DateTime())
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == "sqlite":
+            # Microseconds only when there are any, like both stored formats
+            return value.isoformat(sep=" ")
+        return value
+
+
+def keyset_condition(columns: Sequence[Any], values: Sequence[Any], descending: bool = True):
+    """
+    Rows strictly after `values` in (columns...) order, expanded as
+    c1 < v1 OR (c1 = v1 AND c2 < v2) ... (or > when ascending)
+    """
+    values = [
+        literal(value, CursorDateTime()) if value is not None and isinstance(column.type, DateTime) else value
+        for column, value in zip(columns, values)
+    ]
+    conditions = []
+    for index, (column, value) in enumerate(zip(columns, values)):
+        after = column < value if descending else column > value
+        equal_prefix = [columns[i] == values[i] for i in range(index)]
+        conditions.append(and_(*equal_prefix, after))
+    return or_(*conditions)
+
+
+def order_for_keyset(query: Query, columns: Sequence[Any], descending: bool = True) -> Query:
+    return query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+
+def _keyset_page_query(query, columns, cursor, limit, descending):
+    if cursor:
+        query = query.filter(keyset_condition(columns, decode_cursor(cursor, columns), descending))
+
+    # One extra row tells whether there is a next page without counting
+    return order_for_keyset(query, columns, descending).limit(limit + 1)
+
+
+def _split_page(items: List[Any], columns: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    has_more = len(items) > limit
+    items = items[:limit]
+    return items, next_cursor_for(items, columns) if has_more else None
+
+
+def paginate_keyset(
+    query: Query,
+    *,
+    columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of `query` ordered by `columns` (last column must be unique,
+    usually the primary key), starting after `cursor`.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    items = _keyset_page_query(query, columns, cursor, limit, descending).all()
+    return _split_page(items, columns, limit)
+
+
+async def paginate_keyset_async(
+    db,
+    statement: Select,
+    *,
+    columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """paginate_keyset for a select() of one entity executed on an AsyncSession"""
+    result = await db.execute(_keyset_page_query(statement, columns, cursor, limit, descending))
+    return _split_page(list(result.scalars().all()), columns, limit)
+
+
+def next_cursor_for(items: Sequence[Any], columns: Sequence[Any]) -> Optional[str]:
+    """Cursor pointing after the last item of a page (None for an empty page)"""
+    if not items:
+        return None
+    last = items[-1]
+    return encode_cursor([getattr(last, column.key) for column in columns])
@@ -0,0 +1,29 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.engine import create_async_db_engine
+
+# Async drivers cho cùng database: MySQL -> aiomysql, SQLite (tests) -> aiosqlite
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_uri(database_uri: str) -> str:
+    """Map a sync DATABASE_URI to the same database with an async driver"""
+    scheme, separator, rest = database_uri.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+async_engine = create_async_db_engine(get_async_database_uri(settings.DATABASE_URI))
+AsyncSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,198 @@
+"""
+Engine factory shared by the sync and async sessions.
+
+Pool sizing, recycling, pre-ping and timeouts come from Settings (DB_*), and
+every engine gets a PoolMonitor so /metrics can show how busy the pool is
+(checked out, overflow, time spent waiting for a connection, churn). Query
+count and time are added to the current RequestContext (per-request metrics).
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.core.request_context import get_request_context
+from app.db.query_tracking import notify_observers
+
+# name -> PoolMonitor, one per engine created by this module
+pool_monitors: Dict[str, "PoolMonitor"] = {}
+
+
+class PoolMonitor:
+    """Connection pool counters fed by pool events and the pool classes below"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.connections_invalidated = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkout_timeouts = 0
+        self.wait_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to the pool events of a (sync) engine"""
+        self.engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self._increment("connections_created")
+
+    def _on_close(self, dbapi_connection, connection_record):
+        self._increment("connections_closed")
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self._increment("connections_invalidated")
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self._increment("checkouts")
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self._increment("checkins")
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        # engine.pool changes when the engine is disposed, so look it up each time
+        pool = self.engine.pool if self.engine else None
+        stats = {
+            "pool_class": type(pool).__name__ if pool else None,
+            "connections_created": self.connections_created,
+            "connections_closed": self.connections_closed,
+            "connections_invalidated": self.connections_invalidated,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "checkout_timeouts": self.checkout_timeouts,
+            "wait_time_avg_ms": round(self.wait_time_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+            "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    request_context = get_request_context()
+    if request_context is not None:
+        request_context.record_query(statement, duration)
+    notify_observers(statement, duration)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for failed statements
+    start_times = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+    if start_times:
+        start_times.pop()
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Count statements and their execution time per request (see app/core/request_context.py)
+    and for count_queries() (app/db/query_tracking.py)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class _TimedCheckoutMixin:
+    """Measures how long a checkout waits for a free connection"""
+
+    def _do_get(self):
+        monitor = pool_monitors.get(self.logging_name)
+        start_time = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if monitor:
+                monitor.record_wait(time.perf_counter() - start_time, timed_out)
+
+
+class MonitoredQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class MonitoredAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(database_uri: str, name: str, pool_class, echo: Optional[bool]) -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO if echo is None else echo,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_logging_name": name,
+    }
+    if database_uri.startswith("sqlite"):
+        # SQLite (dev/tests) keeps SQLAlchemy's default pool
+        return options
+
+    options.update({
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "connect_args": {"connect_timeout": settings.DB_CONNECT_TIMEOUT},
+    })
+    return options
+
+
+def create_db_engine(database_uri: Optional[str] = None, *, name: str = "sync", echo: Optional[bool] = None) -> Engine:
+    """Create the sync engine with Settings-driven pool options and a PoolMonitor"""
+    database_uri = database_uri or settings.DATABASE_URI
+    monitor = pool_monitors[name] = PoolMonitor(name)
+    engine = create_engine(database_uri, **_engine_options(database_uri, name, MonitoredQueuePool, echo))
+    monitor.attach(engine)
+    instrument_queries(engine)
+    return engine
+
+
+def create_async_db_engine(database_uri: str, *, name: str = "async", echo: Optional[bool] = None) -> AsyncEngine:
+    """Async counterpart of create_db_engine (database_uri must use an async driver)"""
+    monitor = pool_monitors[name] = PoolMonitor(name)
+    engine = create_async_engine(database_uri, **_engine_options(database_uri, name, MonitoredAsyncAdaptedQueuePool, echo))
+    monitor.attach(engine.sync_engine)
+    instrument_queries(engine.sync_engine)
+    return engine
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistics of every engine's pool, keyed by engine name"""
+    return {name: monitor.get_stats() for name, monitor in pool_monitors.items()}
@@ -0,0 +1,77 @@
+"""
+Statement counting outside of the per-request RequestContext.
+
+engine.py reports every executed statement to the RequestContext of the
+current request and to the observers registered here. Observers see the
+statements of every thread and task, so count_queries() also works around a
+TestClient call, whose request runs in another thread.
+
+Endpoint tests use assert_max_queries through the max_queries fixture of
+tests/conftest.py to pin their query budget.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+QueryObserver = Callable[[str, float], None]
+
+_observers: List[QueryObserver] = []
+_observers_lock = threading.Lock()
+
+
+def notify_observers(statement: str, duration: float) -> None:
+    # Copy-on-write list, so the common case (no observer) is a single check
+    for observer in _observers:
+        observer(statement, duration)
+
+
+def add_observer(observer: QueryObserver) -> None:
+    global _observers
+    with _observers_lock:
+        _observers = _observers + [observer]
+
+
+def remove_observer(observer: QueryObserver) -> None:
+    global _observers
+    with _observers_lock:
+        _observers = [item for item in _observers if item is not observer]
+
+
+class QueryCount:
+    """Statements seen while count_queries() was active"""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.time += duration
+            self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def report(self) -> str:
+        lines = [f"{self.count} queries ({self.time * 1000:.1f}ms):"]
+        for statement, count in sorted(self.statements.items(), key=lambda item: -item[1]):
+            lines.append(f"  {count}x {' '.join(statement.split())[:200]}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCount]:
+    counter = QueryCount()
+    add_observer(counter)
+    try:
+        yield counter
+    finally:
+        remove_observer(counter)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryCount]:
+    """Fail (AssertionError, with the statements) if the block runs more than max_queries statements"""
+    with count_queries() as counter:
+        yield counter
+    assert counter.count <= max_queries, f"Expected at most {max_queries} queries, got {counter.report()}"
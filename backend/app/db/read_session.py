@@ -0,0 +1,131 @@
+"""
+Read-replica routing for read-only endpoints.
+
+Endpoints that only read (dashboards, statistics, listings) depend on
+get_read_db / get_async_read_db instead of get_db / get_async_db. When
+Settings.DATABASE_REPLICA_URI is set those sessions go to the replica,
+otherwise they are plain primary sessions.
+
+- Fallback: if the replica cannot hand out a connection, the request is served
+  from the primary and the replica is skipped for DB_REPLICA_RETRY_SECONDS.
+- Read-your-writes: a client that just wrote something and must see it can
+  send `X-Read-Your-Writes: 1` to force the primary for that request, since
+  the replica may lag behind.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.async_session import AsyncSessionLocal, get_async_database_uri
+from app.db.engine import create_async_db_engine, create_db_engine
+from app.db.session_local import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+
+class ReplicaHealth:
+    """Remembers a replica failure so requests don't wait on a dead replica"""
+
+    def __init__(self, retry_seconds: float):
+        self.retry_seconds = retry_seconds
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.fallbacks = 0
+
+    def available(self) -> bool:
+        with self._lock:
+            return self._failed_at is None or time.monotonic() - self._failed_at >= self.retry_seconds
+
+    def mark_failed(self, error: Exception) -> None:
+        with self._lock:
+            self._failed_at = time.monotonic()
+            self.fallbacks += 1
+        logger.warning(f"Read replica unavailable, falling back to primary: {error}")
+
+    def mark_ok(self) -> None:
+        with self._lock:
+            self._failed_at = None
+
+
+replica_health = ReplicaHealth(settings.DB_REPLICA_RETRY_SECONDS)
+
+if settings.DATABASE_REPLICA_URI:
+    replica_engine = create_db_engine(settings.DATABASE_REPLICA_URI, name="sync_replica")
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    async_replica_engine = create_async_db_engine(
+        get_async_database_uri(settings.DATABASE_REPLICA_URI), name="async_replica"
+    )
+    AsyncReplicaSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=async_replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+else:
+    replica_engine = async_replica_engine = None
+    ReplicaSessionLocal = AsyncReplicaSessionLocal = None
+
+
+def wants_primary(request: Request) -> bool:
+    """Per-request read-your-writes override"""
+    return request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in ("1", "true", "yes")
+
+
+def use_replica(request: Request) -> bool:
+    return ReplicaSessionLocal is not None and not wants_primary(request) and replica_health.available()
+
+
+def get_read_db(request: Request):
+    db = None
+    if use_replica(request):
+        db = ReplicaSessionLocal()
+        try:
+            # Check out the connection now so a dead replica falls back before the endpoint runs
+            db.connection()
+            replica_health.mark_ok()
+        except DBAPIError as e:
+            db.close()
+            db = None
+            replica_health.mark_failed(e)
+
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def open_async_read_session(prefer_replica: bool = True) -> AsyncSession:
+    """
+    Async read session outside of a request (background work): the replica
+    when configured and healthy, else the primary. The caller closes it.
+    """
+    if prefer_replica and AsyncReplicaSessionLocal is not None and replica_health.available():
+        db = AsyncReplicaSessionLocal()
+        try:
+            await db.connection()
+            replica_health.mark_ok()
+            return db
+        except DBAPIError as e:
+            await db.close()
+            replica_health.mark_failed(e)
+    return AsyncSessionLocal()
+
+
+async def get_async_read_db(request: Request):
+    db = await open_async_read_session(prefer_replica=not wants_primary(request))
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -1,15 +1,7 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
-from app.core.config import settings
+from app.db.session_local import engine
 
-# Sử dụng cấu hình từ settings
-engine = create_engine(
-    settings.DATABASE_URI, 
-    echo=True,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    connect_args={"connect_timeout": 60}
-)
+# Dùng chung engine với app/db/session_local.py (cấu hình pool qua Settings.DB_*)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=Session)
 
 def get_db():
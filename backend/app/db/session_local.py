@@ -1,8 +1,8 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
+from app.db.engine import create_db_engine
 
-engine = create_engine(settings.DATABASE_URI)
+# Engine dùng chung cho toàn bộ app (pool cấu hình qua Settings.DB_*)
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -1,6 +1,5 @@
 from fastapi import FastAPI, Form, HTTPException, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import os
@@ -17,30 +16,27 @@ from app.api.api_v1.endpoints import (
 
 # Import database and models
 from app.db.session_local import engine
+from app.db.engine import get_pool_stats
+from app.core.log_pipeline import log_pipeline
+from app.core.password_hashing import PasswordHasherBusy, password_hasher
+from app.core.response_cache import dashboard_cache
+from app.core.resumable_uploads import resumable_uploads
+from app.core.image_variants import MediaStaticFiles, image_variants
 from app.core.config import settings
 from app.models.models import Base
 
 # Import middleware
-from app.middleware.logging_safe import RequestLoggingMiddlewareSafe
-from app.middleware.security_safe import SecurityHeadersMiddlewareSafe
-from app.middleware.performance_safe import PerformanceMonitoringMiddlewareSafe
+from app.middleware.observability import ObservabilityMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.threat_scan import ThreatScanMiddleware
 
 # Import monitoring and error handling
 from app.core.monitoring import health_checker, metrics_collector
 from app.core.error_handling import error_handler, system_monitor
+from app.core.prometheus import CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE, metrics_store, render_prometheus
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging: logs/app.log + console, written by the log pipeline thread
+log_pipeline.configure_root("app.log", level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +49,13 @@ app = FastAPI(
     openapi_url="/api/openapi.json"
 )
 
+# Optional request threat scanning and rate limiting (rate limiting runs first).
+# Added before CORS so 400/429 responses still carry CORS headers
+if settings.SECURITY_SCAN_ENABLED:
+    app.add_middleware(ThreatScanMiddleware, block=settings.SECURITY_SCAN_BLOCK)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware - ADD FIRST to avoid issues with preflight requests
 app.add_middleware(
     CORSMiddleware,
@@ -63,11 +66,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Add custom middleware (order matters - last added is executed first)
-# Safe middleware that won't cause hanging
-app.add_middleware(RequestLoggingMiddlewareSafe)
-app.add_middleware(SecurityHeadersMiddlewareSafe)  
-app.add_middleware(PerformanceMonitoringMiddlewareSafe)
+# Request id, security headers, timing, request/performance logs and metrics
+# in one pure ASGI middleware (replaces the three BaseHTTPMiddleware classes)
+app.add_middleware(ObservabilityMiddleware)
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -104,8 +105,26 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
+# Password checks/hashing outside login (change password, profile, admin users)
+# hit the same bounded bcrypt executor; a saturated one is a 503, as on login
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password operations in progress, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
 @app.on_event("startup")
 async def on_startup():
+    log_pipeline.start()
+    # Per-worker metrics snapshots for /metrics/prometheus
+    metrics_store.remove_stale()
+    metrics_store.start()
+    # Background health probes (/health* return the cached snapshot)
+    health_checker.start_sampler()
+    # Removes expired resumable upload sessions
+    resumable_uploads.start_sweeper()
     try:
         # Create database tables
         logger.info("Creating database tables...")
@@ -134,7 +153,12 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error getting final metrics: {e}")
     
+    metrics_store.stop()
+    health_checker.stop_sampler()
+    resumable_uploads.stop_sweeper()
+    image_variants.shutdown()
     logger.info("Backend shutdown completed")
+    log_pipeline.stop()
 
 @app.get("/")
 def read_root():
@@ -164,15 +188,42 @@ async def detailed_health_check():
     """Detailed health check with all components"""
     return await health_checker.detailed_health_check()
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is serving requests (no dependency checks)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe for the load balancer, from the cached health sample"""
+    readiness = health_checker.check_readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 @app.get("/metrics")
 async def get_metrics():
     """Get application metrics"""
-    return metrics_collector.get_metrics_summary()
+    return {
+        **metrics_collector.get_metrics_summary(),
+        "tenants": metrics_collector.get_tenant_summary(),
+        "database_pool": get_pool_stats(),
+        "password_hasher": password_hasher.stats(),
+        "image_variants": image_variants.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "logging": log_pipeline.stats()
+    }
+
+@app.get("/metrics/prometheus")
+def get_prometheus_metrics():
+    """Request metrics of all worker processes in Prometheus text format"""
+    return PlainTextResponse(render_prometheus(metrics_store.collect()), media_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.get("/system/status")
 async def get_system_status():
     """Get comprehensive system status"""
-    return system_monitor.get_system_status()
+    return {
+        **system_monitor.get_system_status(),
+        "health": await health_checker.detailed_health_check()
+    }
 
 # Include routers for the imported modules
 app.include_router(debug.router, prefix="/api/v1/debug", tags=["Debug - Simple Tests"])
@@ -203,8 +254,8 @@ app.include_router(room_stays.router, prefix="/api/v1", tags=["Room Stays"])
 app.include_router(service_bookings.router, prefix="/api/v1", tags=["Service Bookings"])
 app.include_router(test_items.router, prefix="/api/v1/test-items", tags=["Test Items - Zalo"])
 
-# Mount static files for serving uploaded images
+# Mount static files for serving uploaded images (?w=<width> serves a resized WebP variant)
 uploads_dir = "uploads"
 if not os.path.exists(uploads_dir):
     os.makedirs(uploads_dir)
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+app.mount("/uploads", MediaStaticFiles(directory=uploads_dir, generator=image_variants), name="uploads")
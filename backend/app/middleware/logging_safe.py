@@ -1,26 +1,14 @@
-import logging
 import time
 import uuid
 from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
-import os
 
-# Configure request logger
-request_logger = logging.getLogger("request_logger")
-request_logger.setLevel(logging.INFO)
+from app.core.log_pipeline import log_pipeline
 
-# Create file handler if not exists
-if not request_logger.handlers:
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    handler = logging.FileHandler(os.path.join(log_dir, "requests.log"))
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    handler.setFormatter(formatter)
-    request_logger.addHandler(handler)
+# Configure request logger (queued JSON lines, see app/core/log_pipeline.py)
+request_logger = log_pipeline.get_logger("request_logger", "requests.log")
 
 class RequestLoggingMiddlewareSafe(BaseHTTPMiddleware):
     """
@@ -0,0 +1,188 @@
+import random
+import time
+import uuid
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.monitoring import metrics_collector
+from app.core.request_context import begin_request, end_request, get_request_context
+from app.middleware.logging_safe import request_logger
+from app.middleware.performance_safe import performance_logger
+
+SECURITY_HEADERS = [
+    (b"x-frame-options", b"DENY"),
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+
+
+def get_route_template(scope: Scope) -> str:
+    """Route path template (e.g. /api/v1/rooms/{room_id}) so metrics don't grow per URL"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def get_tenant_id(scope: Scope, default: Optional[int] = None) -> Optional[int]:
+    """Tenant the request is about: tenant_id path/query parameter, else default (the user's tenant)"""
+    value = scope.get("path_params", {}).get("tenant_id")
+    query_string = scope.get("query_string", b"")
+    if value is None and b"tenant_id=" in query_string:
+        value = dict(parse_qsl(query_string.decode("latin-1"))).get("tenant_id")
+    try:
+        return int(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def get_url(scope: Scope) -> str:
+    headers = dict(scope.get("headers", []))
+    host = headers.get(b"host", b"").decode("latin-1") or "localhost"
+    query_string = scope.get("query_string", b"").decode("latin-1")
+    url = f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}{scope['path']}"
+    return f"{url}?{query_string}" if query_string else url
+
+
+class ObservabilityMiddleware:
+    """
+    Pure ASGI replacement for the RequestLoggingMiddlewareSafe,
+    SecurityHeadersMiddlewareSafe and PerformanceMonitoringMiddlewareSafe stack.
+
+    In one pass it assigns the request id (request.state.request_id and the
+    x-request-id header), adds the security headers, times the request, writes
+    the request/performance log lines and feeds metrics_collector (with the
+    tenant and DB query count/time gathered in the RequestContext). DB count
+    and time are also sent as a Server-Timing header, and with
+    SQL_N_PLUS_ONE_DETECTION statements repeated within a request are logged. Unlike
+    BaseHTTPMiddleware it doesn't run the app in a separate task or re-stream
+    the body, so streaming responses pass through untouched. Log lines are
+    structured (extra={"fields": ...}) and written by the log pipeline thread.
+    """
+
+    def __init__(self, app: ASGIApp, slow_threshold: float = 2.0, success_sample_rate: Optional[float] = None,
+                 server_timing: Optional[bool] = None, n_plus_one_threshold: Optional[int] = None):
+        self.app = app
+        self.slow_threshold = slow_threshold  # seconds
+        # Share of requests whose start/success/performance lines are written;
+        # errors (exceptions, status >= 400) and slow requests are always logged
+        self.success_sample_rate = settings.LOG_SUCCESS_SAMPLE_RATE if success_sample_rate is None else success_sample_rate
+        self.server_timing = settings.SERVER_TIMING_ENABLED if server_timing is None else server_timing
+        # Statements repeated this many times in one request are logged as N+1 (0 = off)
+        if n_plus_one_threshold is None:
+            n_plus_one_threshold = settings.SQL_N_PLUS_ONE_THRESHOLD if settings.SQL_N_PLUS_ONE_DETECTION else 0
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        context_token = begin_request(request_id, track_statements=self.n_plus_one_threshold > 0)
+        request_context = get_request_context()
+        start_time = time.time()
+        start_counter = time.perf_counter()
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        method = scope["method"]
+        url = get_url(scope)
+        user_agent = dict(scope.get("headers", [])).get(b"user-agent", b"unknown").decode("latin-1")
+
+        sampled = self.success_sample_rate >= 1 or random.random() < self.success_sample_rate
+        if sampled:
+            request_logger.info("REQUEST_START", extra={"fields": {
+                "request_id": request_id,
+                "timestamp": start_time,
+                "method": method,
+                "url": url,
+                "client_ip": client_ip,
+                "user_agent": user_agent,
+                "event": "request_start"
+            }})
+
+        status_code = 500
+        success = True
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", [])) + SECURITY_HEADERS + [
+                    (b"x-request-id", request_id.encode())
+                ]
+                if self.server_timing:
+                    headers.append((b"server-timing", self._server_timing(request_context, start_counter)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            success = False
+            request_logger.error("REQUEST_ERROR", extra={"fields": {"request_id": request_id, "error": str(e)}})
+            raise
+        finally:
+            processing_time = time.perf_counter() - start_counter
+            end_request(context_token)
+            metrics_collector.record_request(
+                get_route_template(scope), method, status_code, processing_time,
+                tenant_id=get_tenant_id(scope, request_context.tenant_id),
+                db_queries=request_context.db_queries,
+                db_time=request_context.db_time
+            )
+            slow = processing_time > self.slow_threshold
+            if sampled or slow or not success or status_code >= 400:
+                self._log_completion(request_id, method, url, client_ip, status_code, processing_time, success, slow,
+                                     request_context)
+            if self.n_plus_one_threshold:
+                self._log_repeated_statements(request_context, method, get_route_template(scope))
+
+    @staticmethod
+    def _server_timing(request_context, start_counter: float) -> bytes:
+        """db = time in SQL statements so far, app = time until the response started"""
+        db_time = request_context.db_time * 1000
+        app_time = (time.perf_counter() - start_counter) * 1000
+        return f'db;dur={db_time:.1f};desc="{request_context.db_queries} queries", app;dur={app_time:.1f}'.encode()
+
+    def _log_repeated_statements(self, request_context, method: str, route: str) -> None:
+        for statement, count in request_context.repeated_statements(self.n_plus_one_threshold).items():
+            performance_logger.warning("N_PLUS_ONE", extra={"fields": {
+                "request_id": request_context.request_id,
+                "method": method,
+                "route": route,
+                "executions": count,
+                "statement": " ".join(statement.split())
+            }})
+
+    def _log_completion(self, request_id, method, url, client_ip, status_code, processing_time, success, slow,
+                        request_context):
+        timestamp = time.time()
+        request_logger.info(f"REQUEST_{'SUCCESS' if success else 'ERROR'}", extra={"fields": {
+            "request_id": request_id,
+            "timestamp": timestamp,
+            "status_code": status_code,
+            "processing_time": processing_time,
+            "db_queries": request_context.db_queries,
+            "db_time": request_context.db_time,
+            "event": "request_success" if success else "request_error"
+        }})
+
+        performance_data = {
+            "timestamp": timestamp,
+            "request_id": request_id,
+            "method": method,
+            "url": url,
+            "processing_time": processing_time,
+            "status_code": status_code,
+            "db_queries": request_context.db_queries,
+            "db_time": request_context.db_time,
+            "client_ip": client_ip
+        }
+        performance_logger.info("PERFORMANCE", extra={"fields": performance_data})
+        if slow:
+            performance_logger.warning("SLOW_REQUEST", extra={"fields": performance_data})
@@ -1,22 +1,13 @@
 import time
-import logging
 from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
-import os
 
-# Configure performance logger
-performance_logger = logging.getLogger("performance")
-performance_logger.setLevel(logging.INFO)
+from app.core.log_pipeline import log_pipeline
 
-if not performance_logger.handlers:
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    handler = logging.FileHandler(os.path.join(log_dir, "performance.log"))
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    performance_logger.addHandler(handler)
+# Configure performance logger (queued JSON lines, see app/core/log_pipeline.py)
+performance_logger = log_pipeline.get_logger("performance", "performance.log")
 
 class PerformanceMonitoringMiddlewareSafe(BaseHTTPMiddleware):
     """
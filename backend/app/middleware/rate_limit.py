@@ -0,0 +1,86 @@
+import json
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security_utils import RateLimiter, rate_limiter
+
+# Never limited: health checks, metrics, docs and static files
+EXEMPT_PREFIXES = ("/health", "/metrics", "/system/", "/api/docs", "/api/redoc", "/api/openapi.json", "/uploads/")
+
+
+def get_endpoint_type(path: str, query_string: bytes = b"") -> Optional[str]:
+    """RateLimiter.limits category of a route (None = not limited)"""
+    if path == "/" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith(f"{settings.API_V1_STR}/auth/"):
+        return "auth"
+    if "/upload" in path:
+        return "upload"
+    if "/search" in path or b"search=" in query_string:
+        return "search"
+    return "default"
+
+
+def get_client_id(scope: Scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI rate limiting middleware: applies the RateLimiter category of each
+    route (auth/upload/search/default) per client IP, answers 429 with
+    Retry-After when the bucket is empty and adds X-RateLimit-* headers otherwise.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint_type = get_endpoint_type(scope["path"], scope.get("query_string", b""))
+        if endpoint_type is None:
+            await self.app(scope, receive, send)
+            return
+
+        # The SQLite store blocks on a file lock shared with the other workers: keep it off the event loop
+        result = await run_in_threadpool(self.limiter.is_allowed, get_client_id(scope), endpoint_type)
+        headers = [
+            (b"x-ratelimit-limit", str(result["limit"]).encode()),
+            (b"x-ratelimit-remaining", str(result["remaining"]).encode()),
+        ]
+
+        if not result["allowed"]:
+            body = json.dumps({
+                "detail": "Too many requests",
+                "retry_after": result["retry_after"]
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(result["retry_after"]).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,83 @@
+import json
+import logging
+from urllib.parse import parse_qsl, unquote_to_bytes
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.security_utils import SecurityValidator, security_validator
+
+logger = logging.getLogger(__name__)
+
+BODY_METHODS = ("POST", "PUT", "PATCH")
+
+
+class ThreatScanMiddleware:
+    """
+    Pure ASGI middleware running SecurityValidator on every request: user agent,
+    query parameters and the body (scanned as it streams in, up to
+    SecurityValidator.max_scan_bytes; multipart uploads are not scanned).
+    Suspicious requests are logged; with block=True those whose action is
+    "block" get a 400 before reaching the app.
+    """
+
+    def __init__(self, app: ASGIApp, validator: SecurityValidator = security_validator, block: bool = False):
+        self.app = app
+        self.validator = validator
+        self.block = block
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name: value for name, value in scope.get("headers", [])}
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        params = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+
+        # Read (and keep) body messages only until the scan limit, the rest streams through untouched
+        buffered = []
+        body_matches = []
+        if scope["method"] in BODY_METHODS and not content_type.startswith("multipart/"):
+            scanner = self.validator.stream_scanner()
+            form_encoded = content_type.startswith("application/x-www-form-urlencoded")
+            more_body = True
+            while more_body and not scanner.truncated:
+                message = await receive()
+                buffered.append(message)
+                if message["type"] != "http.request":
+                    break
+                chunk = message.get("body", b"")
+                scanner.feed(unquote_to_bytes(chunk.replace(b"+", b" ")) if form_encoded else chunk)
+                more_body = message.get("more_body", False)
+            body_matches = scanner.matches
+
+        result = self.validator.validate_request({
+            "user_agent": headers.get(b"user-agent", b"").decode("latin-1"),
+            "params": params,
+            "body_matches": body_matches
+        })
+
+        if not result["is_safe"]:
+            logger.warning(
+                f"Suspicious request {scope['method']} {scope['path']}: "
+                f"risk={result['risk_score']} violations={result['violations']}"
+            )
+            if self.block and result["action"] == "block":
+                body = json.dumps({"detail": "Request blocked by security policy"}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 400,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        async def replay_receive() -> Message:
+            if buffered:
+                return buffered.pop(0)
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
@@ -3,7 +3,7 @@ SQLAlchemy Models for Zalo Mini App Hotel Booking System
 Generated from MySQL schema with multi-tenant architecture
 """
 
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, DateTime, Date, ForeignKey, Index, JSON
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DECIMAL, Boolean, DateTime, Date, ForeignKey, Index, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -12,6 +12,10 @@ from datetime import datetime
 
 Base = declarative_base()
 
+# Composite indexes (__table_args__ below) follow the query shape used across
+# the app: tenant_id + deleted first, then the column filtered or sorted on.
+# Existing databases: scripts/add_composite_indexes.py
+
 # Test table for Zalo app - no tenant_id required
 class TblTestItems(Base):
     __tablename__ = 'tbl_test_items'
@@ -43,6 +47,9 @@ class TblTenants(Base):
 
 class TblRooms(Base):
     __tablename__ = 'tbl_rooms'
+    __table_args__ = (
+        Index('ix_rooms_tenant_deleted_type', 'tenant_id', 'deleted', 'room_type'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -92,6 +99,9 @@ class TblRoomFeatures(Base):
 
 class TblFacilities(Base):
     __tablename__ = 'tbl_facilities'
+    __table_args__ = (
+        Index('ix_facilities_tenant_deleted', 'tenant_id', 'deleted'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -165,6 +175,9 @@ class TblHotelBrands(Base):
 
 class TblCustomers(Base):
     __tablename__ = 'tbl_customers'
+    __table_args__ = (
+        Index('ix_customers_tenant_deleted_created', 'tenant_id', 'deleted', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -182,6 +195,12 @@ class TblCustomers(Base):
 
 class TblBookingRequests(Base):
     __tablename__ = 'tbl_booking_requests'
+    __table_args__ = (
+        Index('ix_booking_requests_tenant_deleted_created', 'tenant_id', 'deleted', 'created_at', 'id'),
+        Index('ix_booking_requests_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+        Index('ix_booking_requests_tenant_deleted_checkin', 'tenant_id', 'deleted', 'check_in_date'),
+        Index('ix_booking_requests_customer_tenant_deleted', 'customer_id', 'tenant_id', 'deleted'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -205,6 +224,9 @@ class TblBookingRequests(Base):
 
 class TblServices(Base):
     __tablename__ = 'tbl_services'
+    __table_args__ = (
+        Index('ix_services_tenant_deleted', 'tenant_id', 'deleted'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -226,6 +248,9 @@ class TblServices(Base):
 
 class TblServiceBookings(Base):
     __tablename__ = 'tbl_service_bookings'
+    __table_args__ = (
+        Index('ix_service_bookings_tenant_deleted_created', 'tenant_id', 'deleted', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -245,6 +270,9 @@ class TblServiceBookings(Base):
 
 class TblVouchers(Base):
     __tablename__ = 'tbl_vouchers'
+    __table_args__ = (
+        Index('ix_vouchers_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -267,6 +295,9 @@ class TblVouchers(Base):
 
 class TblCustomerVouchers(Base):
     __tablename__ = 'tbl_customer_vouchers'
+    __table_args__ = (
+        Index('ix_customer_vouchers_customer_deleted', 'customer_id', 'deleted'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -287,6 +318,9 @@ class TblCustomerVouchers(Base):
     
 class TblPromotions(Base):
     __tablename__ = 'tbl_promotions'
+    __table_args__ = (
+        Index('ix_promotions_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -322,6 +356,10 @@ class TblGames(Base):
 
 class TblRoomStays(Base):
     __tablename__ = 'tbl_room_stays'
+    __table_args__ = (
+        Index('ix_room_stays_tenant_deleted_checkin', 'tenant_id', 'deleted', 'checkin_date'),
+        Index('ix_room_stays_customer_tenant_deleted', 'customer_id', 'tenant_id', 'deleted'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -361,3 +399,69 @@ class TblAdminUsers(Base):
     deleted = Column(Integer, default=0)
     deleted_at = Column(DateTime, default=None)
     deleted_by = Column(String(50), default=None)
+
+# Daily per-tenant counters maintained incrementally by CRUDBase writes
+# (see app/crud/crud_daily_stats.py) so dashboards don't rescan source tables
+class TblDailyTenantStats(Base):
+    __tablename__ = 'tbl_daily_tenant_stats'
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'stat_date', name='uq_daily_tenant_stats_tenant_date'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, nullable=False)
+    stat_date = Column(Date, nullable=False)
+    bookings_total = Column(Integer, nullable=False, default=0)
+    bookings_pending = Column(Integer, nullable=False, default=0)
+    bookings_confirmed = Column(Integer, nullable=False, default=0)
+    bookings_cancelled = Column(Integer, nullable=False, default=0)
+    bookings_completed = Column(Integer, nullable=False, default=0)
+    bookings_no_show = Column(Integer, nullable=False, default=0)
+    bookings_zalo_chat = Column(Integer, nullable=False, default=0)
+    bookings_external_link = Column(Integer, nullable=False, default=0)
+    new_customers = Column(Integer, nullable=False, default=0)
+    service_bookings = Column(Integer, nullable=False, default=0)
+    room_stay_revenue = Column(DECIMAL(14, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+# Content-addressed uploads (app/core/media_store.py): one file per tenant and
+# SHA-256 under uploads/<tenant folder>/media/, shared by every upload of the
+# same content; ref_count = uploads not deleted yet, the file goes at 0
+class TblMediaBlobs(Base):
+    __tablename__ = 'tbl_media_blobs'
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'sha256', name='uq_media_blobs_tenant_sha256'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, nullable=False, default=0)  # 0 = global (super_admin uploads)
+    sha256 = Column(String(64), nullable=False)
+    path = Column(String(255), unique=True, nullable=False)  # relative to the app dir, e.g. uploads/tenant_1/media/ab/<sha256>.jpg
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, nullable=False, default=func.current_timestamp())
+    updated_at = Column(DateTime, nullable=False, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+# Catalog of uploads, one row per upload (app/core/media_store.py), so /upload/list
+# is an indexed query instead of a directory scan.
+# Rebuilt from the files on disk by scripts/reconcile_media_catalog.py
+class TblMediaFiles(Base):
+    __tablename__ = 'tbl_media_files'
+    __table_args__ = (
+        Index('ix_media_files_tenant_folder_type_created', 'tenant_id', 'folder', 'file_type', 'created_at'),
+        Index('ix_media_files_tenant_created', 'tenant_id', 'created_at'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, nullable=False, default=0)  # 0 = global (super_admin uploads)
+    blob_id = Column(Integer, index=True)  # tbl_media_blobs row; NULL for files uploaded before content addressing
+    folder = Column(String(100), nullable=False, default='general')
+    file_type = Column(String(20), nullable=False)  # image, video, document
+    path = Column(String(255), nullable=False, index=True)  # relative to the app dir, the URL is "/" + path
+    original_filename = Column(String(255))
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), index=True)
+    width = Column(Integer)  # images only
+    height = Column(Integer)
+    uploaded_by = Column(String(100))
+    created_at = Column(DateTime, nullable=False, default=func.current_timestamp())
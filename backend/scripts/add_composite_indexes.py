@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the composite tenant-scoped indexes declared in
+app/models/models.py (__table_args__) to an existing database.
+Indexes that already exist are skipped, so the script can be re-run safely.
+Usage: python scripts/add_composite_indexes.py [--dry-run]
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import inspect
+
+from app.db.session import engine
+from app.models.models import Base
+
+def get_composite_indexes():
+    """(table, index) pairs for every multi-column index declared on the models"""
+    indexes = []
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if len(index.columns) > 1:
+                indexes.append((table, index))
+    return indexes
+
+def add_composite_indexes(dry_run: bool = False):
+    """Create the declared composite indexes that are missing"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = 0
+
+    for table, index in get_composite_indexes():
+        if table.name not in existing_tables:
+            print(f"ℹ️ Table {table.name} does not exist, skipping {index.name}")
+            continue
+
+        existing = {existing_index["name"] for existing_index in inspector.get_indexes(table.name)}
+        if index.name in existing:
+            print(f"ℹ️ Index {index.name} already exists on {table.name}")
+            continue
+
+        columns = ", ".join(column.name for column in index.columns)
+        if dry_run:
+            print(f"📝 Would create {index.name} on {table.name} ({columns})")
+            continue
+
+        try:
+            index.create(bind=engine)
+            created += 1
+            print(f"✅ Created {index.name} on {table.name} ({columns})")
+        except Exception as e:
+            print(f"❌ Error creating {index.name}: {str(e)}")
+            raise
+
+    return created
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add composite tenant-scoped indexes")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the indexes that would be created")
+    args = parser.parse_args()
+
+    print("🚀 Running migration to add composite indexes...")
+    created = add_composite_indexes(dry_run=args.dry_run)
+    print(f"✅ Migration completed! ({created} indexes created)")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-tenant daily statistics rollup (tbl_daily_tenant_stats)
+from booking, customer, service booking and room stay tables.
+
+Run once after deploying the rollup table, and again whenever the counters
+need repairing (e.g. after bulk imports that bypass the CRUD layer).
+Usage: python scripts/backfill_daily_stats.py [--tenant-id ID]
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.session import SessionLocal, engine
+from app.models.models import TblDailyTenantStats
+from app.crud.crud_daily_stats import daily_stats
+
+def backfill_daily_stats(tenant_id: int = None):
+    """Create the rollup table if needed and recompute its rows"""
+    TblDailyTenantStats.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        rows = daily_stats.rebuild(db, tenant_id=tenant_id)
+        scope = f"tenant {tenant_id}" if tenant_id else "all tenants"
+        print(f"✅ Rebuilt {rows} daily statistics rows for {scope}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding daily statistics: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill tbl_daily_tenant_stats")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only rebuild this tenant")
+    args = parser.parse_args()
+
+    print("🚀 Backfilling daily statistics rollup...")
+    backfill_daily_stats(args.tenant_id)
+    print("✅ Backfill completed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark login latency under concurrent load against a running server.
+
+Fires --requests logins with --concurrency in flight and, at the same time,
+a light stream of /health probes, then prints p50/p95/p99 for both. The probe
+numbers show whether bcrypt work is starving unrelated endpoints.
+Usage: python scripts/benchmark_login.py [--url http://localhost:8000]
+       [--username hoteladmin] [--password admin123] [--concurrency 50] [--requests 500]
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(name, latencies, statuses, elapsed):
+    ms = [latency * 1000 for latency in latencies]
+    codes = ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items()))
+    print(f"📊 {name}: {len(ms)} requests in {elapsed:.2f}s ({len(ms) / elapsed:.1f} req/s) [{codes}]")
+    print(f"     p50={percentile(ms, 50):.1f}ms p95={percentile(ms, 95):.1f}ms "
+          f"p99={percentile(ms, 99):.1f}ms max={max(ms, default=0):.1f}ms")
+
+async def run_logins(client, args, latencies, statuses):
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start_time = time.perf_counter()
+            response = await client.post("/api/v1/auth/login", data={
+                "username": args.username,
+                "password": args.password
+            })
+            latencies.append(time.perf_counter() - start_time)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+
+async def run_probes(client, stop, latencies, statuses):
+    while not stop.is_set():
+        start_time = time.perf_counter()
+        response = await client.get("/health")
+        latencies.append(time.perf_counter() - start_time)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        await asyncio.sleep(0.05)
+
+async def benchmark_login(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        login_latencies, login_statuses = [], {}
+        probe_latencies, probe_statuses = [], {}
+        stop = asyncio.Event()
+
+        probes = asyncio.create_task(run_probes(client, stop, probe_latencies, probe_statuses))
+        start_time = time.perf_counter()
+        await run_logins(client, args, login_latencies, login_statuses)
+        elapsed = time.perf_counter() - start_time
+        stop.set()
+        await probes
+
+    report("login", login_latencies, login_statuses, elapsed)
+    report("/health during load", probe_latencies, probe_statuses, elapsed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure login p99 under concurrent load")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running API")
+    parser.add_argument("--username", default="hoteladmin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=50, help="Logins in flight at once")
+    parser.add_argument("--requests", type=int, default=500, help="Total number of logins")
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmarking {args.requests} logins with concurrency {args.concurrency} against {args.url}...")
+    asyncio.run(benchmark_login(args))
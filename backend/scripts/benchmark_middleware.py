@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the request middleware stack: the previous three BaseHTTPMiddleware
+classes (RequestLoggingMiddlewareSafe, SecurityHeadersMiddlewareSafe,
+PerformanceMonitoringMiddlewareSafe) against the single pure ASGI
+ObservabilityMiddleware, on a small in-process app (no server, no network).
+Reports requests/sec and p50/p99 for a JSON and a streaming endpoint.
+Usage: python scripts/benchmark_middleware.py [--requests 3000] [--concurrency 20] [--log]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.middleware.logging_safe import RequestLoggingMiddlewareSafe
+from app.middleware.observability import ObservabilityMiddleware
+from app.middleware.performance_safe import PerformanceMonitoringMiddlewareSafe
+from app.middleware.security_safe import SecurityHeadersMiddlewareSafe
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id, "name": f"Item {item_id}", "tags": ["a", "b", "c"]}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(20):
+                yield f"chunk {index}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    if stack == "legacy":
+        app.add_middleware(RequestLoggingMiddlewareSafe)
+        app.add_middleware(SecurityHeadersMiddlewareSafe)
+        app.add_middleware(PerformanceMonitoringMiddlewareSafe)
+    else:
+        app.add_middleware(ObservabilityMiddleware)
+    return app
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def run(app: FastAPI, path: str, total: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for index in remaining:
+                start_time = time.perf_counter()
+                response = await client.get(path.format(index=index))
+                assert response.status_code == 200, response.text
+                latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start_time
+    return total / elapsed, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+
+def benchmark_middleware(total: int, concurrency: int):
+    results = {}
+    for stack in ("legacy", "observability"):
+        app = build_app(stack)
+        # SecurityHeadersMiddlewareSafe prints a debug line per request
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, path in (("json", "/items/{index}"), ("stream", "/stream")):
+                results[(stack, name)] = asyncio.run(run(app, path, total, concurrency))
+
+    for name in ("json", "stream"):
+        for stack in ("legacy", "observability"):
+            rps, p50, p99 = results[(stack, name)]
+            print(f"📊 {name:6} {stack:13} {rps:8.0f} req/s  p50={p50:.2f}ms p99={p99:.2f}ms")
+        speedup = results[("observability", name)][0] / results[("legacy", name)][0]
+        print(f"     {name}: {speedup:.2f}x requests/sec")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare BaseHTTPMiddleware stack with ObservabilityMiddleware")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--log", action="store_true", help="Keep request/performance file logging enabled")
+    args = parser.parse_args()
+
+    if not args.log:
+        logging.disable(logging.WARNING)
+
+    print(f"🚀 Benchmarking middleware stacks ({args.requests} requests, concurrency {args.concurrency})...")
+    benchmark_middleware(args.requests, args.concurrency)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Index advisor: runs EXPLAIN over the canonical queries of the dashboard and
+booking management endpoints and reports the ones that fall back to a full
+table scan (or sort without an index).
+
+Supports MySQL (EXPLAIN) and SQLite (EXPLAIN QUERY PLAN).
+Usage: python scripts/index_advisor.py [--tenant-id ID] [--verbose]
+Exit code is 1 when at least one full scan is found, so it can run in CI.
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func, or_, text
+
+from app.db.session import SessionLocal
+from app.models.models import (
+    TblBookingRequests, TblCustomers, TblRooms, TblFacilities, TblServices,
+    TblPromotions, TblVouchers, TblCustomerVouchers, TblRoomStays, TblDailyTenantStats
+)
+
+def get_canonical_queries(db, tenant_id: int):
+    """(name, query) pairs mirroring what dashboard.py / booking_management.py run"""
+    now = datetime.now()
+    week_ago = now - timedelta(days=7)
+    live_bookings = and_(TblBookingRequests.tenant_id == tenant_id, TblBookingRequests.deleted == 0)
+    newest_first = [TblBookingRequests.created_at.desc(), TblBookingRequests.id.desc()]
+
+    return [
+        # booking_management.py
+        ("bookings: list page", db.query(TblBookingRequests).filter(live_bookings).order_by(*newest_first).limit(51)),
+        ("bookings: list by status", db.query(TblBookingRequests).filter(
+            live_bookings, TblBookingRequests.status == "pending"
+        ).order_by(*newest_first).limit(51)),
+        ("bookings: list by check-in date", db.query(TblBookingRequests).filter(
+            live_bookings, TblBookingRequests.check_in_date >= week_ago
+        ).limit(51)),
+        ("bookings: keyset page", db.query(TblBookingRequests).filter(
+            live_bookings,
+            or_(
+                TblBookingRequests.created_at < week_ago,
+                and_(TblBookingRequests.created_at == week_ago, TblBookingRequests.id < 1000)
+            )
+        ).order_by(*newest_first).limit(51)),
+        ("bookings: count", db.query(func.count(TblBookingRequests.id)).filter(live_bookings)),
+        ("bookings: detail", db.query(TblBookingRequests).filter(live_bookings, TblBookingRequests.id == 1)),
+        ("bookings: related customers", db.query(TblCustomers).filter(TblCustomers.id.in_([1, 2, 3]))),
+        ("bookings: statistics rollup", db.query(func.sum(TblDailyTenantStats.bookings_total)).filter(
+            TblDailyTenantStats.tenant_id == tenant_id, TblDailyTenantStats.stat_date >= week_ago.date()
+        )),
+        # dashboard.py
+        ("dashboard: room types", db.query(TblRooms.room_type, func.count(TblRooms.id)).filter(
+            TblRooms.tenant_id == tenant_id, TblRooms.deleted == 0
+        ).group_by(TblRooms.room_type)),
+        ("dashboard: facilities count", db.query(func.count(TblFacilities.id)).filter(
+            TblFacilities.tenant_id == tenant_id, TblFacilities.deleted == 0
+        )),
+        ("dashboard: services count", db.query(func.count(TblServices.id)).filter(
+            TblServices.tenant_id == tenant_id, TblServices.deleted == 0
+        )),
+        ("dashboard: active promotions", db.query(func.count(TblPromotions.id)).filter(
+            TblPromotions.tenant_id == tenant_id, TblPromotions.deleted == 0, TblPromotions.status == "active"
+        )),
+        ("dashboard: active vouchers", db.query(func.count(TblVouchers.id)).filter(
+            TblVouchers.tenant_id == tenant_id, TblVouchers.deleted == 0, TblVouchers.status == "active"
+        )),
+        ("dashboard: recent bookings", db.query(TblBookingRequests).filter(live_bookings).order_by(
+            TblBookingRequests.created_at.desc()
+        ).limit(5)),
+        ("dashboard: daily chart", db.query(
+            TblDailyTenantStats.stat_date, func.sum(TblDailyTenantStats.bookings_total)
+        ).filter(
+            TblDailyTenantStats.tenant_id == tenant_id,
+            TblDailyTenantStats.stat_date >= date.today() - timedelta(days=6)
+        ).group_by(TblDailyTenantStats.stat_date)),
+        # customer statistics used by the listings
+        ("customers: bookings per customer", db.query(
+            TblBookingRequests.customer_id, func.count(TblBookingRequests.id)
+        ).filter(live_bookings, TblBookingRequests.customer_id.in_([1, 2, 3])).group_by(TblBookingRequests.customer_id)),
+        ("customers: vouchers per customer", db.query(
+            TblCustomerVouchers.customer_id, func.count(TblCustomerVouchers.id)
+        ).filter(
+            TblCustomerVouchers.customer_id.in_([1, 2, 3]), TblCustomerVouchers.deleted == 0
+        ).group_by(TblCustomerVouchers.customer_id)),
+        ("customers: spending per customer", db.query(
+            TblRoomStays.customer_id, func.sum(TblRoomStays.total_amount)
+        ).filter(
+            TblRoomStays.customer_id.in_([1, 2, 3]), TblRoomStays.tenant_id == tenant_id, TblRoomStays.deleted == 0
+        ).group_by(TblRoomStays.customer_id)),
+    ]
+
+def explain(db, query):
+    """Return (plan lines, problems) for a query on the current dialect"""
+    dialect = db.get_bind().dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    plan, problems = [], []
+
+    if dialect.name == "sqlite":
+        for row in db.execute(text("EXPLAIN QUERY PLAN " + sql)).mappings():
+            detail = row["detail"]
+            plan.append(detail)
+            if detail.startswith("SCAN ") and "USING" not in detail:
+                problems.append(f"full scan: {detail}")
+            elif "TEMP B-TREE" in detail:
+                problems.append(f"sort without index: {detail}")
+    elif dialect.name == "mysql":
+        for row in db.execute(text("EXPLAIN " + sql)).mappings():
+            extra = row.get("Extra") or ""
+            plan.append(f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {extra}".strip())
+            if row["type"] == "ALL":
+                problems.append(f"full scan on {row['table']} (~{row['rows']} rows)")
+            elif "Using filesort" in extra:
+                problems.append(f"sort without index on {row['table']}")
+    else:
+        raise RuntimeError(f"EXPLAIN is not supported for dialect {dialect.name}")
+
+    return plan, problems
+
+def run_index_advisor(tenant_id: int = 1, verbose: bool = False) -> int:
+    """Print a report and return the number of queries with problems"""
+    db = SessionLocal()
+    flagged = 0
+    try:
+        for name, query in get_canonical_queries(db, tenant_id):
+            plan, problems = explain(db, query)
+            if problems:
+                flagged += 1
+                print(f"⚠️ {name}")
+                for problem in problems:
+                    print(f"     {problem}")
+            else:
+                print(f"✅ {name}")
+            if verbose:
+                for line in plan:
+                    print(f"     | {line}")
+    finally:
+        db.close()
+    return flagged
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report full table scans in canonical queries")
+    parser.add_argument("--tenant-id", type=int, default=1, help="Tenant used in the query filters")
+    parser.add_argument("--verbose", action="store_true", help="Print the full query plans")
+    args = parser.parse_args()
+
+    print("🔍 Explaining canonical dashboard/booking queries...")
+    flagged = run_index_advisor(args.tenant_id, args.verbose)
+    print(f"{'❌' if flagged else '✅'} {flagged} queries need attention")
+    sys.exit(1 if flagged else 0)
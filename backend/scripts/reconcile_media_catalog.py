@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Rebuild the media catalog (tbl_media_files) and the content-addressed blob
+index (tbl_media_blobs) from the files under uploads/.
+
+Run from the backend directory (uploads/ is relative to it) once after
+deploying the catalog, so files uploaded before it are listed by
+/upload/list, and whenever files were added or removed outside the API
+(restored backups, manual cleanup). Run it while no uploads are in progress.
+--image-variants also renders the missing thumbnails / WebP widths of the
+cataloged images (app/core/image_variants.py), e.g. after changing
+IMAGE_VARIANT_WIDTHS or for images uploaded before variants existed.
+Usage: python scripts/reconcile_media_catalog.py [--tenant-id ID] [--root uploads] [--image-variants]
+"""
+import argparse
+import sys
+import os
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.session import SessionLocal, engine
+from app.models.models import TblMediaBlobs, TblMediaFiles
+from app.core.media_store import MediaStore, media_store
+from app.core.image_variants import image_variants
+
+def generate_image_variants(db, tenant_id: int = None):
+    """Render the missing variants of every cataloged image, in this process"""
+    query = db.query(TblMediaFiles.path, TblMediaFiles.width).filter(
+        TblMediaFiles.file_type == "image", TblMediaFiles.width.isnot(None)
+    )
+    if tenant_id is not None:
+        query = query.filter(TblMediaFiles.tenant_id == tenant_id)
+    images = generated = failed = 0
+    for path, width in query.distinct():
+        images += 1
+        try:
+            generated += image_variants.generate(Path(path), width)
+        except Exception as e:
+            failed += 1
+            print(f"⚠️  {path}: {str(e)}")
+    print(f"✅ Image variants: {generated} rendered for {images} images ({failed} failed)")
+
+def reconcile_media_catalog(tenant_id: int = None, root: str = None, variants: bool = False):
+    """Create the media tables if needed and make them match the files on disk"""
+    TblMediaBlobs.__table__.create(bind=engine, checkfirst=True)
+    TblMediaFiles.__table__.create(bind=engine, checkfirst=True)
+
+    store = MediaStore(root) if root else media_store
+    db = SessionLocal()
+    try:
+        stats = store.reconcile(db, tenant_id=tenant_id)
+        scope = f"tenant {tenant_id}" if tenant_id is not None else "all tenants"
+        print(f"✅ Scanned {stats['files']} files for {scope}")
+        print(f"   Catalog entries: +{stats['entries_added']} / -{stats['entries_removed']}")
+        print(f"   Blobs: +{stats['blobs_added']} / -{stats['blobs_removed']}, "
+              f"{stats['ref_counts_fixed']} reference counts fixed")
+        if variants:
+            generate_image_variants(db, tenant_id)
+    except Exception as e:
+        print(f"❌ Error reconciling media catalog: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild tbl_media_files / tbl_media_blobs from uploads/")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only this tenant (0 = global uploads)")
+    parser.add_argument("--root", default=None, help="Uploads directory (default: uploads)")
+    parser.add_argument("--image-variants", action="store_true", help="Also render missing image variants")
+    args = parser.parse_args()
+
+    print("🚀 Reconciling media catalog...")
+    reconcile_media_catalog(args.tenant_id, args.root, args.image_variants)
+    print("✅ Reconciliation completed!")
@@ -0,0 +1,90 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database (sync and aiosqlite
+engines on the same file), seeded with two tenants.
+
+Run from the backend directory: python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+# Before anything imports app.core.config: settings and engines are created at import time
+os.environ["DATABASE_URI"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="zalo_be_tests_"), "test.db")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.api_v1.endpoints.auth import create_access_token
+from app.db.query_tracking import assert_max_queries
+from app.db.session_local import SessionLocal, engine
+from app.main import app
+from app.models.models import (
+    Base, TblAdminUsers, TblBookingRequests, TblCustomers, TblCustomerVouchers, TblRooms, TblTenants,
+    TblVouchers
+)
+
+TENANT_ID = 1
+OTHER_TENANT_ID = 2
+BOOKINGS_PER_TENANT = 120
+
+
+@pytest.fixture(scope="session")
+def seed_data():
+    """Tables and data shared by all tests; tests must not modify them"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for tenant_id in (TENANT_ID, OTHER_TENANT_ID):
+            db.add(TblTenants(id=tenant_id, name=f"Hotel {tenant_id}", domain=f"hotel{tenant_id}.test"))
+        admin = TblAdminUsers(
+            tenant_id=TENANT_ID, username="admin", hashed_password="not-used",
+            role="hotel_admin", status="active"
+        )
+        db.add(admin)
+        for i in range(1, 21):
+            tenant_id = TENANT_ID if i % 2 else OTHER_TENANT_ID
+            db.add(TblCustomers(id=i, tenant_id=tenant_id, name=f"Customer {i}", phone="0900000000"))
+            db.add(TblRooms(id=i, tenant_id=tenant_id, room_type="Deluxe", room_name=f"Room {i}"))
+        db.flush()
+        voucher = TblVouchers(tenant_id=TENANT_ID, code="WELCOME10", discount_type="percentage", discount_value=10)
+        db.add(voucher)
+        db.flush()
+        db.add(TblCustomerVouchers(tenant_id=TENANT_ID, customer_id=1, voucher_id=voucher.id))
+        # created_at left to the database default (CURRENT_TIMESTAMP), as in production inserts
+        for tenant_id, first_id in ((TENANT_ID, 1), (OTHER_TENANT_ID, 2)):
+            for i in range(BOOKINGS_PER_TENANT):
+                db.add(TblBookingRequests(
+                    tenant_id=tenant_id,
+                    customer_id=first_id + (i % 10) * 2,
+                    room_id=first_id + (i % 10) * 2,
+                    booking_date=datetime.now(),
+                    status=("pending", "confirmed", "cancelled", "completed")[i % 4]
+                ))
+        db.commit()
+        yield {"admin_id": admin.id}
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def client(seed_data):
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def auth_headers(seed_data):
+    """Bearer token of the tenant admin (tenant TENANT_ID)"""
+    token = create_access_token({"sub": str(seed_data["admin_id"]), "tenant_id": TENANT_ID})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def max_queries():
+    """
+    with max_queries(3):
+        client.get(...)
+    fails the test (listing the statements) if the block runs more than 3 queries
+    """
+    return assert_max_queries
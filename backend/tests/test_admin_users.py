@@ -0,0 +1,63 @@
+from app.core.password_hashing import password_hasher
+from app.crud.crud_admin_users import crud_admin_user
+from app.db.session_local import SessionLocal
+
+
+def test_cached_admin_user_snapshot_has_no_password_hash(seed_data):
+    admin_id = seed_data["admin_id"]
+    crud_admin_user.invalidate_cache(admin_id)
+    db = SessionLocal()
+    try:
+        crud_admin_user.get_cached(db, id=admin_id)  # fills the cache
+        assert "hashed_password" not in crud_admin_user.snapshot_cache.get(admin_id)
+
+        cached = crud_admin_user.get_cached(db, id=admin_id)
+        assert cached.id == admin_id
+        assert cached.status == "active"
+    finally:
+        db.close()
+
+
+def set_admin_password(admin_id, password):
+    db = SessionLocal()
+    try:
+        user = crud_admin_user.get_by_id(db, id=admin_id)
+        crud_admin_user.update_password(db, db_obj=user, new_password=password)
+    finally:
+        db.close()
+
+
+def test_profile_change_password_uses_password_hasher(client, auth_headers, seed_data):
+    set_admin_password(seed_data["admin_id"], "old-secret")
+    response = client.put("/api/v1/profile/change-password", headers=auth_headers, json={
+        "current_password": "old-secret",
+        "new_password": "new-secret",
+        "confirm_password": "new-secret"
+    })
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        user = crud_admin_user.get_by_id(db, id=seed_data["admin_id"])
+        assert crud_admin_user.verify_password("new-secret", user.hashed_password)
+        assert not crud_admin_user.verify_password("old-secret", user.hashed_password)
+    finally:
+        db.close()
+
+
+def test_password_change_is_503_when_password_hasher_is_busy(client, auth_headers, seed_data, monkeypatch):
+    set_admin_password(seed_data["admin_id"], "old-secret")
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.put("/api/v1/profile/change-password", headers=auth_headers, json={
+        "current_password": "old-secret",
+        "new_password": "new-secret",
+        "confirm_password": "new-secret"
+    })
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    response = client.post("/api/v1/auth/change-password", headers=auth_headers, params={
+        "current_password": "old-secret", "new_password": "new-secret"
+    })
+    assert response.status_code == 503
@@ -0,0 +1,38 @@
+from app.db.query_tracking import count_queries
+
+from conftest import BOOKINGS_PER_TENANT
+
+
+def test_booking_list_query_budget(client, auth_headers, max_queries):
+    client.get("/api/v1/booking-requests/management", headers=auth_headers)  # warms the admin user cache
+
+    # count, page, customers, rooms
+    with max_queries(4):
+        response = client.get("/api/v1/booking-requests/management?limit=20", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data["bookings"]) == 20
+    assert data["pagination"]["total"] == BOOKINGS_PER_TENANT
+
+
+def test_booking_list_query_count_independent_of_page_size(client, auth_headers):
+    client.get("/api/v1/booking-requests/management", headers=auth_headers)  # warms the admin user cache
+
+    counts = {}
+    for limit in (5, 100):
+        with count_queries() as counter:
+            response = client.get(f"/api/v1/booking-requests/management?limit={limit}", headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()["data"]["bookings"]) == limit
+        counts[limit] = counter.count
+
+    # Customers and rooms are resolved per page, not per booking
+    assert counts[5] == counts[100], counter.report()
+
+
+def test_booking_statistics_route(client, auth_headers):
+    # Declared before /{booking_id}, which would otherwise answer 422 for "statistics"
+    response = client.get("/api/v1/booking-requests/management/statistics?days=30", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["success"] is True
@@ -0,0 +1,45 @@
+from conftest import BOOKINGS_PER_TENANT
+
+
+def test_customer_statistics_route(client, auth_headers):
+    # Declared before /{customer_id}, which would otherwise answer 422 for "statistics"
+    response = client.get("/api/v1/customers/management/statistics?days=30", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert data["overview"]["total_customers"] == 10
+    assert len(data["monthly_acquisition"]) == 6
+
+
+def test_customer_list(client, auth_headers):
+    response = client.get("/api/v1/customers/management?search_query=Customer 1", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    customers = response.json()["data"]["customers"]
+    # Tenant 1 has the odd ids: "Customer 1", "Customer 11", ... "Customer 19"
+    assert {customer["id"] for customer in customers} == {1, 11, 13, 15, 17, 19}
+    customer = next(customer for customer in customers if customer["id"] == 1)
+    assert customer["full_name"] == "Customer 1"
+    assert customer["total_bookings"] > 0
+    assert customer["last_booking_date"] is not None
+
+
+def test_customer_list_sorted_by_name(client, auth_headers):
+    response = client.get("/api/v1/customers/management?sort_by=name&sort_order=asc", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    names = [customer["full_name"] for customer in response.json()["data"]["customers"]]
+    assert names == sorted(names)
+
+
+def test_customer_profile(client, auth_headers):
+    response = client.get("/api/v1/customers/management/1", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    profile = response.json()["data"]
+    assert profile["full_name"] == "Customer 1"
+    # conftest spreads each tenant's bookings over 10 customers
+    assert profile["total_bookings"] == BOOKINGS_PER_TENANT // 10
+    assert len(profile["booking_history"]) == BOOKINGS_PER_TENANT // 10
+    assert [voucher["voucher_code"] for voucher in profile["vouchers"]] == ["WELCOME10"]
+
+
+def test_customer_profile_of_other_tenant_is_hidden(client, auth_headers):
+    response = client.get("/api/v1/customers/management/2", headers=auth_headers)
+    assert response.status_code == 404